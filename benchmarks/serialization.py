@@ -0,0 +1,81 @@
+# сравнение сериализации ответов: через pydantic-модель (валидация + дамп)
+# и напрямую pydantic_core.to_json. Запуск: PYTHONPATH=src python benchmarks/serialization.py
+import timeit
+from itertools import count
+from datetime import date, datetime, timezone
+
+from pydantic_core import to_json
+
+from domain.entities import Employee
+from presentation.api.responses import employee_item
+from presentation.api.schemas import (
+    DepartmentTreeResponse,
+    EmployeePage,
+    EmployeeResponse,
+)
+
+CREATED_AT = datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)
+DEPARTMENT_IDS = count(1)
+
+
+def make_employees(count: int, department_id: int = 1) -> list[Employee]:
+    return [
+        Employee(i, department_id, f"Employee {i}", "Dev", date(2023, 1, 9), CREATED_AT)
+        for i in range(count)
+    ]
+
+
+def make_tree(depth: int, width: int, employees: int) -> dict:
+    node_id = next(DEPARTMENT_IDS)
+    return {
+        "id": node_id,
+        "name": f"Department {node_id}",
+        "parent_id": None,
+        "direct_headcount": employees,
+        "subtree_headcount": employees,
+        "children": (
+            [make_tree(depth - 1, width, employees) for _ in range(width)]
+            if depth > 0
+            else []
+        ),
+        "employees": [employee_item(e) for e in make_employees(employees, node_id)],
+        "children_next_cursor": None,
+        "employees_next_cursor": None,
+    }
+
+
+def report(name: str, model_path, fast_path, number: int) -> None:
+    assert len(model_path()) == len(fast_path())
+    model = min(timeit.repeat(model_path, number=number, repeat=5)) / number
+    fast = min(timeit.repeat(fast_path, number=number, repeat=5)) / number
+    print(
+        f"{name:<28} model {model * 1000:8.3f} ms   "
+        f"to_json {fast * 1000:8.3f} ms   x{model / fast:.1f}"
+    )
+
+
+def main() -> None:
+    # 1 + 5 + 25 + 125 подразделений по 20 сотрудников
+    tree = make_tree(depth=3, width=5, employees=20)
+    report(
+        "tree (156 departments)",
+        lambda: DepartmentTreeResponse.model_validate(tree).model_dump_json().encode(),
+        lambda: to_json(tree),
+        number=20,
+    )
+
+    employees = make_employees(500)
+    report(
+        "employees page (500)",
+        lambda: EmployeePage(
+            items=[EmployeeResponse.from_domain(e) for e in employees]
+        ).model_dump_json().encode(),
+        lambda: to_json(
+            {"items": [employee_item(e) for e in employees], "next_cursor": None}
+        ),
+        number=50,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import random
+import sys
+from contextvars import ContextVar, Token
+
+from loguru import logger
+
+from .settings import Settings
+
+__all__ = [
+    "RouteSampler",
+    "bind_request",
+    "current_route",
+    "format_record",
+    "reset_request",
+    "setup_logging",
+]
+
+FORMAT = (
+    "<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | <level>{level: <8}</level> | "
+    "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - "
+    "<level>{message}</level>"
+)
+# начиная с этого уровня записи пишутся всегда, без выборки
+ALWAYS_LEVEL = logger.level("WARNING").no
+
+# состояние текущего запроса: ASGI scope и решения о выборке каждого фильтра
+_request: ContextVar[dict | None] = ContextVar("log_request", default=None)
+
+
+def bind_request(scope: dict) -> Token:
+    return _request.set({"scope": scope, "sampled": {}})
+
+
+def reset_request(token: Token) -> None:
+    _request.reset(token)
+
+
+def current_route() -> str | None:
+    # маршрут текущего запроса: метод и шаблон пути (до маршрутизации — путь)
+    state = _request.get()
+    if state is None:
+        return None
+    scope = state["scope"]
+    route = getattr(scope.get("route"), "path_format", scope["path"])
+    return f"{scope['method']} {route}"
+
+
+def format_record(record: dict) -> str:
+    # объекты из именованных аргументов (logger.info("...", department=d))
+    # попадают в extra и превращаются в строку здесь, то есть только для
+    # записей, прошедших фильтр
+    if record["extra"]:
+        return FORMAT + " | {extra}\n{exception}"
+    return FORMAT + "\n{exception}"
+
+
+class RouteSampler:
+    # фильтр sink: для каждого запроса один раз решает, пишутся ли его записи
+    # ниже WARNING. Доля запросов — по имени маршрута (имя функции-эндпоинта,
+    # у GET и PATCH одного пути они разные), иначе default_rate
+    def __init__(
+        self, default_rate: float = 1.0, rates: dict[str, float] | None = None
+    ):
+        self.default_rate = default_rate
+        self.rates = rates or {}
+
+    def __call__(self, record: dict) -> bool:
+        if record["level"].no >= ALWAYS_LEVEL:
+            return True
+        state = _request.get()
+        if state is None:
+            return True
+
+        decisions = state["sampled"]
+        sampled = decisions.get(self)
+        if sampled is None:
+            route = state["scope"].get("route")
+            name = getattr(route, "name", None)
+            sampled = random.random() < self.rates.get(name, self.default_rate)
+            # до маршрутизации маршрут ещё не известен, решение не запоминаем
+            if route is not None:
+                decisions[self] = sampled
+        return sampled
+
+
+def setup_logging(settings: Settings, sink=sys.stderr) -> int:
+    # запись в sink идёт из фонового потока (enqueue), обработчики не ждут вывода
+    logger.remove()
+    return logger.add(
+        sink,
+        level=settings.log_level,
+        format=format_record,
+        filter=RouteSampler(settings.log_sample_rate, settings.log_sample_rates),
+        enqueue=True,
+        backtrace=False,
+        diagnose=False,
+    )
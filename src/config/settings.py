@@ -3,6 +3,59 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     postgres_dsn: str
+    # DSN реплик только для чтения, в env — JSON-список; пусто — читаем из primary
+    postgres_replica_dsns: list[str] = []
+    # сколько секунд после записи клиент читает из primary (0 — не привязывать);
+    # время записи клиент получает и возвращает в cookie last_write_at или
+    # заголовке X-Last-Write-At
+    replica_read_your_writes_seconds: float = 0.0
+
+    # пул соединений одного воркера (для primary и для каждой реплики)
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    # сколько секунд ждать свободного соединения
+    db_pool_timeout: float = 30.0
+    # пересоздавать соединения старше стольких секунд (-1 — не пересоздавать)
+    db_pool_recycle: int = -1
+    # проверять соединение перед выдачей из пула
+    db_pool_pre_ping: bool = False
+    # размер кеша подготовленных запросов asyncpg на соединение (0 — отключить)
+    db_statement_cache_size: int = 100
+
+    # кеш ответов GET /departments/{id}: число деревьев (0 — отключить) и
+    # сколько секунд дерево живёт; записи других воркеров видны через ttl
+    tree_cache_size: int = 0
+    tree_cache_ttl: float = 30.0
+
+    # индекс структуры подразделений в памяти процесса
+    hierarchy_index_enabled: bool = False
+    # как часто (в секундах) сверять версию индекса с БД
+    hierarchy_index_check_interval: float = 1.0
+    # путь к общему для воркеров файлу-снимку; если задан, индекс читается из него
+    hierarchy_snapshot_path: str | None = None
+
+    # уровень логов и доля запросов, записи которых ниже WARNING пишутся;
+    # для отдельных маршрутов — по имени эндпоинта, в env JSON-объект, например
+    # {"get_department_tree": 0.01}
+    log_level: str = "INFO"
+    log_sample_rate: float = 1.0
+    log_sample_rates: dict[str, float] = {}
+
+    # бюджет числа запросов к БД на HTTP-запрос (0 — не проверять); сверх него
+    # пишется предупреждение. Для маршрутов — по имени эндпоинта, в env JSON
+    query_budget: int = 0
+    query_budgets: dict[str, int] = {}
+
+    # журнал медленных запросов: порог в секундах (0 — выключен), доля
+    # медленных запросов, для которых снимается EXPLAIN (ANALYZE, BUFFERS),
+    # и сколько последних запросов хранить для GET /system/slow-queries
+    slow_query_seconds: float = 0.0
+    slow_query_explain_rate: float = 0.0
+    slow_query_log_size: int = 100
+
+    # токен служебных эндпоинтов с SQL и параметрами (/system/slow-queries),
+    # передаётся в заголовке X-Admin-Token; не задан — эндпоинты отключены
+    admin_token: str | None = None
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
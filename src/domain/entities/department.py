@@ -8,6 +8,8 @@ class Department:
     name: str
     parent_id: int | None
     created_at: datetime | None = None
+    direct_headcount: int = 0
+    subtree_headcount: int = 0
 
     @classmethod
     def create(cls, name: str, parent_id: int | None) -> "Department":
@@ -1,3 +1,7 @@
-from .base import NotFoundError, AlreadyExistsError
-from .department import DepartmentAlreadyExistsError, DepartmentNotFoundError
+from .base import NotFoundError, AlreadyExistsError, ConflictError
+from .department import (
+    DepartmentAlreadyExistsError,
+    DepartmentNotFoundError,
+    DepartmentCycleError,
+)
 from .employee import EmployeeAlreadyExistsError, EmployeeNotFoundError
@@ -1,4 +1,4 @@
-from domain.exceptions import NotFoundError, AlreadyExistsError
+from domain.exceptions import NotFoundError, AlreadyExistsError, ConflictError
 
 
 class DepartmentNotFoundError(NotFoundError):
@@ -7,3 +7,7 @@ class DepartmentNotFoundError(NotFoundError):
 
 class DepartmentAlreadyExistsError(AlreadyExistsError):
     pass
+
+
+class DepartmentCycleError(ConflictError):
+    pass
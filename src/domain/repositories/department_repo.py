@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
+from typing import AsyncIterator
 
-from domain.entities import Department
+from domain.entities import Department, Employee
 
 
 class AbstractDepartmentRepository(ABC):
@@ -8,8 +9,9 @@ class AbstractDepartmentRepository(ABC):
     async def exists(self, name: str) -> bool:
         raise NotImplemented
 
+    # None — подразделение с таким именем у этого родителя уже есть
     @abstractmethod
-    async def create(self, entity: Department) -> Department:
+    async def create(self, entity: Department) -> Department | None:
         raise NotImplemented
 
     @abstractmethod
@@ -29,19 +31,65 @@ class AbstractDepartmentRepository(ABC):
     async def update(self, entity: Department) -> Department | None:
         raise NotImplemented
 
+    @abstractmethod
+    async def get_ancestors(self, department_id: int) -> list[Department]:
+        raise NotImplemented
+
+    @abstractmethod
+    async def is_descendant(self, department_id: int, ancestor_id: int) -> bool:
+        raise NotImplemented
+
+    @abstractmethod
+    async def get_ancestor_ids(self, department_ids: list[int]) -> set[int]:
+        raise NotImplemented
+
     @abstractmethod
     async def delete(
         self,
         department_id: int,
         mode: str,
         reassign_to_department_id: int | None,
-    ):
+    ) -> bool:
+        raise NotImplemented
+
+    @abstractmethod
+    async def get_children(self, parent_id: int) -> list[Department]:
         raise NotImplemented
 
     @abstractmethod
-    async def get_children(self, parent_id: int):
+    async def get_employees(self, department_id: int) -> list[Employee]:
+        raise NotImplemented
+
+    # children_limit — не больше стольких детей у каждого узла
+    @abstractmethod
+    async def get_subtree(
+        self, department_id: int, depth: int, children_limit: int | None = None
+    ) -> list[Department]:
+        raise NotImplemented
+
+    @abstractmethod
+    def stream_tree(
+        self, department_id: int, depth: int, include_employees: bool
+    ) -> AsyncIterator[Department | Employee]:
+        raise NotImplemented
+
+    @abstractmethod
+    def stream_departments(
+        self, department_id: int | None
+    ) -> AsyncIterator[Department]:
+        raise NotImplemented
+
+    @abstractmethod
+    async def get_children_pages(
+        self,
+        parent_ids: list[int],
+        limit: int | None,
+        after_id: int | None = None,
+    ) -> list[Department]:
         raise NotImplemented
 
     @abstractmethod
-    async def get_employees(self, department_id: int):
+    async def get_employees_by_department_ids(
+        self, department_ids: list[int], limit: int | None = None
+    ) -> list[Employee]:
         raise NotImplemented
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import AsyncIterator
 
 from domain.entities import Employee
 
@@ -12,14 +13,56 @@ class AbstractEmployeeRepository(ABC):
     async def create(self, entity: Employee) -> Employee:
         raise NotImplemented
 
+    # вставка пачкой; возвращает позиции записей, чьих подразделений нет
+    @abstractmethod
+    async def bulk_create(self, entities: list[Employee]) -> list[int]:
+        raise NotImplemented
+
     @abstractmethod
     async def get_by_id(self, employee_id: int) -> Employee | None:
         raise NotImplemented
 
+    @abstractmethod
+    async def list_page(
+        self,
+        department_id: int | None,
+        after: tuple[int, int] | None,
+        limit: int,
+    ) -> list[Employee]:
+        raise NotImplemented
+
+    # сотрудники вместе с названием подразделения, потоком
+    @abstractmethod
+    def stream_with_department_names(
+        self, department_id: int | None, subtree: bool
+    ) -> AsyncIterator[tuple[Employee, str]]:
+        raise NotImplemented
+
     @abstractmethod
     async def update(self, entity: Employee) -> Employee | None:
         raise NotImplemented
 
     @abstractmethod
-    async def delete(self, employee_id: int):
+    async def delete(self, employee_id: int) -> bool:
+        raise NotImplemented
+
+    # массовые операции: выборка по ids и/или текущему подразделению,
+    # возвращают id затронутых сотрудников
+    @abstractmethod
+    async def move_many(
+        self,
+        ids: list[int] | None,
+        department_id: int | None,
+        target_department_id: int,
+    ) -> list[int]:
+        raise NotImplemented
+
+    @abstractmethod
+    async def set_positions(self, positions: dict[int, str]) -> list[int]:
+        raise NotImplemented
+
+    @abstractmethod
+    async def delete_many(
+        self, ids: list[int] | None, department_id: int | None
+    ) -> list[int]:
         raise NotImplemented
@@ -1,5 +1,11 @@
-from domain.exceptions import DepartmentNotFoundError, DepartmentAlreadyExistsError
-from domain.entities import Department
+from typing import AsyncIterator
+
+from domain.exceptions import (
+    DepartmentNotFoundError,
+    DepartmentAlreadyExistsError,
+    DepartmentCycleError,
+)
+from domain.entities import Department, Employee
 from domain.uow import AbstractUnitOfWork
 
 
@@ -8,10 +14,9 @@ class DepartmentService:
         self.__department_repo = uow.department_repo
 
     async def create(self, entity: Department) -> Department:
-        exists = await self.__department_repo.exists(entity.name)
-        if exists:
-            raise DepartmentAlreadyExistsError
         department = await self.__department_repo.create(entity)
+        if department is None:
+            raise DepartmentAlreadyExistsError
         return department
 
     async def get_by_id(self, department_id: int) -> Department:
@@ -20,12 +25,19 @@ class DepartmentService:
             raise DepartmentNotFoundError
         return department
 
+    async def get_ancestors(self, department_id: int) -> list[Department]:
+        ancestors = await self.__department_repo.get_ancestors(department_id)
+        if not ancestors:
+            raise DepartmentNotFoundError
+        return ancestors
+
     async def change_department(
         self,
         department_id: int,
         name: str | None,
         parent_id: int | None,
     ) -> Department:
+        await self._check_cycle(department_id, parent_id)
         new_department = await self.__department_repo.change_department(
             department_id=department_id, name=name, parent_id=parent_id
         )
@@ -34,11 +46,18 @@ class DepartmentService:
         return new_department
 
     async def update(self, entity: Department) -> Department:
+        await self._check_cycle(entity.id, entity.parent_id)
         new_department = await self.__department_repo.update(entity)
         if new_department is None:
             raise DepartmentNotFoundError
         return new_department
 
+    async def _check_cycle(self, department_id: int, parent_id: int | None) -> None:
+        if parent_id is None:
+            return
+        if await self.__department_repo.is_descendant(parent_id, department_id):
+            raise DepartmentCycleError
+
     async def delete(
         self,
         department_id: int,
@@ -46,60 +65,130 @@ class DepartmentService:
         reassign_to_department_id: int | None = None,
     ) -> None:
 
-        exists = await self.__department_repo.get_by_id(department_id)
-        if not exists:
-            raise DepartmentNotFoundError
-
         if mode == "reassign" and not reassign_to_department_id:
             raise ValueError("reassign_to_department_id is required when mode=reassign")
 
-        await self.__department_repo.delete(
+        # сотрудников нельзя переводить в удаляемое поддерево
+        if mode == "reassign" and await self.__department_repo.is_descendant(
+            reassign_to_department_id, department_id
+        ):
+            raise ValueError("reassign_to_department_id cannot be inside the deleted subtree")
+
+        deleted = await self.__department_repo.delete(
             department_id=department_id,
             mode=mode,
             reassign_to_department_id=reassign_to_department_id,
         )
+        if not deleted:
+            raise DepartmentNotFoundError
 
-    async def get_tree(
+    async def get_children_page(
+        self, department_id: int, after: tuple[int, int] | None, limit: int
+    ) -> tuple[list[Department], tuple[int, int] | None]:
+        # ключ страницы — (родитель, id последнего ребёнка): ключ другого
+        # подразделения дал бы чужую выборку, а не ошибку
+        if after is not None and after[0] != department_id:
+            raise ValueError("Cursor belongs to another department")
+        department = await self.__department_repo.get_by_id(department_id)
+        if department is None:
+            raise DepartmentNotFoundError
+
+        children = await self.__department_repo.get_children_pages(
+            [department_id], limit + 1, after[1] if after is not None else None
+        )
+        if len(children) <= limit:
+            return children, None
+        return children[:limit], (department_id, children[limit - 1].id)
+
+    async def stream_tree(
         self, department_id: int, depth: int = 1, include_employees: bool = True
-    ) -> dict:
+    ) -> AsyncIterator[Department | Employee]:
+        # проверка до начала потока, чтобы отсутствие подразделения было 404,
+        # а не оборванным ответом
         department = await self.__department_repo.get_by_id(department_id)
         if department is None:
             raise DepartmentNotFoundError
+        return self.__department_repo.stream_tree(
+            department_id, depth, include_employees
+        )
+
+    async def export(self, department_id: int | None) -> AsyncIterator[Department]:
+        if department_id is not None:
+            department = await self.__department_repo.get_by_id(department_id)
+            if department is None:
+                raise DepartmentNotFoundError
+        return self.__department_repo.stream_departments(department_id)
+
+    async def get_tree(
+        self,
+        department_id: int,
+        depth: int = 1,
+        include_employees: bool = True,
+        children_limit: int | None = None,
+        employees_limit: int | None = None,
+        max_nodes: int | None = None,
+    ) -> dict:
+        # поддерево приходит одним запросом, не больше children_limit (+1, чтобы
+        # узнать о продолжении) детей у каждого узла; дерево собирается по
+        # уровням в памяти. max_nodes ограничивает число подразделений в ответе.
+        # Узлы, у которых показаны не все дети или сотрудники, получают ключ
+        # продолжения: children_after / employees_after
+        budget = max_nodes - 1 if max_nodes is not None else None
+        limits = [limit for limit in (children_limit, budget) if limit is not None]
+        departments = await self.__department_repo.get_subtree(
+            department_id, depth, min(limits) + 1 if limits else None
+        )
+        if not departments:
+            raise DepartmentNotFoundError
 
-        async def build_tree(dept_id: int, current_depth: int) -> dict:
-            dept = await self.__department_repo.get_by_id(dept_id)
-            if not dept:
-                return {}
+        nodes: dict[int, dict] = {}
+        by_parent: dict[int, list[Department]] = {}
+        for dept in departments[1:]:
+            by_parent.setdefault(dept.parent_id, []).append(dept)
 
-            tree = {
+        def add_node(dept: Department) -> None:
+            nodes[dept.id] = {
                 "id": dept.id,
                 "name": dept.name,
                 "parent_id": dept.parent_id,
+                "direct_headcount": dept.direct_headcount,
+                "subtree_headcount": dept.subtree_headcount,
                 "children": [],
                 "employees": [],
+                "children_after": None,
+                "employees_after": None,
             }
 
-            if include_employees:
-                employees = await self.__department_repo.get_employees(dept.id)
-                tree["employees"] = [
-                    {
-                        "id": e.id,
-                        "full_name": e.full_name,
-                        "position": e.position,
-                        "department_id": dept.id,
-                        "created_at": e.created_at,
-                        "hired_at": e.hired_at,
-                    }
-                    for e in employees
-                ]
-
-            if current_depth < depth:
-                children = await self.__department_repo.get_children(dept.id)
-                for child in children:
-                    tree["children"].append(
-                        await build_tree(child.id, current_depth + 1)
-                    )
-
-            return tree
-
-        return await build_tree(department_id, 1)
+        add_node(departments[0])
+        level = [department_id]
+        for _ in range(depth - 1):
+            next_level = []
+            for parent_id in level:
+                found = by_parent.get(parent_id, [])
+                shown = found[:children_limit]
+                if budget is not None:
+                    shown = shown[:budget]
+                    budget -= len(shown)
+
+                for child in shown:
+                    add_node(child)
+                    nodes[parent_id]["children"].append(nodes[child.id])
+                    next_level.append(child.id)
+                if len(shown) < len(found):
+                    # 0 — показать детей с самого начала
+                    nodes[parent_id]["children_after"] = shown[-1].id if shown else 0
+            level = next_level
+
+        if include_employees:
+            employees = await self.__department_repo.get_employees_by_department_ids(
+                list(nodes),
+                employees_limit + 1 if employees_limit is not None else None,
+            )
+            for e in employees:
+                node = nodes[e.department_id]
+                if len(node["employees"]) == employees_limit:
+                    node["employees_after"] = node["employees"][-1].id
+                    continue
+                node["employees"].append(e)
+
+        return nodes[department_id]
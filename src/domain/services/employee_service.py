@@ -1,5 +1,10 @@
-from domain.exceptions import EmployeeNotFoundError, EmployeeAlreadyExistsError
-from domain.entities import Employee
+from typing import AsyncIterator
+
+from domain.exceptions import (
+    DepartmentNotFoundError,
+    EmployeeNotFoundError,
+)
+from domain.entities import Department, Employee
 from domain.uow import AbstractUnitOfWork
 
 
@@ -9,18 +14,57 @@ class EmployeeService:
         self.__departament_repo = uow.department_repo
 
     async def create(self, entity: Employee) -> Employee:
-        exists = await self.__departament_repo.exists(entity.id)
-        if exists:
-            raise EmployeeAlreadyExistsError
+        # отсутствие подразделения репозиторий сообщает DepartmentNotFoundError
         employe = await self.__employe_repo.create(entity)
         return employe
 
+    async def import_employees(self, entities: list[Employee]) -> list[int]:
+        # одна пачка — одна транзакция; возвращает позиции записей без подразделения
+        return await self.__employe_repo.bulk_create(entities)
+
     async def get_by_id(self, employe_id: int) -> Employee:
         employe = await self.__employe_repo.get_by_id(employe_id)
         if employe is None:
             raise EmployeeNotFoundError
         return employe
 
+    async def list_page(
+        self,
+        department_id: int | None,
+        after: tuple[int, int] | None,
+        limit: int,
+    ) -> tuple[list[Employee], tuple[int, int] | None]:
+        # ключ другого подразделения вернул бы чужих сотрудников или пустую
+        # страницу вместо ошибки
+        if department_id is not None and after is not None:
+            if after[0] != department_id:
+                raise ValueError("Cursor belongs to another department")
+        if department_id is not None:
+            department = await self.__departament_repo.get_by_id(department_id)
+            if department is None:
+                raise DepartmentNotFoundError
+
+        # на одну запись больше, чтобы понять, есть ли следующая страница
+        employees = await self.__employe_repo.list_page(department_id, after, limit + 1)
+        if len(employees) <= limit:
+            return employees, None
+
+        employees = employees[:limit]
+        last = employees[-1]
+        return employees, (last.department_id, last.id)
+
+    async def export(
+        self, department_id: int | None, subtree: bool
+    ) -> AsyncIterator[tuple[Employee, str]]:
+        if department_id is not None:
+            department = await self.__departament_repo.get_by_id(department_id)
+            if department is None:
+                raise DepartmentNotFoundError
+        return self.__employe_repo.stream_with_department_names(department_id, subtree)
+
+    async def get_department_path(self, department_id: int) -> list[Department]:
+        return await self.__departament_repo.get_ancestors(department_id)
+
     async def update(self, entity: Employee) -> Employee:
         new_employe = await self.__employe_repo.update(entity)
         if new_employe is None:
@@ -28,7 +72,35 @@ class EmployeeService:
         return new_employe
 
     async def delete(self, employe_id: int):
-        exists = await self.__employe_repo.exists(employe_id)
-        if exists is None:
+        deleted = await self.__employe_repo.delete(employe_id)
+        if not deleted:
             raise EmployeeNotFoundError
-        await self.__employe_repo.delete(employe_id)
+
+    async def move_many(
+        self,
+        ids: list[int] | None,
+        department_id: int | None,
+        target_department_id: int,
+    ) -> list[int]:
+        self._check_selection(ids, department_id)
+        target = await self.__departament_repo.get_by_id(target_department_id)
+        if target is None:
+            raise DepartmentNotFoundError
+        return await self.__employe_repo.move_many(
+            ids, department_id, target_department_id
+        )
+
+    async def set_positions(self, positions: dict[int, str]) -> list[int]:
+        return await self.__employe_repo.set_positions(positions)
+
+    async def delete_many(
+        self, ids: list[int] | None, department_id: int | None
+    ) -> list[int]:
+        self._check_selection(ids, department_id)
+        return await self.__employe_repo.delete_many(ids, department_id)
+
+    @staticmethod
+    def _check_selection(ids: list[int] | None, department_id: int | None) -> None:
+        # без условий массовая операция затронула бы всех сотрудников
+        if ids is None and department_id is None:
+            raise ValueError("Either ids or department_id is required")
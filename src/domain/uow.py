@@ -28,3 +28,8 @@ class AbstractUnitOfWork(ABC):
 
     @abstractmethod
     async def rollback(self): ...
+
+    # отпустить соединение раньше выхода из UoW, когда работа с БД
+    # закончена; по умолчанию ничего не делает
+    async def release(self) -> None:
+        return None
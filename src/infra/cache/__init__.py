@@ -0,0 +1,3 @@
+from .tree_cache import CachedTree, TreeCache, make_etag
+
+__all__ = ["CachedTree", "TreeCache", "make_etag"]
@@ -0,0 +1,89 @@
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Hashable
+
+__all__ = ["CachedTree", "TreeCache", "make_etag"]
+
+
+@dataclass(frozen=True)
+class CachedTree:
+    body: bytes
+    etag: str
+    # подразделения, попавшие в ответ: по ним запись находит устаревшие деревья
+    department_ids: frozenset[int]
+    expires_at: float
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+# готовые тела ответов GET /departments/{id} в памяти процесса: LRU по числу
+# записей и TTL. Запись в БД сбрасывает деревья, содержащие затронутые
+# подразделения или их предков (счётчики меняются по всей цепочке).
+# Записи других воркеров сюда не доходят, их видно не позже чем через ttl
+class TreeCache:
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        # растёт с каждой инвалидацией: дерево, прочитанное до неё, не кешируем
+        self.generation = 0
+        self._entries: OrderedDict[Hashable, CachedTree] = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> CachedTree | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(
+        self,
+        key: Hashable,
+        body: bytes,
+        department_ids: set[int],
+        generation: int | None,
+    ) -> CachedTree:
+        # generation — поколение на момент чтения из БД; None — не сохранять
+        entry = CachedTree(
+            body=body,
+            etag=make_etag(body),
+            department_ids=frozenset(department_ids),
+            expires_at=time.monotonic() + self.ttl,
+        )
+        if generation != self.generation or not self.enabled:
+            return entry
+
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, department_ids: set[int]) -> None:
+        if not department_ids:
+            return
+        self.generation += 1
+        stale = [
+            key
+            for key, entry in self._entries.items()
+            if not entry.department_ids.isdisjoint(department_ids)
+        ]
+        for key in stale:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._entries.clear()
@@ -0,0 +1,11 @@
+from sqlalchemy.exc import IntegrityError
+
+__all__ = ["UNIQUE_VIOLATION", "FOREIGN_KEY_VIOLATION", "sqlstate"]
+
+UNIQUE_VIOLATION = "23505"
+FOREIGN_KEY_VIOLATION = "23503"
+
+
+def sqlstate(error: IntegrityError) -> str | None:
+    # код ошибки PostgreSQL, asyncpg-адаптер кладёт его в исходное исключение
+    return getattr(error.orig, "sqlstate", None)
@@ -0,0 +1,290 @@
+import time
+from abc import ABC, abstractmethod
+from array import array
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from domain.entities import Department
+from infra.database.models import DepartmentORM, DepartmentHierarchyVersionORM
+
+__all__ = [
+    "HIERARCHY_VERSION_ID",
+    "DepartmentChanges",
+    "HierarchyIndex",
+    "DepartmentHierarchyIndex",
+    "department_changes",
+    "pop_department_changes",
+    "fetch_hierarchy_version",
+]
+
+HIERARCHY_VERSION_ID = 1
+NONE = -1
+
+
+@dataclass
+class DepartmentChanges:
+    # изменения структуры внутри одной транзакции, применяются к индексу после commit
+    ops: list[tuple[str, Department | int]] = field(default_factory=list)
+    first_version: int | None = None
+    last_version: int | None = None
+    # подразделения, чьё содержимое в дереве изменилось (структура, название,
+    # сотрудники); счётчики их предков UoW добирает сам перед commit
+    touched: set[int] = field(default_factory=set)
+
+    def upsert(self, department: Department) -> None:
+        self.ops.append(("upsert", department))
+
+    def delete(self, department_id: int) -> None:
+        self.ops.append(("delete", department_id))
+
+    def touch(self, *department_ids: int | None) -> None:
+        self.touched.update(i for i in department_ids if i is not None)
+
+    def record_version(self, version: int) -> None:
+        if self.first_version is None:
+            self.first_version = version
+        self.last_version = version
+
+
+def department_changes(session: AsyncSession) -> DepartmentChanges:
+    return session.info.setdefault("department_changes", DepartmentChanges())
+
+
+def pop_department_changes(session: AsyncSession) -> DepartmentChanges | None:
+    return session.info.pop("department_changes", None)
+
+
+async def fetch_hierarchy_version(session: AsyncSession) -> int:
+    version = await session.scalar(
+        select(DepartmentHierarchyVersionORM.version).where(
+            DepartmentHierarchyVersionORM.id == HIERARCHY_VERSION_ID
+        )
+    )
+    return version or 0
+
+
+class HierarchyIndex(ABC):
+    version: int | None
+
+    # False — индекс сейчас не может ответить, нужно идти в БД
+    @abstractmethod
+    async def refresh(self, session: AsyncSession) -> bool: ...
+
+    @abstractmethod
+    def apply(self, changes: DepartmentChanges) -> None: ...
+
+    # дождаться фоновой перестройки (запуск и остановка приложения, тесты)
+    async def wait(self) -> None:
+        return None
+
+    @abstractmethod
+    def get(self, department_id: int) -> Department | None: ...
+
+    @abstractmethod
+    def subtree(self, department_id: int, depth: int) -> list[Department]: ...
+
+    @abstractmethod
+    def children(
+        self, department_id: int, after_id: int | None, limit: int | None
+    ) -> list[Department]: ...
+
+    @abstractmethod
+    def ancestors(self, department_id: int) -> list[Department]: ...
+
+
+# структура подразделений в памяти процесса: параллельные массивы
+# id / parent / first_child / next_sibling, где parent, first_child и next_sibling
+# хранят позиции в массивах (NONE — нет). Индекс помнит версию из
+# department_hierarchy_version и перечитывается целиком, если версия в БД ушла вперёд
+class DepartmentHierarchyIndex(HierarchyIndex):
+    def __init__(self, check_interval: float = 0.0):
+        self.check_interval = check_interval
+        self.version: int | None = None
+        self._checked_at = 0.0
+        self._load([])
+
+    @property
+    def loaded(self) -> bool:
+        return self.version is not None
+
+    def _load(
+        self, rows: list[tuple[int, str, int | None, datetime | None]]
+    ) -> None:
+        rows = sorted(rows, key=lambda row: row[0])
+        self._ids = array("q", (row[0] for row in rows))
+        self._names = [row[1] for row in rows]
+        self._created_at = [row[3] for row in rows]
+        self._positions = {row[0]: pos for pos, row in enumerate(rows)}
+        self._parents = array(
+            "q", (self._positions.get(row[2], NONE) for row in rows)
+        )
+        self._first_child = array("q", [NONE]) * len(rows)
+        self._next_sibling = array("q", [NONE]) * len(rows)
+
+        # обход с конца, чтобы дети в списках шли по возрастанию id
+        for pos in range(len(rows) - 1, -1, -1):
+            self._link(pos, self._parents[pos])
+
+    def load(
+        self,
+        rows: list[tuple[int, str, int | None, datetime | None]],
+        version: int,
+    ) -> None:
+        self._load(rows)
+        self.version = version
+        self._checked_at = time.monotonic()
+
+    async def refresh(self, session: AsyncSession) -> bool:
+        if self.loaded and time.monotonic() - self._checked_at < self.check_interval:
+            return True
+
+        # сессия может смотреть на отстающую реплику: индекс назад не откатываем
+        version = await fetch_hierarchy_version(session)
+        if self.version is None or version > self.version:
+            result = await session.execute(
+                select(
+                    DepartmentORM.id,
+                    DepartmentORM.name,
+                    DepartmentORM.parent_id,
+                    DepartmentORM.created_at,
+                )
+            )
+            self.load([tuple(row) for row in result], version)
+        self._checked_at = time.monotonic()
+        return True
+
+    def apply(self, changes: DepartmentChanges) -> None:
+        # свои изменения применяются, только если индекс был ровно на версии
+        # перед транзакцией; иначе он перечитается при следующей проверке
+        if not self.loaded or changes.first_version is None:
+            return
+        if self.version != changes.first_version - 1:
+            return
+
+        for op, payload in changes.ops:
+            if op == "upsert":
+                self._upsert(payload)
+            else:
+                self._delete(payload)
+        self.version = changes.last_version
+
+    def _link(self, pos: int, parent_pos: int) -> None:
+        self._parents[pos] = parent_pos
+        if parent_pos == NONE:
+            return
+        self._next_sibling[pos] = self._first_child[parent_pos]
+        self._first_child[parent_pos] = pos
+
+    def _unlink(self, pos: int) -> None:
+        parent_pos = self._parents[pos]
+        if parent_pos != NONE:
+            if self._first_child[parent_pos] == pos:
+                self._first_child[parent_pos] = self._next_sibling[pos]
+            else:
+                sibling = self._first_child[parent_pos]
+                while self._next_sibling[sibling] != pos:
+                    sibling = self._next_sibling[sibling]
+                self._next_sibling[sibling] = self._next_sibling[pos]
+        self._parents[pos] = NONE
+        self._next_sibling[pos] = NONE
+
+    def _upsert(self, department: Department) -> None:
+        parent_pos = self._positions.get(department.parent_id, NONE)
+        pos = self._positions.get(department.id)
+
+        if pos is None:
+            pos = len(self._ids)
+            self._positions[department.id] = pos
+            self._ids.append(department.id)
+            self._names.append(department.name)
+            self._created_at.append(department.created_at)
+            self._parents.append(NONE)
+            self._first_child.append(NONE)
+            self._next_sibling.append(NONE)
+        else:
+            self._names[pos] = department.name
+            self._created_at[pos] = department.created_at or self._created_at[pos]
+            if self._parents[pos] == parent_pos:
+                return
+            self._unlink(pos)
+
+        self._link(pos, parent_pos)
+
+    def _delete(self, department_id: int) -> None:
+        pos = self._positions.get(department_id)
+        if pos is None:
+            return
+
+        removed = set(self._subtree_positions(pos))
+        self._load(
+            [
+                (self._ids[p], self._names[p], self._parent_id(p), self._created_at[p])
+                for p in range(len(self._ids))
+                if p not in removed
+            ]
+        )
+
+    def _parent_id(self, pos: int) -> int | None:
+        parent_pos = self._parents[pos]
+        return self._ids[parent_pos] if parent_pos != NONE else None
+
+    def _children(self, pos: int) -> list[int]:
+        children = []
+        child = self._first_child[pos]
+        while child != NONE:
+            children.append(child)
+            child = self._next_sibling[child]
+        return children
+
+    def _subtree_positions(self, pos: int, depth: int | None = None) -> list[int]:
+        # обход по уровням, внутри уровня по возрастанию id — как в get_subtree
+        result = [pos]
+        level = [pos]
+        current_depth = 1
+        while level and (depth is None or current_depth < depth):
+            level = [child for p in level for child in self._children(p)]
+            level.sort(key=self._ids.__getitem__)
+            result.extend(level)
+            current_depth += 1
+        return result
+
+    def _entity(self, pos: int) -> Department:
+        return Department(
+            id=self._ids[pos],
+            name=self._names[pos],
+            parent_id=self._parent_id(pos),
+            created_at=self._created_at[pos],
+        )
+
+    def get(self, department_id: int) -> Department | None:
+        pos = self._positions.get(department_id)
+        return self._entity(pos) if pos is not None else None
+
+    def subtree(self, department_id: int, depth: int) -> list[Department]:
+        pos = self._positions.get(department_id)
+        if pos is None:
+            return []
+        return [self._entity(p) for p in self._subtree_positions(pos, depth)]
+
+    def children(
+        self, department_id: int, after_id: int | None, limit: int | None
+    ) -> list[Department]:
+        pos = self._positions.get(department_id)
+        if pos is None:
+            return []
+
+        children = sorted(self._children(pos), key=self._ids.__getitem__)
+        if after_id is not None:
+            children = [p for p in children if self._ids[p] > after_id]
+        return [self._entity(p) for p in children[:limit]]
+
+    def ancestors(self, department_id: int) -> list[Department]:
+        pos = self._positions.get(department_id, NONE)
+        chain = []
+        while pos != NONE:
+            chain.append(self._entity(pos))
+            pos = self._parents[pos]
+        return chain[::-1]
@@ -0,0 +1,341 @@
+import asyncio
+import fcntl
+import mmap
+import os
+import struct
+import time
+from datetime import datetime, timedelta, timezone
+
+from loguru import logger
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from domain.entities import Department
+from infra.database.hierarchy import (
+    DepartmentChanges,
+    HierarchyIndex,
+    fetch_hierarchy_version,
+)
+from infra.database.models import DepartmentORM
+
+__all__ = [
+    "HierarchySnapshot",
+    "SnapshotHierarchyIndex",
+    "build_snapshot",
+    "write_snapshot",
+]
+
+# Формат файла (little-endian):
+#   заголовок   magic, version, count, names_size
+#   записи      count записей фиксированной ширины в порядке обхода в глубину:
+#               id, parent_id, depth, subtree_size, created_at (мкс от epoch),
+#               смещение и длина имени в блоке имён
+#   индекс      count пар (id, позиция записи), отсортированных по id
+#   имена       UTF-8 без разделителей
+# Поддерево записи i — это записи [i, i + subtree_size).
+MAGIC = b"DEPTSNP1"
+HEADER = struct.Struct("<8sqqq")
+RECORD = struct.Struct("<qqqqqII")
+INDEX_ENTRY = struct.Struct("<qq")
+
+NONE = -1
+NO_TIMESTAMP = -(2**63)
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _encode_timestamp(value: datetime | None) -> int:
+    if value is None:
+        return NO_TIMESTAMP
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+def _decode_timestamp(value: int) -> datetime | None:
+    if value == NO_TIMESTAMP:
+        return None
+    return EPOCH + timedelta(microseconds=value)
+
+
+def build_snapshot(
+    rows: list[tuple[int, str, int | None, datetime | None]], version: int
+) -> bytes:
+    rows = sorted(rows, key=lambda row: row[0])
+    by_id = {row[0]: row for row in rows}
+    children: dict[int | None, list[int]] = {}
+    for department_id, _, parent_id, _ in rows:
+        if parent_id not in by_id:
+            parent_id = None
+        children.setdefault(parent_id, []).append(department_id)
+
+    # обход в глубину, дети по возрастанию id
+    order: list[tuple[int, int]] = []
+    stack = [(department_id, 0) for department_id in reversed(children.get(None, []))]
+    while stack:
+        department_id, depth = stack.pop()
+        order.append((department_id, depth))
+        stack.extend(
+            (child_id, depth + 1)
+            for child_id in reversed(children.get(department_id, []))
+        )
+
+    subtree_sizes = [1] * len(order)
+    ancestors: list[int] = []
+    for pos, (_, depth) in enumerate(order):
+        del ancestors[depth:]
+        for ancestor_pos in ancestors:
+            subtree_sizes[ancestor_pos] += 1
+        ancestors.append(pos)
+
+    names = bytearray()
+    records = bytearray()
+    positions = {}
+    for pos, (department_id, depth) in enumerate(order):
+        _, name, parent_id, created_at = by_id[department_id]
+        encoded = name.encode()
+        records += RECORD.pack(
+            department_id,
+            parent_id if parent_id in by_id else NONE,
+            depth,
+            subtree_sizes[pos],
+            _encode_timestamp(created_at),
+            len(names),
+            len(encoded),
+        )
+        names += encoded
+        positions[department_id] = pos
+
+    index = b"".join(
+        INDEX_ENTRY.pack(department_id, positions[department_id])
+        for department_id in sorted(positions)
+    )
+    header = HEADER.pack(MAGIC, version, len(order), len(names))
+    return header + bytes(records) + index + bytes(names)
+
+
+def write_snapshot(
+    path: str,
+    rows: list[tuple[int, str, int | None, datetime | None]],
+    version: int,
+) -> None:
+    # запись во временный файл и атомарная подмена, читатели видят либо
+    # старый, либо новый файл целиком
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(build_snapshot(rows, version))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+
+
+class HierarchySnapshot:
+    def __init__(self, path: str):
+        with open(path, "rb") as file:
+            stat = os.fstat(file.fileno())
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.file_id = (stat.st_ino, stat.st_mtime_ns)
+
+        magic, self.version, self.count, _ = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a department hierarchy snapshot")
+
+        self._records_offset = HEADER.size
+        self._index_offset = self._records_offset + self.count * RECORD.size
+        self._names_offset = self._index_offset + self.count * INDEX_ENTRY.size
+
+    def close(self) -> None:
+        self._mmap.close()
+
+    def record(self, pos: int) -> tuple[int, int, int, int, int, int, int]:
+        return RECORD.unpack_from(self._mmap, self._records_offset + pos * RECORD.size)
+
+    def position(self, department_id: int) -> int | None:
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            entry_id, pos = INDEX_ENTRY.unpack_from(
+                self._mmap, self._index_offset + middle * INDEX_ENTRY.size
+            )
+            if entry_id == department_id:
+                return pos
+            if entry_id < department_id:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def entity(self, pos: int) -> Department:
+        department_id, parent_id, _, _, created_at, name_offset, name_length = (
+            self.record(pos)
+        )
+        start = self._names_offset + name_offset
+        return Department(
+            id=department_id,
+            name=self._mmap[start : start + name_length].decode(),
+            parent_id=parent_id if parent_id != NONE else None,
+            created_at=_decode_timestamp(created_at),
+        )
+
+
+# индекс поверх общего для всех воркеров файла-снимка: каждый процесс
+# отображает файл в память только на чтение, перестраивает его в фоне тот,
+# кто первым взял блокировку, остальные до этого ходят в БД. Запрос только
+# сверяет версию и переотображает готовый файл. session_factory — сессии
+# только для чтения из primary; без неё процесс снимок не строит
+class SnapshotHierarchyIndex(HierarchyIndex):
+    def __init__(self, path: str, check_interval: float = 0.0, session_factory=None):
+        self.path = path
+        self.check_interval = check_interval
+        self.session_factory = session_factory
+        self._snapshot: HierarchySnapshot | None = None
+        self._checked_at = 0.0
+        self._rebuilding: asyncio.Task | None = None
+
+    @property
+    def version(self) -> int | None:
+        return self._snapshot.version if self._snapshot is not None else None
+
+    def _remap(self) -> None:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        if (
+            self._snapshot is not None
+            and self._snapshot.file_id == (stat.st_ino, stat.st_mtime_ns)
+        ):
+            return
+
+        snapshot = HierarchySnapshot(self.path)
+        if self._snapshot is not None:
+            self._snapshot.close()
+        self._snapshot = snapshot
+
+    def _outdated(self, version: int) -> bool:
+        # файл новее нашей транзакции тоже годится, перестраивать его назад нельзя
+        return self.version is None or self.version < version
+
+    async def refresh(self, session: AsyncSession) -> bool:
+        if (
+            self._snapshot is not None
+            and time.monotonic() - self._checked_at < self.check_interval
+        ):
+            return True
+
+        version = await fetch_hierarchy_version(session)
+        self._remap()
+        if self._outdated(version):
+            self._start_rebuild()
+            return False
+        self._checked_at = time.monotonic()
+        return True
+
+    def _start_rebuild(self) -> None:
+        if self.session_factory is None:
+            return
+        if self._rebuilding is None or self._rebuilding.done():
+            self._rebuilding = asyncio.get_running_loop().create_task(self._rebuild())
+
+    async def _rebuild(self) -> None:
+        try:
+            with open(f"{self.path}.lock", "a") as lock:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    # снимок перестраивает другой воркер
+                    return
+
+                # своё соединение: версия и строки из одного снимка БД, без
+                # незакоммиченных изменений запроса, который заметил отставание
+                async with self.session_factory() as session:
+                    version = await fetch_hierarchy_version(session)
+                    # пока брали блокировку, файл мог обновить кто-то ещё
+                    self._remap()
+                    if not self._outdated(version):
+                        return
+                    result = await session.execute(
+                        select(
+                            DepartmentORM.id,
+                            DepartmentORM.name,
+                            DepartmentORM.parent_id,
+                            DepartmentORM.created_at,
+                        )
+                    )
+                    rows = [tuple(row) for row in result]
+
+                # сборка и запись с fsync — вне цикла событий
+                await asyncio.to_thread(write_snapshot, self.path, rows, version)
+                self._remap()
+        except Exception as e:
+            logger.warning("Department hierarchy snapshot rebuild failed: {}", e)
+
+    async def wait(self) -> None:
+        if self._rebuilding is not None:
+            await asyncio.gather(self._rebuilding, return_exceptions=True)
+
+    def apply(self, changes: DepartmentChanges) -> None:
+        # снимок только для чтения: после своей записи сразу сверяем версию,
+        # чтобы следующее чтение перестроило снимок, а не ждало check_interval
+        self._checked_at = 0.0
+
+    def get(self, department_id: int) -> Department | None:
+        pos = self._snapshot.position(department_id)
+        return self._snapshot.entity(pos) if pos is not None else None
+
+    def _subtree_positions(self, department_id: int, depth: int | None) -> list[int]:
+        pos = self._snapshot.position(department_id)
+        if pos is None:
+            return []
+
+        if depth is not None and depth < 1:
+            return []
+
+        # узлы последнего нужного уровня берутся без потомков: обход
+        # перескакивает их поддерево по subtree_size, так что depth=1
+        # читает одну запись, а не всё поддерево
+        _, _, root_depth, size, *_ = self._snapshot.record(pos)
+        positions = []
+        child_pos = pos
+        while child_pos < pos + size:
+            child_id, _, child_depth, child_size, *_ = self._snapshot.record(child_pos)
+            positions.append((child_depth, child_id, child_pos))
+            if depth is not None and child_depth - root_depth == depth - 1:
+                child_pos += child_size
+            else:
+                child_pos += 1
+        positions.sort()
+        return [child_pos for _, _, child_pos in positions]
+
+    def subtree(self, department_id: int, depth: int) -> list[Department]:
+        return [
+            self._snapshot.entity(pos)
+            for pos in self._subtree_positions(department_id, depth)
+        ]
+
+    def children(
+        self, department_id: int, after_id: int | None, limit: int | None
+    ) -> list[Department]:
+        pos = self._snapshot.position(department_id)
+        if pos is None:
+            return []
+
+        # дети идут в порядке id, следующий ребёнок — сразу за поддеревом предыдущего
+        _, _, _, size, *_ = self._snapshot.record(pos)
+        children = []
+        child_pos = pos + 1
+        while child_pos < pos + size and (limit is None or len(children) < limit):
+            child_id, _, _, child_size, *_ = self._snapshot.record(child_pos)
+            if after_id is None or child_id > after_id:
+                children.append(self._snapshot.entity(child_pos))
+            child_pos += child_size
+        return children
+
+    def ancestors(self, department_id: int) -> list[Department]:
+        chain = []
+        pos = self._snapshot.position(department_id)
+        while pos is not None:
+            department = self._snapshot.entity(pos)
+            chain.append(department)
+            if department.parent_id is None:
+                break
+            pos = self._snapshot.position(department.parent_id)
+        return chain[::-1]
@@ -0,0 +1,66 @@
+import time
+from contextvars import ContextVar, Token
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+__all__ = [
+    "QueryStats",
+    "current_query_stats",
+    "instrument",
+    "stop_tracking_queries",
+    "track_queries",
+]
+
+
+@dataclass
+class QueryStats:
+    # запросы к БД в рамках одного HTTP-запроса
+    count: int = 0
+    seconds: float = 0.0
+
+
+_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def track_queries() -> tuple[QueryStats, Token]:
+    stats = QueryStats()
+    return stats, _stats.set(stats)
+
+
+def stop_tracking_queries(token: Token) -> None:
+    _stats.reset(token)
+
+
+def current_query_stats() -> QueryStats | None:
+    return _stats.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    stats = _stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += time.perf_counter() - started
+
+
+def _handle_error(exception_context):
+    # упавший запрос тоже считается, его время — до ошибки
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_started"):
+        _after_cursor_execute(connection, None, None, None, None, False)
+
+
+def instrument(engine: AsyncEngine) -> AsyncEngine:
+    # события курсора выполняются в той же задаче asyncio, что и запрос,
+    # поэтому contextvar виден и из greenlet SQLAlchemy
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+    return engine
@@ -0,0 +1,54 @@
+"""department closure
+
+Revision ID: a3c1e8f4b2d9
+Revises: 5b2529d97ac2
+Create Date: 2026-10-18 10:12:41.503117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c1e8f4b2d9'
+down_revision: Union[str, Sequence[str], None] = '5b2529d97ac2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('department_closure',
+    sa.Column('ancestor_id', sa.Integer(), nullable=False),
+    sa.Column('descendant_id', sa.Integer(), nullable=False),
+    sa.Column('depth', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['ancestor_id'], ['departments.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['descendant_id'], ['departments.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('ancestor_id', 'descendant_id')
+    )
+    op.create_index('ix_department_closure_descendant_id_depth', 'department_closure', ['descendant_id', 'depth'], unique=False)
+
+    # заполнение замыкания по уже существующим подразделениям
+    op.execute(
+        """
+        INSERT INTO department_closure (ancestor_id, descendant_id, depth)
+        WITH RECURSIVE closure(ancestor_id, descendant_id, depth) AS (
+            SELECT id, id, 0 FROM departments
+            UNION ALL
+            SELECT c.ancestor_id, d.id, c.depth + 1
+            FROM closure c
+            JOIN departments d ON d.parent_id = c.descendant_id
+        ) CYCLE descendant_id SET is_cycle USING path
+        SELECT ancestor_id, descendant_id, depth FROM closure
+        WHERE NOT is_cycle
+        ON CONFLICT DO NOTHING
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_department_closure_descendant_id_depth', table_name='department_closure')
+    op.drop_table('department_closure')
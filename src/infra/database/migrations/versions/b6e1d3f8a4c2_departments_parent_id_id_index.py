@@ -0,0 +1,28 @@
+"""departments parent_id id index
+
+Revision ID: b6e1d3f8a4c2
+Revises: f2a9c4e7b3d1
+Create Date: 2026-10-18 17:42:05.118364
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6e1d3f8a4c2'
+down_revision: Union[str, Sequence[str], None] = 'f2a9c4e7b3d1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_departments_parent_id_id', 'departments', ['parent_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_departments_parent_id_id', table_name='departments')
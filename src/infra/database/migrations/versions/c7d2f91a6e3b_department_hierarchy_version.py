@@ -0,0 +1,33 @@
+"""department hierarchy version
+
+Revision ID: c7d2f91a6e3b
+Revises: a3c1e8f4b2d9
+Create Date: 2026-10-18 12:40:07.118342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d2f91a6e3b'
+down_revision: Union[str, Sequence[str], None] = 'a3c1e8f4b2d9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('department_hierarchy_version',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute("INSERT INTO department_hierarchy_version (id, version) VALUES (1, 0)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('department_hierarchy_version')
@@ -0,0 +1,28 @@
+"""departments unique name per parent
+
+Revision ID: d5f0a7b2c9e4
+Revises: b6e1d3f8a4c2
+Create Date: 2026-10-18 19:03:47.551270
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5f0a7b2c9e4'
+down_revision: Union[str, Sequence[str], None] = 'b6e1d3f8a4c2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ux_departments_parent_id_name', 'departments', ['parent_id', 'name'], unique=True, postgresql_nulls_not_distinct=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ux_departments_parent_id_name', table_name='departments')
@@ -0,0 +1,56 @@
+"""department headcounts
+
+Revision ID: e4b8a2c5d1f7
+Revises: c7d2f91a6e3b
+Create Date: 2026-10-18 14:55:32.664019
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b8a2c5d1f7'
+down_revision: Union[str, Sequence[str], None] = 'c7d2f91a6e3b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('departments', sa.Column('direct_headcount', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('departments', sa.Column('subtree_headcount', sa.Integer(), server_default='0', nullable=False))
+
+    op.execute(
+        """
+        UPDATE departments d
+        SET direct_headcount = c.headcount
+        FROM (
+            SELECT department_id, count(*) AS headcount
+            FROM employees
+            GROUP BY department_id
+        ) c
+        WHERE c.department_id = d.id
+        """
+    )
+    op.execute(
+        """
+        UPDATE departments d
+        SET subtree_headcount = c.headcount
+        FROM (
+            SELECT cl.ancestor_id, count(*) AS headcount
+            FROM department_closure cl
+            JOIN employees e ON e.department_id = cl.descendant_id
+            GROUP BY cl.ancestor_id
+        ) c
+        WHERE c.ancestor_id = d.id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('departments', 'subtree_headcount')
+    op.drop_column('departments', 'direct_headcount')
@@ -0,0 +1,28 @@
+"""employees department_id id index
+
+Revision ID: f2a9c4e7b3d1
+Revises: e4b8a2c5d1f7
+Create Date: 2026-10-18 16:20:11.402937
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a9c4e7b3d1'
+down_revision: Union[str, Sequence[str], None] = 'e4b8a2c5d1f7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_employees_department_id_id', 'employees', ['department_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_employees_department_id_id', table_name='employees')
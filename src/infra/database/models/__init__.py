@@ -1,3 +1,5 @@
 from .base import Base
 from .department_orm import DepartmentORM
 from .employee_orm import EmployeeORM
+from .department_closure_orm import DepartmentClosureORM
+from .department_hierarchy_version_orm import DepartmentHierarchyVersionORM
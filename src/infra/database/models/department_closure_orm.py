@@ -0,0 +1,28 @@
+from sqlalchemy import ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+# транзитивное замыкание иерархии: строка на каждую пару предок-потомок,
+# включая саму вершину с depth=0
+class DepartmentClosureORM(Base):
+    __tablename__ = "department_closure"
+
+    ancestor_id: Mapped[int] = mapped_column(
+        ForeignKey("departments.id", ondelete="CASCADE"), primary_key=True
+    )
+    descendant_id: Mapped[int] = mapped_column(
+        ForeignKey("departments.id", ondelete="CASCADE"), primary_key=True
+    )
+    depth: Mapped[int] = mapped_column(nullable=False)
+
+    __table_args__ = (
+        Index("ix_department_closure_descendant_id_depth", "descendant_id", "depth"),
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<DepartmentClosureORM ancestor_id={self.ancestor_id} "
+            f"descendant_id={self.descendant_id} depth={self.depth}>"
+        )
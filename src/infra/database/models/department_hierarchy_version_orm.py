@@ -0,0 +1,15 @@
+from sqlalchemy import BigInteger
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+# номер версии структуры подразделений, увеличивается при каждой записи в departments
+class DepartmentHierarchyVersionORM(Base):
+    __tablename__ = "department_hierarchy_version"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return f"<DepartmentHierarchyVersionORM version={self.version}>"
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional, List
 
-from sqlalchemy import String, ForeignKey, DateTime
+from sqlalchemy import String, ForeignKey, DateTime, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
 
@@ -31,6 +31,14 @@ class DepartmentORM(Base):
         nullable=False,
     )
 
+    # сотрудники самого подразделения и всего поддерева, поддерживаются при записи
+    direct_headcount: Mapped[int] = mapped_column(
+        nullable=False, default=0, server_default="0"
+    )
+    subtree_headcount: Mapped[int] = mapped_column(
+        nullable=False, default=0, server_default="0"
+    )
+
     # родитель
     parent: Mapped[Optional["DepartmentORM"]] = relationship(
         "DepartmentORM",
@@ -50,6 +58,19 @@ class DepartmentORM(Base):
         back_populates="department",
     )
 
+    __table_args__ = (
+        Index("ix_departments_parent_id_id", "parent_id", "id"),
+        # имя уникально среди детей одного родителя; NULLS NOT DISTINCT
+        # распространяет это и на корневые подразделения (parent_id IS NULL)
+        Index(
+            "ux_departments_parent_id_name",
+            "parent_id",
+            "name",
+            unique=True,
+            postgresql_nulls_not_distinct=True,
+        ),
+    )
+
     def __repr__(self) -> str:
         return f"<DepartmentORM id={self.id} name={self.name}>"
 
@@ -67,4 +88,6 @@ class DepartmentORM(Base):
             name=self.name,
             parent_id=self.parent_id,
             created_at=self.created_at,
+            direct_headcount=self.direct_headcount,
+            subtree_headcount=self.subtree_headcount,
         )
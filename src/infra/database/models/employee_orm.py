@@ -1,7 +1,7 @@
 from datetime import datetime, date
 from typing import Optional
 
-from sqlalchemy import String, ForeignKey, Date, DateTime
+from sqlalchemy import String, ForeignKey, Date, DateTime, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
 
@@ -30,6 +30,10 @@ class EmployeeORM(Base):
         "DepartmentORM", back_populates="employees"
     )
 
+    __table_args__ = (
+        Index("ix_employees_department_id_id", "department_id", "id"),
+    )
+
     def __repr__(self) -> str:
         return f"<Employee id={self.id} full_name={self.full_name}>"
 
@@ -0,0 +1,80 @@
+import time
+from bisect import bisect_left
+from dataclasses import dataclass, field
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+__all__ = ["InstrumentedPool", "PoolStats", "WAIT_BUCKETS", "pool_metrics"]
+
+# верхние границы корзин гистограммы ожидания соединения, секунды
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+@dataclass
+class PoolStats:
+    # ожидание соединения при checkout: сколько раз, сколько всего, максимум,
+    # гистограмма по WAIT_BUCKETS (последняя корзина — больше всех границ)
+    checkouts: int = 0
+    timeouts: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+    wait_buckets: list[int] = field(
+        default_factory=lambda: [0] * (len(WAIT_BUCKETS) + 1)
+    )
+
+    def record_wait(self, seconds: float) -> None:
+        self.checkouts += 1
+        self.wait_seconds_total += seconds
+        self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+        self.wait_buckets[bisect_left(WAIT_BUCKETS, seconds)] += 1
+
+
+# очередь соединений как у AsyncAdaptedQueuePool, плюс замер времени выдачи
+# соединения: ожидание свободного места в пуле и открытие нового соединения
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def recreate(self) -> "InstrumentedPool":
+        # при dispose() пул пересоздаётся, накопленные счётчики сохраняем
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.timeouts += 1
+            raise
+        self.stats.record_wait(time.perf_counter() - started)
+        return connection
+
+
+def pool_metrics(engine: AsyncEngine) -> dict:
+    pool = engine.pool
+    # overflow у QueuePool отсчитывается от -size: отрицательный, пока
+    # открыто меньше size соединений
+    metrics = {
+        "size": pool.size(),
+        "opened": pool.size() + pool.overflow(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+    }
+    stats = getattr(pool, "stats", None)
+    if stats is not None:
+        metrics.update(
+            checkouts=stats.checkouts,
+            timeouts=stats.timeouts,
+            wait_seconds_total=stats.wait_seconds_total,
+            wait_seconds_max=stats.wait_seconds_max,
+            wait_buckets=dict(
+                zip([*map(str, WAIT_BUCKETS), "+Inf"], stats.wait_buckets)
+            ),
+        )
+    return metrics
@@ -1,32 +1,168 @@
-from sqlalchemy import select, update, delete
+from typing import AsyncIterator
+
+from sqlalchemy import (
+    Date,
+    Integer,
+    String,
+    any_,
+    bindparam,
+    cast,
+    column,
+    delete,
+    func,
+    insert,
+    literal,
+    null,
+    select,
+    true,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, array, insert as pg_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
-from domain.entities import Department
+from domain.entities import Department, Employee
+from domain.exceptions import DepartmentAlreadyExistsError, DepartmentNotFoundError
+from infra.database.errors import FOREIGN_KEY_VIOLATION, UNIQUE_VIOLATION, sqlstate
 from domain.repositories import AbstractDepartmentRepository
-from infra.database.models import DepartmentORM, EmployeeORM
+from infra.database.hierarchy import (
+    HIERARCHY_VERSION_ID,
+    HierarchyIndex,
+    department_changes,
+)
+from infra.database.models import (
+    DepartmentORM,
+    DepartmentClosureORM,
+    DepartmentHierarchyVersionORM,
+    EmployeeORM,
+)
+from .headcounts import ancestor_ids, shift_headcounts
+from .rows import (
+    DEPARTMENT_COLUMNS,
+    EMPLOYEE_COLUMNS,
+    columns_of,
+    to_department,
+    to_employee,
+)
 
 
 class DepartmentRepository(AbstractDepartmentRepository):
-    def __init__(self, session: AsyncSession):
+    def __init__(
+        self,
+        session: AsyncSession,
+        hierarchy: HierarchyIndex | None = None,
+    ):
         self.session = session
+        self.hierarchy = hierarchy
+
+    async def _hierarchy_ready(self) -> bool:
+        return self.hierarchy is not None and await self.hierarchy.refresh(
+            self.session
+        )
+
+    @staticmethod
+    def _version_bump(stmt):
+        return stmt.on_conflict_do_update(
+            index_elements=[DepartmentHierarchyVersionORM.id],
+            set_={"version": DepartmentHierarchyVersionORM.version + 1},
+        ).returning(DepartmentHierarchyVersionORM.version)
+
+    async def _bump_hierarchy_version(self) -> None:
+        version = await self.session.scalar(
+            self._version_bump(
+                pg_insert(DepartmentHierarchyVersionORM).values(
+                    id=HIERARCHY_VERSION_ID, version=1
+                )
+            )
+        )
+        department_changes(self.session).record_version(version)
+
+    async def _rename(self, stmt):
+        # переименование в уже занятое у этого родителя имя ловит уникальный индекс
+        try:
+            return await self.session.execute(stmt)
+        except IntegrityError as e:
+            if sqlstate(e) == UNIQUE_VIOLATION:
+                raise DepartmentAlreadyExistsError from e
+            raise
 
     async def exists(self, name: str) -> bool:
         result = await self.session.execute(select(1).where(DepartmentORM.name == name))
         return result.scalar_one_or_none() is not None
 
-    async def create(self, entity: Department) -> Department:
-        department_orm = DepartmentORM.from_entity(entity)
-        self.session.add(department_orm)
-        await self.session.flush()
-        await self.session.refresh(department_orm)
-        return department_orm.to_entity()
+    async def create(self, entity: Department) -> Department | None:
+        # один запрос: вставка, которая при совпадении имени у того же родителя
+        # ничего не делает (ux_departments_parent_id_name), строки замыкания
+        # и увеличение версии структуры. Если вставки не было, CTE ниже по
+        # цепочке тоже пусты и запрос не возвращает строк
+        created = (
+            pg_insert(DepartmentORM)
+            .values(
+                name=entity.name.strip(),
+                parent_id=entity.parent_id,
+                # Python-умолчания колонок внутри CTE не подставляются
+                direct_headcount=0,
+                subtree_headcount=0,
+            )
+            .on_conflict_do_nothing()
+            .returning(
+                DepartmentORM.id,
+                DepartmentORM.name,
+                DepartmentORM.parent_id,
+                DepartmentORM.created_at,
+            )
+            .cte("created")
+        )
+        links = select(created.c.id, created.c.id, literal(0)).union_all(
+            select(
+                DepartmentClosureORM.ancestor_id,
+                created.c.id,
+                DepartmentClosureORM.depth + 1,
+            ).join(created, DepartmentClosureORM.descendant_id == created.c.parent_id)
+        )
+        closure = (
+            insert(DepartmentClosureORM)
+            .from_select(["ancestor_id", "descendant_id", "depth"], links)
+            .cte("closure")
+        )
+        version = self._version_bump(
+            pg_insert(DepartmentHierarchyVersionORM).from_select(
+                ["id", "version"],
+                select(literal(HIERARCHY_VERSION_ID), literal(1)).select_from(created),
+            )
+        ).cte("version")
+
+        result = await self.session.execute(
+            select(created, version.c.version)
+            .join(version, true())
+            .add_cte(closure)
+        )
+        row = result.one_or_none()
+        if row is None:
+            return None
+
+        department = Department(
+            id=row.id,
+            name=row.name,
+            parent_id=row.parent_id,
+            created_at=row.created_at,
+        )
+        department_changes(self.session).record_version(row.version)
+        department_changes(self.session).upsert(department)
+        department_changes(self.session).touch(department.id, department.parent_id)
+        return department
 
     async def get_by_id(self, department_id: int) -> Department | None:
+        if await self._hierarchy_ready():
+            return self.hierarchy.get(department_id)
+
         result = await self.session.execute(
-            select(DepartmentORM).where(DepartmentORM.id == department_id)
+            select(*DEPARTMENT_COLUMNS).where(DepartmentORM.id == department_id)
         )
-        model = result.scalar_one_or_none()
-        return model.to_entity() if model else None
+        row = result.one_or_none()
+        return to_department(row) if row else None
 
     async def change_department(
         self,
@@ -46,97 +182,513 @@ class DepartmentRepository(AbstractDepartmentRepository):
         if not values:
             return None
 
-        result = await self.session.execute(
+        result = await self._rename(
             update(DepartmentORM)
             .where(DepartmentORM.id == department_id)
             .values(**values)
-            .returning(DepartmentORM)
+            .returning(*DEPARTMENT_COLUMNS)
         )
-        department_orm = result.scalar_one_or_none()
+        row = result.one_or_none()
 
-        if department_orm is None:
+        if row is None:
             return None
-        await self.session.flush()
-        return department_orm.to_entity()
+        previous_parent_id = None
+        if parent_id is not None:
+            previous_parent_id = await self._move_in_closure(department_id, parent_id)
+        department = to_department(row)
+        await self._bump_hierarchy_version()
+        department_changes(self.session).upsert(department)
+        department_changes(self.session).touch(
+            department_id, previous_parent_id, parent_id
+        )
+        return department
 
     async def update(self, entity: Department) -> Department | None:
-        result = await self.session.execute(
+        result = await self._rename(
             update(DepartmentORM)
             .where(DepartmentORM.id == entity.id)
             .values(
                 name=entity.name,
                 parent_id=entity.parent_id,
             )
-            .returning(DepartmentORM)
+            .returning(*DEPARTMENT_COLUMNS)
         )
-        department_orm = result.scalar_one_or_none()
+        row = result.one_or_none()
 
-        if department_orm is None:
+        if row is None:
             return None
-        return department_orm.to_entity()
+        previous_parent_id = await self._move_in_closure(entity.id, entity.parent_id)
+        department = to_department(row)
+        await self._bump_hierarchy_version()
+        department_changes(self.session).upsert(department)
+        department_changes(self.session).touch(
+            entity.id, previous_parent_id, entity.parent_id
+        )
+        return department
+
+    async def get_ancestors(self, department_id: int) -> list[Department]:
+        if await self._hierarchy_ready():
+            return self.hierarchy.ancestors(department_id)
 
-    async def _collect_children_ids(self, department_id: int) -> list[int]:
+        # цепочка от корня до самого подразделения включительно
         result = await self.session.execute(
-            select(DepartmentORM.id).where(DepartmentORM.parent_id == department_id)
+            select(*DEPARTMENT_COLUMNS)
+            .join(
+                DepartmentClosureORM,
+                DepartmentClosureORM.ancestor_id == DepartmentORM.id,
+            )
+            .where(DepartmentClosureORM.descendant_id == department_id)
+            .order_by(DepartmentClosureORM.depth.desc())
+        )
+        return [to_department(row) for row in result]
+
+    async def is_descendant(self, department_id: int, ancestor_id: int) -> bool:
+        # проверка для записи, поэтому всегда по БД, а не по индексу,
+        # который может отставать на check_interval
+        result = await self.session.execute(
+            select(1).where(
+                DepartmentClosureORM.ancestor_id == ancestor_id,
+                DepartmentClosureORM.descendant_id == department_id,
+            )
+        )
+        return result.scalar_one_or_none() is not None
+
+    async def get_ancestor_ids(self, department_ids: list[int]) -> set[int]:
+        # сами подразделения и все их предки; по БД, чтобы видеть свои записи
+        if not department_ids:
+            return set()
+        result = await self.session.execute(
+            select(DepartmentClosureORM.ancestor_id)
+            .where(
+                DepartmentClosureORM.descendant_id
+                == any_(bindparam("ids", department_ids, ARRAY(Integer)))
+            )
+            .distinct()
+        )
+        return set(result.scalars())
+
+    async def _move_in_closure(
+        self, department_id: int, parent_id: int | None
+    ) -> int | None:
+        # возвращает прежнего родителя
+        current_parent_id = await self.session.scalar(
+            select(DepartmentClosureORM.ancestor_id).where(
+                DepartmentClosureORM.descendant_id == department_id,
+                DepartmentClosureORM.depth == 1,
+            )
+        )
+        if current_parent_id == parent_id:
+            return current_parent_id
+
+        subtree_ids = self._subtree_ids(department_id)
+        old_ancestor_ids = ancestor_ids(department_id, include_self=False)
+
+        # сотрудники поддерева переезжают вместе с ним: снять их со старых
+        # предков и добавить новому родителю и его предкам
+        await self.session.execute(
+            shift_headcounts(
+                self._subtree_headcount(department_id),
+                removed_from=old_ancestor_ids,
+                added_to=ancestor_ids(parent_id) if parent_id is not None else None,
+            )
+        )
+
+        # отвязать поддерево от старых предков
+        await self.session.execute(
+            delete(DepartmentClosureORM).where(
+                DepartmentClosureORM.descendant_id.in_(subtree_ids),
+                DepartmentClosureORM.ancestor_id.in_(old_ancestor_ids),
+            )
         )
-        children_ids = [row[0] for row in result.all()]
-        all_ids = []
 
-        for child_id in children_ids:
-            all_ids.append(child_id)
-            nested = await self._collect_children_ids(child_id)
-            all_ids.extend(nested)
+        if parent_id is None:
+            return current_parent_id
 
-        return all_ids
+        # привязать поддерево к новому родителю и всем его предкам
+        parent_link = aliased(DepartmentClosureORM)
+        subtree_link = aliased(DepartmentClosureORM)
+        await self.session.execute(
+            insert(DepartmentClosureORM).from_select(
+                ["ancestor_id", "descendant_id", "depth"],
+                select(
+                    parent_link.ancestor_id,
+                    subtree_link.descendant_id,
+                    parent_link.depth + subtree_link.depth + 1,
+                )
+                .select_from(parent_link)
+                .join(subtree_link, true())
+                .where(
+                    parent_link.descendant_id == parent_id,
+                    subtree_link.ancestor_id == department_id,
+                ),
+            )
+        )
+        return current_parent_id
+
+    def _subtree_ids(self, department_id: int):
+        # id подразделения и всех его потомков по таблице замыкания
+        return select(DepartmentClosureORM.descendant_id).where(
+            DepartmentClosureORM.ancestor_id == department_id
+        )
+
+    def _subtree_headcount(self, department_id: int):
+        return (
+            select(DepartmentORM.subtree_headcount)
+            .where(DepartmentORM.id == department_id)
+            .scalar_subquery()
+        )
 
     async def delete(
         self,
         department_id: int,
         mode: str,
         reassign_to_department_id: int | None,
-    ) -> None:
+    ) -> bool:
 
-        children_ids = await self._collect_children_ids(
-            department_id,
-        )
-
-        all_ids = [department_id] + children_ids
+        subtree_ids = self._subtree_ids(department_id)
 
         if mode == "cascade":
 
             # удалить сотрудников
-            await self.session.execute(
-                delete(EmployeeORM).where(EmployeeORM.department_id.in_(all_ids))
+            employees_stmt = delete(EmployeeORM).where(
+                EmployeeORM.department_id.in_(subtree_ids)
             )
-
-            # удалить подразделения
-            await self.session.execute(
-                delete(DepartmentORM).where(DepartmentORM.id.in_(all_ids))
+            headcounts_stmt = shift_headcounts(
+                self._subtree_headcount(department_id),
+                removed_from=ancestor_ids(department_id, include_self=False),
             )
 
         elif mode == "reassign":
 
-            await self.session.execute(
+            employees_stmt = (
                 update(EmployeeORM)
-                .where(EmployeeORM.department_id.in_(all_ids))
+                .where(EmployeeORM.department_id.in_(subtree_ids))
                 .values(department_id=reassign_to_department_id)
             )
-
-            # удалить подразделения
-            await self.session.execute(
-                delete(DepartmentORM).where(DepartmentORM.id.in_(all_ids))
+            headcounts_stmt = shift_headcounts(
+                self._subtree_headcount(department_id),
+                removed_from=ancestor_ids(department_id, include_self=False),
+                added_to=ancestor_ids(reassign_to_department_id),
+                direct_department_id=reassign_to_department_id,
             )
         else:
             raise ValueError("Invalid delete mode")
 
+        # удалить подразделения; сотрудники, счётчики предков и версия
+        # структуры обрабатываются в том же запросе. Версия растёт, только
+        # если что-то удалено, иначе запрос не возвращает строк
+        deleted = (
+            delete(DepartmentORM)
+            .where(DepartmentORM.id.in_(subtree_ids))
+            .returning(DepartmentORM.id, DepartmentORM.parent_id)
+            .cte("deleted")
+        )
+        version = self._version_bump(
+            pg_insert(DepartmentHierarchyVersionORM).from_select(
+                ["id", "version"],
+                select(literal(HIERARCHY_VERSION_ID), literal(1)).where(
+                    select(deleted.c.id).exists()
+                ),
+            )
+        ).cte("version")
+
+        # удалённые id и родитель корня поддерева — для инвалидации кеша деревьев
+        deleted_ids = select(func.array_agg(deleted.c.id)).scalar_subquery()
+        parent_id = (
+            select(deleted.c.parent_id)
+            .where(deleted.c.id == department_id)
+            .scalar_subquery()
+        )
+        try:
+            result = await self.session.execute(
+                select(version.c.version, deleted_ids, parent_id)
+                .add_cte(employees_stmt.cte("employees_stmt"))
+                .add_cte(headcounts_stmt.cte("headcounts_stmt"))
+            )
+        except IntegrityError as e:
+            # подразделения для переназначения сотрудников нет
+            if sqlstate(e) == FOREIGN_KEY_VIOLATION:
+                raise DepartmentNotFoundError from e
+            raise
+        row = result.one_or_none()
+        if row is None:
+            return False
+
+        version_after, deleted_ids, parent_id = row
+        department_changes(self.session).record_version(version_after)
+        department_changes(self.session).delete(department_id)
+        department_changes(self.session).touch(
+            *deleted_ids, parent_id, reassign_to_department_id
+        )
+        return True
+
     async def get_children(self, parent_id: int):
         result = await self.session.execute(
-            select(DepartmentORM).where(DepartmentORM.parent_id == parent_id)
+            select(*DEPARTMENT_COLUMNS)
+            .where(DepartmentORM.parent_id == parent_id)
+            .order_by(DepartmentORM.id)
         )
-        return result.scalars().all()
+        return [to_department(row) for row in result]
 
     async def get_employees(self, department_id: int):
         result = await self.session.execute(
-            select(EmployeeORM).where(EmployeeORM.department_id == department_id)
+            select(*EMPLOYEE_COLUMNS)
+            .where(EmployeeORM.department_id == department_id)
+            .order_by(EmployeeORM.id)
+        )
+        return [to_employee(row) for row in result]
+
+    async def get_subtree(
+        self, department_id: int, depth: int, children_limit: int | None = None
+    ) -> list[Department]:
+        # children_limit — не больше стольких детей у каждого узла (первые по
+        # id); корень идёт первым, дальше уровни по порядку
+        if await self._hierarchy_ready():
+            if children_limit is None:
+                departments = self.hierarchy.subtree(department_id, depth)
+            else:
+                departments = self._limited_subtree(
+                    department_id, depth, children_limit
+                )
+            await self._fill_headcounts(departments)
+            return departments
+
+        if children_limit is not None:
+            return await self._get_limited_subtree(department_id, depth, children_limit)
+
+        # все подразделения поддерева до глубины depth одним запросом по замыканию
+        result = await self.session.execute(
+            select(*DEPARTMENT_COLUMNS)
+            .join(
+                DepartmentClosureORM,
+                DepartmentClosureORM.descendant_id == DepartmentORM.id,
+            )
+            .where(
+                DepartmentClosureORM.ancestor_id == department_id,
+                DepartmentClosureORM.depth < depth,
+            )
+            .order_by(DepartmentClosureORM.depth, DepartmentORM.id)
+        )
+        return [to_department(row) for row in result]
+
+    def _limited_subtree(
+        self, department_id: int, depth: int, children_limit: int
+    ) -> list[Department]:
+        root = self.hierarchy.get(department_id)
+        if root is None:
+            return []
+        departments = level = [root]
+        for _ in range(depth - 1):
+            level = [
+                child
+                for parent in level
+                for child in self.hierarchy.children(parent.id, None, children_limit)
+            ]
+            departments = departments + level
+        return departments
+
+    async def _get_limited_subtree(
+        self, department_id: int, depth: int, children_limit: int
+    ) -> list[Department]:
+        # рекурсивный CTE, где каждый узел берёт детей через LATERAL с LIMIT:
+        # индекс (parent_id, id) читается не дальше children_limit строк на
+        # узел, и всё дерево приходит одним запросом
+        child = DepartmentORM.__table__.alias("child")
+        tree = (
+            select(*DEPARTMENT_COLUMNS, literal(1).label("level"))
+            .where(DepartmentORM.id == department_id)
+            .cte("tree", recursive=True)
+        )
+        children = (
+            select(*columns_of(child, DEPARTMENT_COLUMNS))
+            .where(child.c.parent_id == tree.c.id)
+            .order_by(child.c.id)
+            .limit(children_limit)
+            .lateral("children")
+        )
+        tree = tree.union_all(
+            select(*columns_of(children, DEPARTMENT_COLUMNS), tree.c.level + 1)
+            .select_from(tree)
+            .join(children, true())
+            .where(tree.c.level < depth)
+        )
+
+        result = await self.session.execute(
+            select(*columns_of(tree, DEPARTMENT_COLUMNS)).order_by(
+                tree.c.level, tree.c.parent_id, tree.c.id
+            )
+        )
+        return [to_department(row) for row in result]
+
+    async def stream_tree(
+        self, department_id: int, depth: int, include_employees: bool
+    ) -> AsyncIterator[Department | Employee]:
+        # поддерево в прямом порядке обхода: подразделение, его сотрудники,
+        # затем дочерние поддеревья. Порядок задаёт путь от корня (массив id):
+        # префикс меньше любого своего продолжения, а kind ставит сотрудников
+        # раньше детей. Строки читаются серверным курсором порциями
+        child = aliased(DepartmentORM)
+        tree = (
+            select(DepartmentORM.id, array([DepartmentORM.id]).label("path"))
+            .where(DepartmentORM.id == department_id)
+            .cte("tree", recursive=True)
+        )
+        tree = tree.union_all(
+            select(child.id, tree.c.path.op("||")(child.id)).where(
+                child.parent_id == tree.c.id,
+                func.cardinality(tree.c.path) < depth,
+            )
+        )
+
+        rows = select(
+            literal(0).label("kind"),
+            tree.c.path,
+            DepartmentORM.id,
+            DepartmentORM.parent_id,
+            DepartmentORM.name,
+            cast(null(), String).label("position"),
+            cast(null(), Date).label("hired_at"),
+            DepartmentORM.created_at,
+            DepartmentORM.direct_headcount,
+            DepartmentORM.subtree_headcount,
+        ).join(tree, tree.c.id == DepartmentORM.id)
+        if include_employees:
+            rows = rows.union_all(
+                select(
+                    literal(1),
+                    tree.c.path,
+                    EmployeeORM.id,
+                    EmployeeORM.department_id,
+                    EmployeeORM.full_name,
+                    EmployeeORM.position,
+                    EmployeeORM.hired_at,
+                    EmployeeORM.created_at,
+                    cast(null(), Integer),
+                    cast(null(), Integer),
+                ).join(tree, tree.c.id == EmployeeORM.department_id)
+            )
+        rows = rows.subquery("rows")
+
+        result = await self.session.stream(
+            select(rows)
+            .order_by(rows.c.path, rows.c.kind, rows.c.id)
+            .execution_options(yield_per=500)
+        )
+        async for row in result:
+            if row.kind == 0:
+                yield Department(
+                    id=row.id,
+                    name=row.name,
+                    parent_id=row.parent_id,
+                    created_at=row.created_at,
+                    direct_headcount=row.direct_headcount,
+                    subtree_headcount=row.subtree_headcount,
+                )
+            else:
+                yield Employee(
+                    id=row.id,
+                    department_id=row.parent_id,
+                    full_name=row.name,
+                    position=row.position,
+                    hired_at=row.hired_at,
+                    created_at=row.created_at,
+                )
+
+    async def stream_departments(
+        self, department_id: int | None
+    ) -> AsyncIterator[Department]:
+        stmt = (
+            select(*DEPARTMENT_COLUMNS)
+            .order_by(DepartmentORM.id)
+            .execution_options(yield_per=1000)
+        )
+        if department_id is not None:
+            stmt = stmt.where(DepartmentORM.id.in_(self._subtree_ids(department_id)))
+
+        result = await self.session.stream(stmt)
+        async for row in result:
+            yield to_department(row)
+
+    async def _fill_headcounts(self, departments: list[Department]) -> None:
+        # индекс хранит только структуру, счётчики меняются с каждым
+        # сотрудником, поэтому берутся из БД одним запросом
+        if not departments:
+            return
+
+        result = await self.session.execute(
+            select(
+                DepartmentORM.id,
+                DepartmentORM.direct_headcount,
+                DepartmentORM.subtree_headcount,
+            ).where(DepartmentORM.id.in_([d.id for d in departments]))
+        )
+        counts = {row.id: row for row in result}
+        for department in departments:
+            row = counts.get(department.id)
+            if row is not None:
+                department.direct_headcount = row.direct_headcount
+                department.subtree_headcount = row.subtree_headcount
+
+    async def get_children_pages(
+        self,
+        parent_ids: list[int],
+        limit: int | None,
+        after_id: int | None = None,
+    ) -> list[Department]:
+        # не больше limit детей у каждого из parent_ids, по возрастанию id
+        if not parent_ids:
+            return []
+
+        if await self._hierarchy_ready():
+            departments = [
+                child
+                for parent_id in parent_ids
+                for child in self.hierarchy.children(parent_id, after_id, limit)
+            ]
+            await self._fill_headcounts(departments)
+            return departments
+
+        ids = self._ids_table(parent_ids)
+        children = select(*DEPARTMENT_COLUMNS).where(
+            DepartmentORM.parent_id == ids.c.id
+        )
+        if after_id is not None:
+            children = children.where(DepartmentORM.id > after_id)
+        children = self._per_parent(children.order_by(DepartmentORM.id), ids, limit)
+
+        result = await self.session.execute(
+            select(*columns_of(children, DEPARTMENT_COLUMNS)).order_by(
+                children.c.parent_id, children.c.id
+            )
         )
-        return result.scalars().all()
+        return [to_department(row) for row in result]
+
+    async def get_employees_by_department_ids(
+        self, department_ids: list[int], limit: int | None = None
+    ) -> list[Employee]:
+        if not department_ids:
+            return []
+
+        ids = self._ids_table(department_ids)
+        employees = select(*EMPLOYEE_COLUMNS).where(
+            EmployeeORM.department_id == ids.c.id
+        )
+        employees = self._per_parent(employees.order_by(EmployeeORM.id), ids, limit)
+
+        result = await self.session.execute(
+            select(*columns_of(employees, EMPLOYEE_COLUMNS)).order_by(
+                employees.c.department_id, employees.c.id
+            )
+        )
+        return [to_employee(row) for row in result]
+
+    @staticmethod
+    def _ids_table(ids: list[int]):
+        return values(column("id", Integer), name="ids").data([(i,) for i in ids])
+
+    @staticmethod
+    def _per_parent(rows, ids, limit: int | None):
+        # rows коррелирован с ids: LATERAL берёт первые limit строк для
+        # каждого id отдельно, читая индекс с начала диапазона этого id
+        rows = rows.limit(limit).lateral("rows")
+        return select(rows).select_from(ids).join(rows, true()).subquery("per_parent")
@@ -1,9 +1,53 @@
-from sqlalchemy import select, update, delete
+from typing import AsyncIterator
+
+from sqlalchemy import (
+    Column,
+    Date,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    any_,
+    bindparam,
+    column,
+    delete,
+    exists,
+    func,
+    insert,
+    literal,
+    select,
+    tuple_,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.schema import CreateTable
 
 from domain.entities import Employee
+from domain.exceptions import DepartmentNotFoundError
 from domain.repositories import AbstractEmployeeRepository
-from infra.database.models import EmployeeORM
+from infra.database.errors import FOREIGN_KEY_VIOLATION, sqlstate
+from infra.database.hierarchy import department_changes
+from infra.database.models import DepartmentORM, DepartmentClosureORM, EmployeeORM
+from .headcounts import ancestor_ids, apply_employee_moves, shift_headcounts
+from .rows import EMPLOYEE_COLUMNS, columns_of, to_employee
+
+# временная таблица для импорта, живёт до конца транзакции
+employee_import = Table(
+    "employee_import",
+    MetaData(),
+    Column("line", Integer, nullable=False),
+    Column("department_id", Integer, nullable=False),
+    Column("full_name", String(200), nullable=False),
+    Column("position", String(200), nullable=False),
+    Column("hired_at", Date),
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DROP",
+)
+# строк на один COPY: клиент не собирает весь импорт в один пакет записей
+COPY_BATCH_SIZE = 5000
 
 
 class EmployeeRepository(AbstractEmployeeRepository):
@@ -17,35 +61,307 @@ class EmployeeRepository(AbstractEmployeeRepository):
         return result.scalar_one_or_none() is not None
 
     async def create(self, entity: Employee) -> Employee:
-        employee_orm = EmployeeORM.from_entity(entity)  # создаём ORM объект
-        self.session.add(employee_orm)
-        await self.session.flush()
-        await self.session.refresh(employee_orm)
-        return employee_orm.to_entity()
+        # один запрос: INSERT ... RETURNING и счётчики подразделения в CTE
+        created = (
+            insert(EmployeeORM)
+            .values(
+                department_id=entity.department_id,
+                full_name=entity.full_name.strip(),
+                position=entity.position.strip(),
+                hired_at=entity.hired_at,
+            )
+            .returning(*EMPLOYEE_COLUMNS)
+            .cte("created")
+        )
+        headcounts = shift_headcounts(
+            1,
+            added_to=ancestor_ids(entity.department_id),
+            direct_department_id=entity.department_id,
+        ).cte("headcounts")
+
+        result = await self._write(select(created).add_cte(headcounts))
+        department_changes(self.session).touch(entity.department_id)
+        return to_employee(result.one())
+
+    async def bulk_create(self, entities: list[Employee]) -> list[int]:
+        if not entities:
+            return []
+
+        # COPY в промежуточную таблицу, затем один INSERT ... SELECT, который
+        # отбрасывает строки с несуществующими подразделениями и тем же запросом
+        # прибавляет вставленных к счётчикам подразделений и их предков
+        await self.session.execute(CreateTable(employee_import, if_not_exists=True))
+        await self.session.execute(delete(employee_import))
+        connection = await self.session.connection()
+        raw_connection = await connection.get_raw_connection()
+        for start in range(0, len(entities), COPY_BATCH_SIZE):
+            await raw_connection.driver_connection.copy_records_to_table(
+                employee_import.name,
+                records=[
+                    (line, e.department_id, e.full_name, e.position, e.hired_at)
+                    for line, e in enumerate(
+                        entities[start : start + COPY_BATCH_SIZE], start
+                    )
+                ],
+                columns=[c.name for c in employee_import.columns],
+            )
+
+        staged = employee_import.c
+        # FOR KEY SHARE: подразделение, удалённое параллельно, ждёт нашего
+        # commit или уже отсутствует здесь, и строка уходит в ошибки, а не
+        # в нарушение внешнего ключа
+        departments = (
+            select(DepartmentORM.id)
+            .where(DepartmentORM.id.in_(select(staged.department_id)))
+            .with_for_update(key_share=True)
+            .cte("departments")
+        )
+        department_exists = exists().where(departments.c.id == staged.department_id)
+        inserted = (
+            insert(EmployeeORM)
+            .from_select(
+                ["department_id", "full_name", "position", "hired_at"],
+                select(
+                    staged.department_id,
+                    staged.full_name,
+                    staged.position,
+                    staged.hired_at,
+                )
+                .where(department_exists)
+                .order_by(staged.line),
+            )
+            .returning(EmployeeORM.department_id)
+            .cte("inserted")
+        )
+        closure = DepartmentClosureORM
+        added = (
+            select(
+                closure.ancestor_id,
+                func.count().label("subtree"),
+                func.count().filter(closure.depth == 0).label("direct"),
+            )
+            .join(inserted, inserted.c.department_id == closure.descendant_id)
+            .group_by(closure.ancestor_id)
+            .subquery("added")
+        )
+        headcounts = (
+            update(DepartmentORM)
+            .where(DepartmentORM.id == added.c.ancestor_id)
+            .values(
+                direct_headcount=DepartmentORM.direct_headcount + added.c.direct,
+                subtree_headcount=DepartmentORM.subtree_headcount + added.c.subtree,
+            )
+            .cte("headcounts")
+        )
+
+        result = await self._write(
+            select(staged.line)
+            .where(~department_exists)
+            .order_by(staged.line)
+            .add_cte(headcounts)
+        )
+        department_changes(self.session).touch(*{e.department_id for e in entities})
+        return list(result.scalars())
 
     async def get_by_id(self, employee_id: int) -> Employee | None:
         result = await self.session.execute(
-            select(EmployeeORM).where(EmployeeORM.id == employee_id)
+            select(*EMPLOYEE_COLUMNS).where(EmployeeORM.id == employee_id)
+        )
+        row = result.one_or_none()
+        return to_employee(row) if row else None
+
+    async def list_page(
+        self,
+        department_id: int | None,
+        after: tuple[int, int] | None,
+        limit: int,
+    ) -> list[Employee]:
+        # keyset по (department_id, id): страница читается с нужного места
+        # индекса ix_employees_department_id_id, без OFFSET
+        stmt = (
+            select(*EMPLOYEE_COLUMNS)
+            .order_by(EmployeeORM.department_id, EmployeeORM.id)
+            .limit(limit)
+        )
+        if department_id is not None:
+            stmt = stmt.where(EmployeeORM.department_id == department_id)
+        if after is not None:
+            stmt = stmt.where(
+                tuple_(EmployeeORM.department_id, EmployeeORM.id) > tuple_(*after)
+            )
+
+        result = await self.session.execute(stmt)
+        return [to_employee(row) for row in result]
+
+    async def stream_with_department_names(
+        self, department_id: int | None, subtree: bool
+    ) -> AsyncIterator[tuple[Employee, str]]:
+        # серверный курсор: в памяти не больше одной порции yield_per
+        stmt = (
+            select(*EMPLOYEE_COLUMNS, DepartmentORM.name)
+            .join(DepartmentORM, DepartmentORM.id == EmployeeORM.department_id)
+            .order_by(EmployeeORM.department_id, EmployeeORM.id)
+            .execution_options(yield_per=1000)
         )
-        model = result.scalar_one_or_none()
-        return model.to_entity() if model else None
+        if department_id is not None and subtree:
+            stmt = stmt.where(
+                EmployeeORM.department_id.in_(
+                    select(DepartmentClosureORM.descendant_id).where(
+                        DepartmentClosureORM.ancestor_id == department_id
+                    )
+                )
+            )
+        elif department_id is not None:
+            stmt = stmt.where(EmployeeORM.department_id == department_id)
+
+        result = await self.session.stream(stmt)
+        async for row in result:
+            yield to_employee(row[:-1]), row[-1]
 
     async def update(self, entity: Employee) -> Employee | None:
-        result = await self.session.execute(
+        # старое подразделение читается под блокировкой строки (FOR UPDATE в
+        # CTE): при параллельном переводе это значение после чужого commit,
+        # а не из снимка до блокировки; счётчики правятся в том же запросе
+        locked = self._lock_rows(EmployeeORM.id == entity.id)
+        updated = (
             update(EmployeeORM)
-            .where(EmployeeORM.id == entity.id)
+            .where(EmployeeORM.id == locked.c.id)
             .values(
                 full_name=entity.full_name,
                 position=entity.position,
                 hired_at=entity.hired_at,
                 department_id=entity.department_id,
             )
-            .returning(EmployeeORM)
+            .returning(
+                *EMPLOYEE_COLUMNS,
+                locked.c.department_id.label("old_department_id"),
+            )
+            .cte("updated")
+        )
+        moved = updated.c.old_department_id != updated.c.department_id
+        headcounts = apply_employee_moves(
+            removed_from=select(updated.c.old_department_id).where(moved),
+            added_to=select(updated.c.department_id).where(moved),
+        ).cte("headcounts")
+
+        result = await self._write(
+            select(
+                *columns_of(updated, EMPLOYEE_COLUMNS), updated.c.old_department_id
+            ).add_cte(headcounts)
+        )
+        row = result.one_or_none()
+        if row is None:
+            return None
+        department_changes(self.session).touch(row.department_id, row.old_department_id)
+        return to_employee(row[:-1])
+
+    async def delete(self, employee_id: int) -> bool:
+        return bool(await self.delete_many([employee_id], None))
+
+    async def _write(self, stmt):
+        # ссылка на несуществующее подразделение — нарушение внешнего ключа
+        try:
+            return await self.session.execute(stmt)
+        except IntegrityError as e:
+            if sqlstate(e) == FOREIGN_KEY_VIOLATION:
+                raise DepartmentNotFoundError from e
+            raise
+
+    @staticmethod
+    def _lock_rows(*criteria):
+        # READ COMMITTED: FOR UPDATE дожидается чужой транзакции и заново
+        # проверяет условия на последней версии строки
+        return (
+            select(EmployeeORM.id, EmployeeORM.department_id)
+            .where(*criteria)
+            .with_for_update()
+            .cte("locked")
+        )
+
+    @staticmethod
+    def _selection(model, ids: list[int] | None, department_id: int | None) -> list:
+        # = ANY(:ids) — один параметр-массив вместо IN со списком параметров,
+        # план запроса не зависит от числа id
+        criteria = []
+        if ids is not None:
+            criteria.append(model.id == any_(bindparam("ids", ids, ARRAY(Integer))))
+        if department_id is not None:
+            criteria.append(model.department_id == department_id)
+        return criteria
+
+    async def move_many(
+        self,
+        ids: list[int] | None,
+        department_id: int | None,
+        target_department_id: int,
+    ) -> list[int]:
+        # старое подразделение — из заблокированных строк, как в update
+        locked = self._lock_rows(
+            EmployeeORM.department_id != target_department_id,
+            *self._selection(EmployeeORM, ids, department_id),
+        )
+        moved = (
+            update(EmployeeORM)
+            .where(EmployeeORM.id == locked.c.id)
+            .values(department_id=target_department_id)
+            .returning(
+                EmployeeORM.id, locked.c.department_id.label("old_department_id")
+            )
+            .cte("moved")
+        )
+        headcounts = apply_employee_moves(
+            removed_from=select(moved.c.old_department_id),
+            added_to=select(literal(target_department_id)).select_from(moved),
+        ).cte("headcounts")
+
+        result = await self._write(
+            select(moved.c.id, moved.c.old_department_id)
+            .order_by(moved.c.id)
+            .add_cte(headcounts)
+        )
+        rows = result.all()
+        if rows:
+            department_changes(self.session).touch(
+                target_department_id, *{row.old_department_id for row in rows}
+            )
+        return [row.id for row in rows]
+
+    async def set_positions(self, positions: dict[int, str]) -> list[int]:
+        if not positions:
+            return []
+
+        # своё значение для каждой строки: UPDATE ... FROM (VALUES ...)
+        changes = values(
+            column("id", Integer), column("position", String), name="changes"
+        ).data(list(positions.items()))
+        result = await self.session.execute(
+            update(EmployeeORM)
+            .where(EmployeeORM.id == changes.c.id)
+            .values(position=changes.c.position)
+            .returning(EmployeeORM.id, EmployeeORM.department_id)
+        )
+        rows = result.all()
+        department_changes(self.session).touch(*{row.department_id for row in rows})
+        return sorted(row.id for row in rows)
+
+    async def delete_many(
+        self, ids: list[int] | None, department_id: int | None
+    ) -> list[int]:
+        deleted = (
+            delete(EmployeeORM)
+            .where(*self._selection(EmployeeORM, ids, department_id))
+            .returning(EmployeeORM.id, EmployeeORM.department_id)
+            .cte("deleted")
         )
-        model = result.scalar_one_or_none()
-        return model.to_entity() if model else None
+        headcounts = apply_employee_moves(
+            removed_from=select(deleted.c.department_id)
+        ).cte("headcounts")
 
-    async def delete(self, employee_id: int):
-        await self.session.execute(
-            delete(EmployeeORM).where(EmployeeORM.id == employee_id)
+        result = await self._write(
+            select(deleted.c.id, deleted.c.department_id)
+            .order_by(deleted.c.id)
+            .add_cte(headcounts)
         )
+        rows = result.all()
+        department_changes(self.session).touch(*{row.department_id for row in rows})
+        return [row.id for row in rows]
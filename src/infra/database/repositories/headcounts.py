@@ -0,0 +1,98 @@
+from sqlalchemy import (
+    ColumnElement,
+    Integer,
+    Select,
+    Update,
+    case,
+    cast,
+    false,
+    func,
+    literal,
+    select,
+    union_all,
+    update,
+)
+
+from infra.database.models import DepartmentORM, DepartmentClosureORM
+
+
+def ancestor_ids(department_id: int, include_self: bool = True) -> Select:
+    return select(DepartmentClosureORM.ancestor_id).where(
+        DepartmentClosureORM.descendant_id == department_id,
+        DepartmentClosureORM.depth >= (0 if include_self else 1),
+    )
+
+
+def shift_headcounts(
+    amount: int | ColumnElement[int],
+    removed_from: Select | None = None,
+    added_to: Select | None = None,
+    direct_department_id: int | None = None,
+) -> Update:
+    # одним UPDATE: вычесть amount из subtree_headcount у removed_from, прибавить
+    # у added_to и, если задано, прибавить к direct_headcount подразделения
+    amount = literal(amount) if isinstance(amount, int) else amount
+    removed = (
+        DepartmentORM.id.in_(removed_from) if removed_from is not None else false()
+    )
+    added = DepartmentORM.id.in_(added_to) if added_to is not None else false()
+    direct = (
+        DepartmentORM.id == direct_department_id
+        if direct_department_id is not None
+        else false()
+    )
+
+    return (
+        update(DepartmentORM)
+        .where(removed | added)
+        .values(
+            subtree_headcount=DepartmentORM.subtree_headcount
+            - case((removed, amount), else_=0)
+            + case((added, amount), else_=0),
+            direct_headcount=DepartmentORM.direct_headcount
+            + case((direct, amount), else_=0),
+        )
+    )
+
+
+def apply_employee_moves(
+    removed_from: Select | None = None, added_to: Select | None = None
+) -> Update:
+    # removed_from / added_to — по строке department_id на каждого ушедшего /
+    # пришедшего сотрудника. Изменения сворачиваются по предкам через замыкание,
+    # чтобы каждое подразделение обновилось ровно один раз
+    parts = []
+    if removed_from is not None:
+        removed = removed_from.subquery("removed")
+        parts.append(
+            select(removed.c[0].label("department_id"), literal(-1).label("delta"))
+        )
+    if added_to is not None:
+        added = added_to.subquery("added")
+        parts.append(
+            select(added.c[0].label("department_id"), literal(1).label("delta"))
+        )
+    changes = (union_all(*parts) if len(parts) > 1 else parts[0]).subquery("changes")
+
+    closure = DepartmentClosureORM
+    deltas = (
+        select(
+            closure.ancestor_id,
+            cast(func.sum(changes.c.delta), Integer).label("subtree"),
+            cast(
+                func.coalesce(func.sum(changes.c.delta).filter(closure.depth == 0), 0),
+                Integer,
+            ).label("direct"),
+        )
+        .join(closure, closure.descendant_id == changes.c.department_id)
+        .group_by(closure.ancestor_id)
+        .subquery("deltas")
+    )
+    return (
+        update(DepartmentORM)
+        .where(DepartmentORM.id == deltas.c.ancestor_id)
+        .values(
+            direct_headcount=DepartmentORM.direct_headcount + deltas.c.direct,
+            subtree_headcount=DepartmentORM.subtree_headcount + deltas.c.subtree,
+        )
+    )
@@ -0,0 +1,37 @@
+from sqlalchemy import Row
+
+from domain.entities import Department, Employee
+from infra.database.models import DepartmentORM, EmployeeORM
+
+# чтение без ORM: выбираются только столбцы, сущность собирается прямо из
+# кортежа строки, без identity map и состояния объектов. Порядок столбцов
+# совпадает с порядком полей dataclass
+DEPARTMENT_COLUMNS = (
+    DepartmentORM.id,
+    DepartmentORM.name,
+    DepartmentORM.parent_id,
+    DepartmentORM.created_at,
+    DepartmentORM.direct_headcount,
+    DepartmentORM.subtree_headcount,
+)
+EMPLOYEE_COLUMNS = (
+    EmployeeORM.id,
+    EmployeeORM.department_id,
+    EmployeeORM.full_name,
+    EmployeeORM.position,
+    EmployeeORM.hired_at,
+    EmployeeORM.created_at,
+)
+
+
+def columns_of(selectable, columns: tuple) -> list:
+    # те же столбцы из подзапроса или CTE
+    return [selectable.c[c.key] for c in columns]
+
+
+def to_department(row: Row) -> Department:
+    return Department(*row)
+
+
+def to_employee(row: Row) -> Employee:
+    return Employee(*row)
@@ -0,0 +1,79 @@
+import time
+from contextvars import ContextVar, Token
+from dataclasses import dataclass
+from itertools import cycle
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+__all__ = [
+    "ReplicaRouter",
+    "WriteStamp",
+    "stop_tracking_writes",
+    "track_writes",
+]
+
+
+@dataclass
+class WriteStamp:
+    # время последней записи клиента (unix time): приходит с запросом и
+    # обновляется при commit; wrote — была ли запись в этом запросе
+    written_at: float | None = None
+    wrote: bool = False
+
+
+# отметка хранится у клиента, поэтому одинаково видна всем воркерам
+_stamp: ContextVar[WriteStamp | None] = ContextVar("write_stamp", default=None)
+
+
+def track_writes(written_at: float | None = None) -> tuple[WriteStamp, Token]:
+    stamp = WriteStamp(written_at)
+    return stamp, _stamp.set(stamp)
+
+
+def stop_tracking_writes(token: Token) -> None:
+    _stamp.reset(token)
+
+
+class ReplicaRouter:
+    # выбирает фабрику сессий для чтения: реплики по кругу, primary — если
+    # реплик нет или клиент писал меньше sticky_seconds назад (read-your-writes).
+    # Время записи берётся из отметки текущего запроса (track_writes).
+    # sticky_seconds = 0 отключает привязку
+    def __init__(
+        self,
+        primary,
+        replicas: list | None = None,
+        sticky_seconds: float = 0.0,
+    ):
+        self.primary = primary
+        self.replicas = list(replicas or [])
+        self.sticky_seconds = sticky_seconds
+        self._next_replica = cycle(self.replicas)
+
+    @property
+    def sticky(self) -> bool:
+        return self.sticky_seconds > 0 and bool(self.replicas)
+
+    def read_session(self) -> AsyncSession:
+        if not self.replicas or self._recently_written():
+            return self.primary()
+        session = next(self._next_replica)()
+        # реплика может отставать от primary: по метке читатель решает, можно
+        # ли делиться прочитанным (например, класть в кеш)
+        session.info["replica"] = True
+        return session
+
+    def record_write(self) -> None:
+        stamp = _stamp.get()
+        if stamp is None or not self.sticky:
+            return
+        stamp.written_at = time.time()
+        stamp.wrote = True
+
+    def _recently_written(self) -> bool:
+        stamp = _stamp.get()
+        if stamp is None or stamp.written_at is None or self.sticky_seconds <= 0:
+            return False
+        # часы воркеров на разных машинах могут расходиться, поэтому отметка
+        # «из будущего» тоже в окне, но не дальше sticky_seconds
+        return abs(time.time() - stamp.written_at) < self.sticky_seconds
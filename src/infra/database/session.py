@@ -1,13 +1,92 @@
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
 from src.config import settings
+from infra.cache import TreeCache
+from infra.database.hierarchy import DepartmentHierarchyIndex, HierarchyIndex
+from infra.database.hierarchy_snapshot import SnapshotHierarchyIndex
+from infra.database.instrumentation import instrument
+from infra.database.pool import InstrumentedPool
+from infra.database.routing import ReplicaRouter
+from infra.database.slow_queries import SlowQueryLog
+from infra.database.uow import READ_ONLY_OPTIONS, READ_ONLY_REPLICA_OPTIONS
 
-__all__ = ["SessionFactory", "engine"]
+__all__ = [
+    "SessionFactory",
+    "ReadOnlySessionFactory",
+    "engine",
+    "replica_engines",
+    "replica_router",
+    "slow_query_log",
+    "hierarchy_index",
+    "tree_cache",
+]
 
 
-engine = create_async_engine(
-    settings.postgres_dsn,
+slow_query_log = SlowQueryLog(
+    settings.slow_query_seconds,
+    settings.slow_query_explain_rate,
+    settings.slow_query_log_size,
 )
 
 
+def create_engine(dsn: str):
+    # счётчик запросов и времени БД текущего HTTP-запроса — instrumentation.py,
+    # медленные запросы — slow_queries.py (если включён)
+    engine = instrument(
+        create_async_engine(
+            dsn,
+            poolclass=InstrumentedPool,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+            pool_pre_ping=settings.db_pool_pre_ping,
+            connect_args={
+                "prepared_statement_cache_size": settings.db_statement_cache_size
+            },
+        )
+    )
+    return slow_query_log.instrument(engine)
+
+
+engine = create_engine(settings.postgres_dsn)
+
+
 SessionFactory = async_sessionmaker(engine, expire_on_commit=False, autocommit=False)
+
+# тот же пул, режим транзакции задаётся при выдаче соединения и
+# сбрасывается при возврате
+ReadOnlySessionFactory = async_sessionmaker(
+    engine.execution_options(**READ_ONLY_OPTIONS), expire_on_commit=False
+)
+
+
+replica_engines = [create_engine(dsn) for dsn in settings.postgres_replica_dsns]
+
+replica_router = ReplicaRouter(
+    ReadOnlySessionFactory,
+    [
+        async_sessionmaker(
+            replica.execution_options(**READ_ONLY_REPLICA_OPTIONS),
+            expire_on_commit=False,
+        )
+        for replica in replica_engines
+    ],
+    sticky_seconds=settings.replica_read_your_writes_seconds,
+)
+
+
+hierarchy_index: HierarchyIndex | None = None
+if settings.hierarchy_index_enabled and settings.hierarchy_snapshot_path:
+    hierarchy_index = SnapshotHierarchyIndex(
+        settings.hierarchy_snapshot_path,
+        check_interval=settings.hierarchy_index_check_interval,
+        session_factory=ReadOnlySessionFactory,
+    )
+elif settings.hierarchy_index_enabled:
+    hierarchy_index = DepartmentHierarchyIndex(
+        check_interval=settings.hierarchy_index_check_interval
+    )
+
+
+tree_cache = TreeCache(settings.tree_cache_size, settings.tree_cache_ttl)
@@ -0,0 +1,164 @@
+import asyncio
+import random
+import re
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from config.logging import current_route
+
+__all__ = ["SlowQuery", "SlowQueryLog", "is_read_only", "redact"]
+
+# параметр выполнения, которым помечен собственный EXPLAIN: его не замеряем
+SKIP_OPTION = "slow_query_log_skip"
+# EXPLAIN имеет смысл только для запросов с планом
+EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+# ANALYZE выполняет запрос, поэтому снимается только для чтения: SELECT или
+# WITH без изменяющих CTE и без блокировок строк (FOR UPDATE / FOR SHARE)
+READ_ONLY = ("SELECT", "WITH")
+WRITES = re.compile(r"\b(INSERT|UPDATE|DELETE|MERGE|SHARE)\b", re.IGNORECASE)
+# сколько элементов массива-параметра показывать
+MAX_LIST_ITEMS = 10
+
+
+@dataclass
+class SlowQuery:
+    statement: str
+    parameters: list
+    seconds: float
+    route: str | None
+    recorded_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    # план заполняется фоновой задачей, пока её нет — None
+    plan: str | None = None
+
+
+def redact(value):
+    # числа, даты и флаги оставляем, остальное (строки с ФИО, должностями,
+    # названиями) заменяем типом; из массивов — первые MAX_LIST_ITEMS
+    if value is None or isinstance(value, (bool, int, float, Decimal, date)):
+        return value
+    if isinstance(value, (list, tuple)):
+        items = [redact(item) for item in value[:MAX_LIST_ITEMS]]
+        if len(value) > MAX_LIST_ITEMS:
+            items.append(f"<{len(value) - MAX_LIST_ITEMS} more>")
+        return items
+    return f"<{type(value).__name__}>"
+
+
+def is_read_only(statement: str) -> bool:
+    return statement.lstrip().upper().startswith(READ_ONLY) and not WRITES.search(
+        statement
+    )
+
+
+class SlowQueryLog:
+    # запросы дольше threshold секунд: запись в лог и в кольцо последних size
+    # запросов. Для доли explain_rate из них отдельное соединение того же
+    # engine снимает план: у чтения — EXPLAIN (ANALYZE, BUFFERS) в транзакции
+    # READ ONLY, у записи — EXPLAIN без ANALYZE, запрос не выполняется и не
+    # ждёт блокировок строк исходной транзакции. Одновременно идёт не больше
+    # одного EXPLAIN, остальные пропускаются, чтобы не занимать пул.
+    # threshold = 0 отключает журнал
+    def __init__(
+        self, threshold: float = 0.0, explain_rate: float = 0.0, size: int = 100
+    ):
+        self.threshold = threshold
+        self.explain_rate = explain_rate
+        self.entries: deque[SlowQuery] = deque(maxlen=size)
+        self._explaining: asyncio.Task | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0 and self.entries.maxlen > 0
+
+    def instrument(self, engine: AsyncEngine) -> AsyncEngine:
+        if not self.enabled:
+            return engine
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+            conn.info.setdefault("slow_query_started", []).append(time.perf_counter())
+
+        def after_cursor_execute(conn, cursor, statement, parameters, context, many):
+            seconds = time.perf_counter() - conn.info["slow_query_started"].pop()
+            if seconds < self.threshold:
+                return
+            if context is not None and context.execution_options.get(SKIP_OPTION):
+                return
+            self._record(engine, statement, parameters, many, seconds)
+
+        def handle_error(exception_context):
+            # упавший запрос не записываем, только снимаем отметку времени
+            connection = exception_context.connection
+            if connection is not None and connection.info.get("slow_query_started"):
+                connection.info["slow_query_started"].pop()
+
+        sync_engine = engine.sync_engine
+        event.listen(sync_engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", after_cursor_execute)
+        event.listen(sync_engine, "handle_error", handle_error)
+        return engine
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+    def _record(self, engine, statement, parameters, many, seconds) -> None:
+        # при executemany показываем первый набор параметров
+        if many and parameters:
+            parameters = parameters[0]
+        entry = SlowQuery(
+            statement=statement,
+            parameters=redact(list(parameters or ())),
+            seconds=seconds,
+            route=current_route(),
+        )
+        self.entries.append(entry)
+        logger.warning(
+            "Slow query {:.1f} ms on {}: {} {}",
+            seconds * 1000,
+            entry.route,
+            statement,
+            entry.parameters,
+        )
+
+        if (
+            not many
+            and statement.lstrip().upper().startswith(EXPLAINABLE)
+            and (self._explaining is None or self._explaining.done())
+            and random.random() < self.explain_rate
+        ):
+            self._explaining = asyncio.get_running_loop().create_task(
+                self._explain(engine, entry, statement, parameters)
+            )
+
+    async def _explain(self, engine, entry: SlowQuery, statement, parameters):
+        analyze = is_read_only(statement)
+        explain = "EXPLAIN (ANALYZE, BUFFERS) " if analyze else "EXPLAIN "
+        try:
+            async with engine.connect() as conn:
+                # READ ONLY: если запрос всё же что-то меняет, Postgres
+                # откажет ещё до выполнения
+                conn = await conn.execution_options(
+                    postgresql_readonly=analyze, **{SKIP_OPTION: True}
+                )
+                transaction = await conn.begin()
+                try:
+                    result = await conn.exec_driver_sql(
+                        explain + statement, parameters
+                    )
+                    entry.plan = "\n".join(row[0] for row in result)
+                finally:
+                    await transaction.rollback()
+        except Exception as e:
+            entry.plan = f"EXPLAIN failed: {e}"
+            logger.warning("EXPLAIN of slow query failed: {}", e)
+
+    async def wait(self) -> None:
+        # дождаться текущего EXPLAIN (тесты, остановка приложения)
+        if self._explaining is not None:
+            await asyncio.gather(self._explaining, return_exceptions=True)
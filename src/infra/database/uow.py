@@ -1,21 +1,73 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from domain.uow import AbstractUnitOfWork
+from infra.cache import TreeCache
+from infra.database.hierarchy import (
+    HierarchyIndex,
+    department_changes,
+    pop_department_changes,
+)
 from infra.database.repositories import (
     DepartmentRepository,
     EmployeeRepository,
 )
+from infra.database.routing import ReplicaRouter
+from infra.metrics import transaction_metrics
+
+__all__ = [
+    "READ_ONLY_OPTIONS",
+    "READ_ONLY_REPLICA_OPTIONS",
+    "SQLAlchemyUnitOfWork",
+    "SQLAlchemyReadOnlyUnitOfWork",
+]
 
-__all__ = ["SQLAlchemyUnitOfWork"]
+# BEGIN ISOLATION LEVEL SERIALIZABLE READ ONLY DEFERRABLE: снимок без
+# аномалий сериализации, без предикатных блокировок SSI и без отката из-за
+# конфликтов; asyncpg отправляет всё это одним BEGIN
+READ_ONLY_OPTIONS = {
+    "isolation_level": "SERIALIZABLE",
+    "postgresql_readonly": True,
+    "postgresql_deferrable": True,
+}
+# на горячей реплике SERIALIZABLE недоступен, снимок даёт REPEATABLE READ
+READ_ONLY_REPLICA_OPTIONS = {
+    "isolation_level": "REPEATABLE READ",
+    "postgresql_readonly": True,
+}
 
 
 class SQLAlchemyUnitOfWork(AbstractUnitOfWork):
-    def __init__(self, session_factory):
+    # пишущая транзакция читает подразделения из БД: индекс не видит её
+    # незакоммиченных изменений и может отставать от чужих commit. Сам индекс
+    # ей нужен, чтобы применить изменения после commit
+    reads_hierarchy_index = False
+
+    def __init__(
+        self,
+        session_factory,
+        hierarchy: HierarchyIndex | None = None,
+        router: ReplicaRouter | None = None,
+        tree_cache: TreeCache | None = None,
+    ):
         self.session_factory = session_factory
+        self.hierarchy = hierarchy
+        # router — для read-your-writes: commit обновляет отметку о записи
+        # текущего запроса, и чтения клиента какое-то время идут в primary
+        self.router = router
+        self.tree_cache = tree_cache
+
+    def _open_session(self) -> AsyncSession:
+        return self.session_factory()
+
+    @property
+    def on_replica(self) -> bool:
+        return self.session.info.get("replica", False)
 
     async def __aenter__(self):
-        self.session: AsyncSession = self.session_factory()
-        self.department_repo = DepartmentRepository(self.session)
+        self.session: AsyncSession = self._open_session()
+        self.department_repo = DepartmentRepository(
+            self.session, self.hierarchy if self.reads_hierarchy_index else None
+        )
         self.employee_repo = EmployeeRepository(self.session)
         return self
 
@@ -34,7 +86,61 @@ class SQLAlchemyUnitOfWork(AbstractUnitOfWork):
             await self.session.close()
 
     async def commit(self):
+        wrote = self.session.in_transaction()
+        touched = await self._touched_departments()
         await self.session.commit()
+        transaction_metrics.commits += 1
+        if wrote and self.router is not None:
+            self.router.record_write()
+        changes = pop_department_changes(self.session)
+        if self.hierarchy is not None and changes is not None:
+            self.hierarchy.apply(changes)
+        if touched:
+            self.tree_cache.invalidate(touched)
+
+    async def _touched_departments(self) -> set[int]:
+        # затронутые подразделения вместе с предками, ещё внутри транзакции;
+        # удалённых в замыкании уже нет, они остаются как есть
+        if self.tree_cache is None or not self.tree_cache.enabled:
+            return set()
+        touched = department_changes(self.session).touched
+        if not touched:
+            return set()
+        return touched | await self.department_repo.get_ancestor_ids(list(touched))
+
+    async def rollback(self):
+        await self.session.rollback()
+        transaction_metrics.rollbacks += 1
+        pop_department_changes(self.session)
+
+
+# только чтение. Сессия берёт соединение при первом запросе репозитория,
+# поэтому запрос, упавший на валидации, в БД не ходит вовсе. COMMIT не
+# отправляется: закрытие сессии завершает транзакцию и сразу возвращает
+# соединение в пул. С router чтение уходит на реплику
+class SQLAlchemyReadOnlyUnitOfWork(SQLAlchemyUnitOfWork):
+    reads_hierarchy_index = True
+
+    def _open_session(self) -> AsyncSession:
+        if self.router is not None:
+            return self.router.read_session()
+        return self.session_factory()
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: object | None,
+    ) -> None:
+        await self.release()
+
+    async def release(self) -> None:
+        # вернуть соединение в пул, не дожидаясь выхода из UoW: повторное
+        # закрытие сессии ничего не делает, новый запрос возьмёт соединение заново
+        await self.session.close()
+
+    async def commit(self):
+        raise RuntimeError("Read-only unit of work cannot commit")
 
     async def rollback(self):
         await self.session.rollback()
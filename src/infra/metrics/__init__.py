@@ -0,0 +1,18 @@
+from .collectors import (
+    Histogram,
+    RequestMetrics,
+    TransactionMetrics,
+    request_metrics,
+    transaction_metrics,
+)
+from .exposition import CONTENT_TYPE, render_metrics
+
+__all__ = [
+    "CONTENT_TYPE",
+    "Histogram",
+    "RequestMetrics",
+    "TransactionMetrics",
+    "render_metrics",
+    "request_metrics",
+    "transaction_metrics",
+]
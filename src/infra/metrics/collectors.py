@@ -0,0 +1,58 @@
+from bisect import bisect_left
+
+__all__ = [
+    "LATENCY_BUCKETS",
+    "Histogram",
+    "RequestMetrics",
+    "TransactionMetrics",
+    "request_metrics",
+    "transaction_metrics",
+]
+
+# верхние границы корзин длительности запроса, секунды
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+# счётчики меняются только из потока event loop, без await между чтением и
+# записью, поэтому обходятся без блокировок
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        # последняя корзина — больше всех границ (+Inf)
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class RequestMetrics:
+    # длительность по маршруту: шаблон пути APIRouter -> метод -> гистограмма.
+    # Ключи — строки маршрута, новые объекты создаются только для первого
+    # запроса маршрута
+    def __init__(self):
+        self.in_flight = 0
+        self.durations: dict[str, dict[str, Histogram]] = {}
+
+    def observe(self, route: str, method: str, seconds: float) -> None:
+        methods = self.durations.get(route)
+        if methods is None:
+            methods = self.durations[route] = {}
+        histogram = methods.get(method)
+        if histogram is None:
+            histogram = methods[method] = Histogram()
+        histogram.observe(seconds)
+
+
+class TransactionMetrics:
+    # завершённые транзакции SQLAlchemyUnitOfWork на запись
+    def __init__(self):
+        self.commits = 0
+        self.rollbacks = 0
+
+
+request_metrics = RequestMetrics()
+transaction_metrics = TransactionMetrics()
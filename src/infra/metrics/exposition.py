@@ -0,0 +1,124 @@
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from infra.database.pool import WAIT_BUCKETS, pool_metrics
+from infra.metrics.collectors import RequestMetrics, TransactionMetrics
+
+__all__ = ["CONTENT_TYPE", "render_metrics"]
+
+# текстовый формат Prometheus 0.0.4
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = (f'{key}="{_escape(value)}"' for key, value in labels.items())
+    return "{" + ",".join(pairs) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _Writer:
+    def __init__(self):
+        self.lines: list[str] = []
+
+    def family(self, name: str, kind: str, help_text: str) -> None:
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {kind}")
+
+    def sample(self, name: str, labels: dict[str, str], value: float) -> None:
+        self.lines.append(f"{name}{_labels(labels)} {value}")
+
+    def histogram(
+        self,
+        name: str,
+        labels: dict[str, str],
+        buckets: tuple[float, ...],
+        counts: list[int],
+        total: float,
+    ) -> None:
+        # в экспозиции корзины накопительные: le — «не больше»
+        cumulative = 0
+        for bound, count in zip([*map(str, buckets), "+Inf"], counts):
+            cumulative += count
+            self.sample(f"{name}_bucket", {**labels, "le": bound}, cumulative)
+        self.sample(f"{name}_sum", labels, total)
+        self.sample(f"{name}_count", labels, cumulative)
+
+    def text(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+def render_metrics(
+    requests: RequestMetrics,
+    transactions: TransactionMetrics,
+    pools: dict[str, AsyncEngine],
+) -> str:
+    writer = _Writer()
+
+    writer.family(
+        "http_request_duration_seconds",
+        "histogram",
+        "Request latency by APIRouter path template and method",
+    )
+    for route, methods in requests.durations.items():
+        for method, histogram in methods.items():
+            writer.histogram(
+                "http_request_duration_seconds",
+                {"route": route, "method": method},
+                histogram.buckets,
+                histogram.counts,
+                histogram.sum,
+            )
+
+    writer.family("http_requests_in_flight", "gauge", "Requests being served")
+    writer.sample("http_requests_in_flight", {}, requests.in_flight)
+
+    writer.family(
+        "uow_transactions_total", "counter", "Finished unit of work transactions"
+    )
+    writer.sample("uow_transactions_total", {"outcome": "commit"}, transactions.commits)
+    writer.sample(
+        "uow_transactions_total", {"outcome": "rollback"}, transactions.rollbacks
+    )
+
+    metrics = {name: pool_metrics(engine) for name, engine in pools.items()}
+    for gauge, help_text in (
+        ("size", "Configured pool size"),
+        ("checked_out", "Connections in use"),
+        ("idle", "Idle connections in the pool"),
+        ("overflow", "Connections above pool size"),
+    ):
+        writer.family(f"db_pool_{gauge}", "gauge", help_text)
+        for name, values in metrics.items():
+            writer.sample(f"db_pool_{gauge}", {"pool": name}, values[gauge])
+
+    writer.family(
+        "db_pool_checkout_timeouts_total",
+        "counter",
+        "Checkouts that gave up waiting for a connection",
+    )
+    for name, values in metrics.items():
+        writer.sample(
+            "db_pool_checkout_timeouts_total", {"pool": name}, values.get("timeouts", 0)
+        )
+
+    writer.family(
+        "db_pool_checkout_wait_seconds",
+        "histogram",
+        "Time spent waiting for a pooled connection",
+    )
+    for name, engine in pools.items():
+        stats = getattr(engine.pool, "stats", None)
+        if stats is not None:
+            writer.histogram(
+                "db_pool_checkout_wait_seconds",
+                {"pool": name},
+                WAIT_BUCKETS,
+                stats.wait_buckets,
+                stats.wait_seconds_total,
+            )
+
+    return writer.text()
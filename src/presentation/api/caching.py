@@ -0,0 +1,10 @@
+# If-None-Match: список ETag через запятую или "*"; сравнение слабое (RFC 9110),
+# поэтому префикс W/ не мешает совпадению
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
@@ -1,27 +1,104 @@
+import secrets
 from typing import AsyncGenerator
 from loguru import logger
-from fastapi import Depends
+from fastapi import Depends, Header, HTTPException, Query, Request
+
+from config import settings
 
 from domain.uow import AbstractUnitOfWork
-from infra.database.session import SessionFactory
-from infra.database.uow import SQLAlchemyUnitOfWork
+from infra.database.session import (
+    ReadOnlySessionFactory,
+    SessionFactory,
+    hierarchy_index,
+    replica_router,
+    tree_cache,
+)
+from infra.database.uow import SQLAlchemyReadOnlyUnitOfWork, SQLAlchemyUnitOfWork
 from presentation.api.handlers import DepartmentHandler, EmployeeHandler
 
 
 async def get_uow() -> AsyncGenerator[SQLAlchemyUnitOfWork]:
-    async with SQLAlchemyUnitOfWork(SessionFactory) as uow:
-        logger.info("SQLAlchemyUnitOfWork started transaction")
+    async with SQLAlchemyUnitOfWork(
+        SessionFactory, hierarchy_index, replica_router, tree_cache=tree_cache
+    ) as uow:
+        logger.debug("SQLAlchemyUnitOfWork started transaction")
+        yield uow
+        logger.debug("SQLAlchemyUnitOfWork finished transaction")
+
+
+async def get_read_uow() -> AsyncGenerator[SQLAlchemyReadOnlyUnitOfWork]:
+    async with SQLAlchemyReadOnlyUnitOfWork(
+        ReadOnlySessionFactory, hierarchy_index, replica_router
+    ) as uow:
         yield uow
-        logger.info("SQLAlchemyUnitOfWork finished transaction")
 
 
+# запись: scope="function" — commit до отправки ответа, так клиент не
+# получает 2xx раньше фиксации, а отметка о записи успевает в заголовки
 async def get_department_handler(
-    uow: AbstractUnitOfWork = Depends(get_uow),
+    uow: AbstractUnitOfWork = Depends(get_uow, scope="function"),
 ) -> DepartmentHandler:
     return DepartmentHandler(uow)
 
 
 async def get_employee_handler(
-    uow: AbstractUnitOfWork = Depends(get_uow),
+    uow: AbstractUnitOfWork = Depends(get_uow, scope="function"),
+) -> EmployeeHandler:
+    return EmployeeHandler(uow)
+
+
+# GET-маршруты. scope="function": сессия закрывается, как только обработчик
+# вернул результат, до сериализации ответа. Потоковым ответам соединение
+# нужно до конца передачи, для них *_stream_reader со scope запроса
+async def get_department_reader(
+    uow: AbstractUnitOfWork = Depends(get_read_uow, scope="function"),
+) -> DepartmentHandler:
+    return DepartmentHandler(uow)
+
+
+async def get_employee_reader(
+    uow: AbstractUnitOfWork = Depends(get_read_uow, scope="function"),
 ) -> EmployeeHandler:
     return EmployeeHandler(uow)
+
+
+async def get_department_stream_reader(
+    uow: AbstractUnitOfWork = Depends(get_read_uow),
+) -> DepartmentHandler:
+    return DepartmentHandler(uow)
+
+
+def wants_tree_stream(request: Request, stream: bool = Query(False)) -> bool:
+    # потоковый режим GET /departments/{id}: stream=true или
+    # Accept: application/x-ndjson
+    return stream or "application/x-ndjson" in request.headers.get("accept", "")
+
+
+# GET /departments/{id}: одна UoW на оба режима, со scope запроса — потоку
+# сессия нужна до конца передачи. JSON-дерево собирается целиком, и
+# обработчик сразу отпускает соединение (release), до отправки ответа.
+# В кеш деревьев попадает только прочитанное из primary: дерево с отстающей
+# реплики могло не увидеть записи, которая уже сбросила кеш
+async def get_department_tree_reader(
+    streaming: bool = Depends(wants_tree_stream),
+    uow: SQLAlchemyReadOnlyUnitOfWork = Depends(get_read_uow),
+) -> DepartmentHandler:
+    if streaming:
+        return DepartmentHandler(uow)
+    return DepartmentHandler(uow, tree_cache, cache_trees=not uow.on_replica)
+
+
+async def get_employee_stream_reader(
+    uow: AbstractUnitOfWork = Depends(get_read_uow),
+) -> EmployeeHandler:
+    return EmployeeHandler(uow)
+
+
+def require_admin_token(x_admin_token: str | None = Header(None)) -> None:
+    # без настроенного токена служебные эндпоинты как будто не существуют
+    if not settings.admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_admin_token is None or not secrets.compare_digest(
+        x_admin_token, settings.admin_token
+    ):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
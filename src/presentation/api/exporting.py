@@ -0,0 +1,119 @@
+import csv
+import io
+import json
+import zlib
+from datetime import date
+from typing import AsyncIterator, Iterable
+
+from domain.entities import Department, Employee
+
+EMPLOYEE_COLUMNS = (
+    "id",
+    "department_id",
+    "department_name",
+    "full_name",
+    "position",
+    "hired_at",
+    "created_at",
+)
+DEPARTMENT_COLUMNS = (
+    "id",
+    "name",
+    "parent_id",
+    "created_at",
+    "direct_headcount",
+    "subtree_headcount",
+)
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+BATCH_SIZE = 1000
+
+
+def accepts_gzip(accept_encoding: str | None) -> bool:
+    # Accept-Encoding (RFC 9110): кодировки через запятую с весом ;q=, вес 0 —
+    # «не принимаю»; x-gzip — то же, что gzip; "*" — любая не названная явно
+    weights: dict[str, float] = {}
+    for item in (accept_encoding or "").split(","):
+        coding, *params = (part.strip() for part in item.split(";"))
+        if not coding:
+            continue
+        weight = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        coding = coding.lower()
+        coding = "gzip" if coding == "x-gzip" else coding
+        weights[coding] = max(weight, weights.get(coding, 0.0))
+
+    return weights.get("gzip", weights.get("*", 0.0)) > 0
+
+
+def employee_row(item: tuple[Employee, str]) -> tuple:
+    employee, department_name = item
+    return (
+        employee.id,
+        employee.department_id,
+        department_name,
+        employee.full_name,
+        employee.position,
+        employee.hired_at,
+        employee.created_at,
+    )
+
+
+def department_row(department: Department) -> tuple:
+    return (
+        department.id,
+        department.name,
+        department.parent_id,
+        department.created_at,
+        department.direct_headcount,
+        department.subtree_headcount,
+    )
+
+
+def _value(value):
+    return value.isoformat() if isinstance(value, date) else value
+
+
+def _encode_batch(rows: list[tuple], columns: Iterable[str], fmt: str) -> bytes:
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerows([[_value(value) for value in row] for row in rows])
+        return buffer.getvalue().encode()
+
+    return "".join(
+        json.dumps(dict(zip(columns, map(_value, row))), ensure_ascii=False) + "\n"
+        for row in rows
+    ).encode()
+
+
+async def encode_rows(
+    rows: AsyncIterator[tuple], columns: tuple[str, ...], fmt: str
+) -> AsyncIterator[bytes]:
+    # строки уходят в сеть пачками по BATCH_SIZE, в памяти только текущая пачка
+    if fmt == "csv":
+        yield _encode_batch([columns], columns, fmt)
+
+    batch = []
+    async for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH_SIZE:
+            yield _encode_batch(batch, columns, fmt)
+            batch = []
+    if batch:
+        yield _encode_batch(batch, columns, fmt)
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    # wbits=31 — формат gzip, сжатие по мере отправки
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -1,22 +1,52 @@
+from typing import AsyncIterator
+
 from loguru import logger
+from pydantic_core import to_json
 
-from datetime import datetime
-from domain.entities import Department
+from domain.entities import Department, Employee
 from domain.uow import AbstractUnitOfWork
 from domain.services.department_service import DepartmentService
-from presentation.api.schemas import DepartmentResponse
+from infra.cache import CachedTree, TreeCache
+from presentation.api.exporting import (
+    DEPARTMENT_COLUMNS,
+    department_row,
+    encode_rows,
+    gzip_chunks,
+)
+from presentation.api.responses import (
+    TrustedJSONResponse,
+    department_item,
+    employee_item,
+)
+from presentation.api.schemas import (
+    DepartmentResponse,
+    encode_cursor,
+    decode_cursor,
+)
 
 
 class DepartmentHandler:
-    def __init__(self, uow: AbstractUnitOfWork):
+    def __init__(
+        self,
+        uow: AbstractUnitOfWork,
+        tree_cache: TreeCache | None = None,
+        cache_trees: bool = True,
+    ):
         self._uow = uow
+        # False — деревья из кеша читаются, но собранные заново туда не кладутся
+        self._cache_trees = cache_trees
         self._service = DepartmentService(uow)
+        # без кеша каждый ответ собирается заново, ETag всё равно считается
+        # не `or`: пустой кеш ложен из-за __len__
+        self._tree_cache = (
+            tree_cache if tree_cache is not None else TreeCache(max_size=0, ttl=0)
+        )
 
     async def create(self, name: str, parent_id: int | None) -> DepartmentResponse:
         logger.info("Creating department with name='{}', parent_id={}", name, parent_id)
         entity = Department.create(name=name, parent_id=parent_id)
         result = await self._service.create(entity)
-        logger.success("Department created successfully: {}", result)
+        logger.success("Department created successfully", department=result)
         return DepartmentResponse.from_domain(result)
 
     async def get(self, department_id: int) -> DepartmentResponse:
@@ -24,6 +54,11 @@ class DepartmentHandler:
         result = await self._service.get_by_id(department_id)
         return DepartmentResponse.from_domain(result)
 
+    async def get_ancestors(self, department_id: int) -> list[DepartmentResponse]:
+        logger.info("Fetching ancestors of department id={}", department_id)
+        result = await self._service.get_ancestors(department_id)
+        return [DepartmentResponse.from_domain(d) for d in result]
+
     async def change(
         self,
         department_id: int,
@@ -41,7 +76,7 @@ class DepartmentHandler:
             name=name,
             parent_id=parent_id,
         )
-        logger.success("Department changed successfully: {}", result)
+        logger.success("Department changed successfully", department=result)
         return DepartmentResponse.from_domain(result)
 
     async def update(
@@ -55,7 +90,7 @@ class DepartmentHandler:
         )
         department = Department(id=department_id, name=name, parent_id=parent_id)
         result = await self._service.update(department)
-        logger.success("Department updated successfully: {}", result)
+        logger.success("Department updated successfully", department=result)
         return DepartmentResponse.from_domain(result)
 
     async def delete(
@@ -77,19 +112,182 @@ class DepartmentHandler:
         )
         logger.success("Department id={} deleted successfully", department_id)
 
+    async def get_children(
+        self, department_id: int, cursor: str | None = None, limit: int = 100
+    ) -> TrustedJSONResponse:
+        logger.info(
+            "Fetching children of department id={}, cursor={}, limit={}",
+            department_id,
+            cursor,
+            limit,
+        )
+        after = decode_cursor(cursor, 2) if cursor else None
+        children, next_key = await self._service.get_children_page(
+            department_id, after, limit
+        )
+        # форма DepartmentPage, без повторной валидации
+        return TrustedJSONResponse(
+            {
+                "items": [department_item(d) for d in children],
+                "next_cursor": encode_cursor(next_key) if next_key else None,
+            }
+        )
+
     async def get_tree(
-        self, department_id: int, depth: int = 1, include_employees: bool = True
+        self,
+        department_id: int,
+        depth: int = 1,
+        include_employees: bool = True,
+        children_limit: int | None = None,
+        employees_limit: int | None = None,
+        max_nodes: int | None = None,
     ):
         logger.info(
-            "Fetching department tree id={}, depth={}, include_employees={}",
+            "Fetching department tree id={}, depth={}, include_employees={}, "
+            "children_limit={}, employees_limit={}, max_nodes={}",
             department_id,
             depth,
             include_employees,
+            children_limit,
+            employees_limit,
+            max_nodes,
         )
         tree = await self._service.get_tree(
             department_id=department_id,
             depth=depth,
             include_employees=include_employees,
+            children_limit=children_limit,
+            employees_limit=employees_limit,
+            max_nodes=max_nodes,
         )
+        self._encode_cursors(tree)
         logger.success("Department tree fetched successfully for id={}", department_id)
         return tree
+
+    async def get_tree_body(
+        self,
+        department_id: int,
+        depth: int = 1,
+        include_employees: bool = True,
+        children_limit: int | None = None,
+        employees_limit: int | None = None,
+        max_nodes: int | None = None,
+    ) -> CachedTree:
+        # готовое тело ответа с ETag: из кеша или собранное и положенное в кеш
+        key = (
+            department_id,
+            depth,
+            include_employees,
+            children_limit,
+            employees_limit,
+            max_nodes,
+        )
+        cached = self._tree_cache.get(key)
+        if cached is not None:
+            logger.info("Department tree id={} served from cache", department_id)
+            return cached
+
+        generation = self._tree_cache.generation if self._cache_trees else None
+        tree = await self.get_tree(
+            department_id=department_id,
+            depth=depth,
+            include_employees=include_employees,
+            children_limit=children_limit,
+            employees_limit=employees_limit,
+            max_nodes=max_nodes,
+        )
+        # тело готово, БД больше не нужна: соединение возвращается в пул до
+        # отправки ответа
+        await self._uow.release()
+        # дерево собрано сервером в форме DepartmentTreeResponse, валидировать
+        # его заново незачем
+        body = to_json(tree)
+        return self._tree_cache.put(key, body, self._tree_ids(tree), generation)
+
+    def _tree_ids(self, node: dict) -> set[int]:
+        ids = {node["id"]}
+        for child in node["children"]:
+            ids |= self._tree_ids(child)
+        return ids
+
+    async def export(
+        self, fmt: str, department_id: int | None = None, compress: bool = False
+    ) -> AsyncIterator[bytes]:
+        logger.info(
+            "Exporting departments format={}, department_id={}, gzip={}",
+            fmt,
+            department_id,
+            compress,
+        )
+        departments = await self._service.export(department_id)
+        chunks = encode_rows(
+            (department_row(d) async for d in departments), DEPARTMENT_COLUMNS, fmt
+        )
+        return gzip_chunks(chunks) if compress else chunks
+
+    async def stream_tree(
+        self, department_id: int, depth: int = 1, include_employees: bool = True
+    ) -> AsyncIterator[bytes]:
+        logger.info(
+            "Streaming department tree id={}, depth={}, include_employees={}",
+            department_id,
+            depth,
+            include_employees,
+        )
+        items = await self._service.stream_tree(
+            department_id=department_id,
+            depth=depth,
+            include_employees=include_employees,
+        )
+        return self._ndjson(department_id, items)
+
+    async def _ndjson(
+        self, department_id: int, items: AsyncIterator[Department | Employee]
+    ) -> AsyncIterator[bytes]:
+        # одна строка JSON на подразделение или сотрудника, в сеть уходят пачками
+        lines = []
+        count = 0
+        async for item in items:
+            lines.append(to_json(self._stream_line(item)))
+            count += 1
+            if len(lines) == 500:
+                yield b"\n".join(lines) + b"\n"
+                lines.clear()
+        if lines:
+            yield b"\n".join(lines) + b"\n"
+        logger.success(
+            "Department tree streamed for id={}, {} lines", department_id, count
+        )
+
+    @staticmethod
+    def _stream_line(item: Department | Employee) -> dict:
+        if isinstance(item, Employee):
+            employee = employee_item(item)
+            del employee["path"]
+            return {"type": "employee", **employee}
+
+        return {
+            "type": "department",
+            **department_item(item),
+            "direct_headcount": item.direct_headcount,
+            "subtree_headcount": item.subtree_headcount,
+        }
+
+    def _encode_cursors(self, node: dict) -> None:
+        # ключи продолжения из сервиса -> курсоры тех же эндпоинтов постраничного
+        # чтения; узел приводится к полям DepartmentTreeResponse
+        children_after = node.pop("children_after")
+        employees_after = node.pop("employees_after")
+        node["employees"] = [employee_item(e) for e in node["employees"]]
+        node["children_next_cursor"] = (
+            encode_cursor((node["id"], children_after))
+            if children_after is not None
+            else None
+        )
+        node["employees_next_cursor"] = (
+            encode_cursor((node["id"], employees_after))
+            if employees_after is not None
+            else None
+        )
+        for child in node["children"]:
+            self._encode_cursors(child)
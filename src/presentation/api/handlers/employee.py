@@ -1,10 +1,30 @@
+from typing import AsyncIterator
+
 from loguru import logger
 
 from datetime import datetime
 from domain.entities import Employee
 from domain.uow import AbstractUnitOfWork
 from domain.services.employee_service import EmployeeService
-from presentation.api.schemas import EmployeeResponse
+from presentation.api.exporting import (
+    EMPLOYEE_COLUMNS,
+    employee_row,
+    encode_rows,
+    gzip_chunks,
+)
+from presentation.api.importing import parse_rows, validate_rows
+from presentation.api.responses import TrustedJSONResponse, employee_item
+from presentation.api.schemas import (
+    EmployeeResponse,
+    EmployeeImportResponse,
+    ImportRowError,
+    BulkEmployeesRequest,
+    BulkMoveEmployeesRequest,
+    BulkSetPositionRequest,
+    BulkEmployeesResponse,
+    encode_cursor,
+    decode_cursor,
+)
 
 
 class EmployeeHandler:
@@ -35,17 +55,97 @@ class EmployeeHandler:
         )
 
         result = await self._service.create(entity)
-        logger.success("Employee created successfully: {}", result)
+        logger.success("Employee created successfully", employee=result)
         return EmployeeResponse.from_domain(result)
 
-    async def get(self, employee_id: int):
-        logger.info("Fetching employee with id={}", employee_id)
+    async def import_employees(
+        self, chunks: AsyncIterator[bytes], content_type: str
+    ) -> EmployeeImportResponse:
+        logger.info("Importing employees, content_type='{}'", content_type)
+
+        # тело разбирается и проверяется до первого запроса к БД,
+        # так что транзакция держится только на COPY и слиянии
+        valid, errors = await validate_rows(parse_rows(chunks, content_type))
+        entities = [
+            Employee.create(
+                department_id=request.department_id,
+                full_name=request.full_name,
+                position=request.position,
+                hired_at=request.hired_at.date() if request.hired_at else None,
+            )
+            for _, request in valid
+        ]
+        missing = await self._service.import_employees(entities)
+        errors.extend((valid[pos][0], "Department not found") for pos in missing)
+        errors.sort()
+
+        created = len(entities) - len(missing)
+        logger.success(
+            "Imported {} employees, {} rows rejected", created, len(errors)
+        )
+        return EmployeeImportResponse(
+            created=created,
+            errors=[ImportRowError(line=line, error=error) for line, error in errors],
+        )
+
+    async def export(
+        self,
+        fmt: str,
+        department_id: int | None = None,
+        subtree: bool = False,
+        compress: bool = False,
+    ) -> AsyncIterator[bytes]:
+        logger.info(
+            "Exporting employees format={}, department_id={}, subtree={}, gzip={}",
+            fmt,
+            department_id,
+            subtree,
+            compress,
+        )
+        items = await self._service.export(department_id, subtree)
+        chunks = encode_rows(
+            (employee_row(item) async for item in items), EMPLOYEE_COLUMNS, fmt
+        )
+        return gzip_chunks(chunks) if compress else chunks
+
+    async def get(self, employee_id: int, include_path: bool = False):
+        logger.info(
+            "Fetching employee with id={}, include_path={}", employee_id, include_path
+        )
         result = await self._service.get_by_id(employee_id)
         if result:
-            logger.success("Employee fetched successfully: {}", result)
+            logger.success("Employee fetched successfully", employee=result)
         else:
             logger.warning("Employee with id={} not found", employee_id)
-        return result
+
+        path = None
+        if include_path:
+            path = await self._service.get_department_path(result.department_id)
+        return EmployeeResponse.from_domain(result, path=path)
+
+    async def list_page(
+        self,
+        department_id: int | None = None,
+        cursor: str | None = None,
+        limit: int = 50,
+    ):
+        logger.info(
+            "Listing employees department_id={}, cursor={}, limit={}",
+            department_id,
+            cursor,
+            limit,
+        )
+        after = decode_cursor(cursor, 2) if cursor else None
+
+        employees, next_key = await self._service.list_page(department_id, after, limit)
+        logger.success("Fetched {} employees", len(employees))
+        # форма EmployeePage, без повторной валидации
+        return TrustedJSONResponse(
+            {
+                "items": [employee_item(e) for e in employees],
+                "next_cursor": encode_cursor(next_key) if next_key else None,
+            }
+        )
 
     async def update(
         self,
@@ -78,10 +178,34 @@ class EmployeeHandler:
         )
 
         result = await self._service.update(employee)
-        logger.success("Employee updated successfully: {}", result)
+        logger.success("Employee updated successfully", employee=result)
         return EmployeeResponse.from_domain(result)
 
     async def delete(self, employee_id: int):
         logger.info("Deleting employee with id={}", employee_id)
         await self._service.delete(employee_id)
         logger.success("Employee id={} deleted successfully", employee_id)
+
+    async def bulk(self, request: BulkEmployeesRequest) -> BulkEmployeesResponse:
+        logger.info("Bulk employee operation action='{}'", request.action)
+
+        if isinstance(request, BulkMoveEmployeesRequest):
+            affected = await self._service.move_many(
+                request.ids, request.department_id, request.target_department_id
+            )
+        elif isinstance(request, BulkSetPositionRequest):
+            # при повторе id побеждает последнее значение
+            affected = await self._service.set_positions(
+                {item.id: item.position for item in request.items}
+            )
+        else:
+            affected = await self._service.delete_many(
+                request.ids, request.department_id
+            )
+
+        logger.success(
+            "Bulk employee operation action='{}' affected {} employees",
+            request.action,
+            len(affected),
+        )
+        return BulkEmployeesResponse(affected_ids=affected)
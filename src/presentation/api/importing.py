@@ -0,0 +1,196 @@
+import codecs
+import csv
+import json
+from collections import deque
+from typing import AsyncIterator
+
+from pydantic import TypeAdapter, ValidationError
+
+from presentation.api.schemas import CreateEmployeeRequest
+
+CSV_COLUMNS = ("department_id", "full_name", "position", "hired_at")
+BATCH_SIZE = 1000
+
+_batch_adapter = TypeAdapter(list[CreateEmployeeRequest])
+
+
+async def read_text(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    # тело читается потоком, UTF-8 с BOM или без
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    async for chunk in chunks:
+        if text := decoder.decode(chunk):
+            yield text
+    if text := decoder.decode(b"", final=True):
+        yield text
+
+
+async def read_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, str]]:
+    # строки нумеруются с 1
+    buffer = ""
+    number = 0
+    async for text in read_text(chunks):
+        buffer += text
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            number += 1
+            yield number, line.rstrip("\r")
+
+    if buffer:
+        yield number + 1, buffer.rstrip("\r")
+
+
+class _LineQueue:
+    # источник строк для csv.reader: отдаёт накопленные строки и, когда они
+    # кончились, StopIteration — читатель при этом можно продолжать
+    def __init__(self):
+        self.lines: deque[str] = deque()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+
+async def read_csv(
+    chunks: AsyncIterator[bytes],
+) -> AsyncIterator[tuple[int, list[str] | str]]:
+    # записи CSV с номером первой строки; поле в кавычках может занимать
+    # несколько строк. Весь поток разбирает один csv.reader, очередная
+    # запись читается, когда в очереди есть её конец: строка, на которой
+    # число кавычек с начала записи чётное
+    queue = _LineQueue()
+    reader = csv.reader(queue)
+    complete = 0
+    quotes = 0
+    buffer = ""
+
+    def next_record() -> tuple[int, list[str] | str]:
+        number = reader.line_num + 1
+        try:
+            return number, next(reader)
+        except csv.Error as e:
+            return number, f"Invalid CSV: {e}"
+
+    async for text in read_text(chunks):
+        buffer += text
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            queue.lines.append(line + "\n")
+            quotes += line.count('"')
+            if quotes % 2 == 0:
+                complete += 1
+                quotes = 0
+        while complete and queue.lines:
+            complete -= 1
+            yield next_record()
+        # кавычка внутри поля без кавычек не открывает поле, поэтому счёт
+        # по кавычкам только приблизителен: записи, которые csv.reader
+        # склеил иначе, дочитываются из очереди позже или в конце
+        if not queue.lines:
+            complete = 0
+
+    if buffer:
+        queue.lines.append(buffer)
+    while queue.lines:
+        yield next_record()
+
+
+async def parse_rows(
+    chunks: AsyncIterator[bytes], content_type: str
+) -> AsyncIterator[tuple[int, dict | str]]:
+    # строка -> словарь полей или текст ошибки разбора; тип сверяется целиком,
+    # параметры вроде charset отбрасываются
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    if media_type == "text/csv":
+        header = None
+        async for number, values in read_csv(chunks):
+            if isinstance(values, str):
+                yield number, values
+                continue
+            # пустая строка или строка из одних пробелов
+            if len(values) <= 1 and not "".join(values).strip():
+                continue
+            if header is None:
+                header = [value.strip() for value in values]
+                missing = set(CSV_COLUMNS[:3]) - set(header)
+                if missing:
+                    raise ValueError(
+                        f"CSV header is missing columns: {', '.join(sorted(missing))}"
+                    )
+                continue
+            if len(values) != len(header):
+                yield number, f"Expected {len(header)} columns, got {len(values)}"
+                continue
+            row = dict(zip(header, values))
+            if not row.get("hired_at"):
+                row["hired_at"] = None
+            yield number, row
+
+    elif media_type == "application/x-ndjson":
+        async for number, line in read_lines(chunks):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                yield number, "Invalid JSON"
+                continue
+            if not isinstance(row, dict):
+                yield number, "Expected a JSON object"
+                continue
+            yield number, row
+
+    else:
+        raise ValueError(
+            "Unsupported content type, expected text/csv or application/x-ndjson"
+        )
+
+
+def _describe(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}"
+        for item in error.errors()
+    )
+
+
+def _validate_batch(
+    batch: list[tuple[int, dict]],
+    valid: list[tuple[int, CreateEmployeeRequest]],
+    errors: list[tuple[int, str]],
+) -> None:
+    # пачка целиком проверяется одним вызовом; если в ней есть ошибки,
+    # строки перепроверяются по одной, чтобы собрать годные
+    try:
+        requests = _batch_adapter.validate_python([row for _, row in batch])
+    except ValidationError:
+        for number, row in batch:
+            try:
+                valid.append((number, CreateEmployeeRequest.model_validate(row)))
+            except ValidationError as e:
+                errors.append((number, _describe(e)))
+        return
+
+    valid.extend(zip((number for number, _ in batch), requests))
+
+
+async def validate_rows(
+    rows: AsyncIterator[tuple[int, dict | str]],
+) -> tuple[list[tuple[int, CreateEmployeeRequest]], list[tuple[int, str]]]:
+    valid: list[tuple[int, CreateEmployeeRequest]] = []
+    errors: list[tuple[int, str]] = []
+    batch: list[tuple[int, dict]] = []
+
+    async for number, row in rows:
+        if isinstance(row, str):
+            errors.append((number, row))
+            continue
+        batch.append((number, row))
+        if len(batch) == BATCH_SIZE:
+            _validate_batch(batch, valid, errors)
+            batch = []
+    if batch:
+        _validate_batch(batch, valid, errors)
+    return valid, errors
@@ -1,8 +1,43 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from loguru import logger
 
+from config import settings
+from config.logging import setup_logging
+from infra.database.session import (
+    SessionFactory,
+    hierarchy_index,
+    replica_router,
+    slow_query_log,
+)
+from infra.metrics import request_metrics
+from presentation.api.middleware import (
+    LoggingContextMiddleware,
+    MetricsMiddleware,
+    QueryTimingMiddleware,
+    ReadYourWritesMiddleware,
+)
 from presentation.api.routes import routes
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    setup_logging(settings)
+    # загрузить индекс структуры подразделений до первого запроса
+    if hierarchy_index is not None:
+        async with SessionFactory() as session:
+            await hierarchy_index.refresh(session)
+        await hierarchy_index.wait()
+    yield
+    await slow_query_log.wait()
+    if hierarchy_index is not None:
+        await hierarchy_index.wait()
+    # дописать записи, оставшиеся в очереди фонового sink
+    await logger.complete()
+
+
 # ------------------------------------------------------
 # Главный FastAPI app
 # ------------------------------------------------------
@@ -13,10 +48,14 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json",
+    lifespan=lifespan,
 )
 
 app.include_router(routes[0], prefix="/api", tags=["Employee"])
 app.include_router(routes[1], prefix="/api", tags=["Department"])
+app.include_router(routes[2], prefix="/api", tags=["System"])
+# /metrics — без префикса, по умолчанию Prometheus опрашивает этот путь
+app.include_router(routes[3])
 
 
 origins = [
@@ -31,3 +70,16 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(
+    QueryTimingMiddleware,
+    default_budget=settings.query_budget,
+    budgets=settings.query_budgets,
+)
+# снаружи QueryTimingMiddleware: access-лог тоже проходит выборку по маршруту
+app.add_middleware(LoggingContextMiddleware)
+app.add_middleware(MetricsMiddleware, metrics=request_metrics)
+# без реплик или без окна привязки читать из primary незачем
+if replica_router.sticky:
+    app.add_middleware(
+        ReadYourWritesMiddleware, sticky_seconds=replica_router.sticky_seconds
+    )
@@ -0,0 +1,188 @@
+import math
+import time
+
+from loguru import logger
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import cookie_parser
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from config.logging import bind_request, reset_request
+from infra.database.instrumentation import (
+    QueryStats,
+    stop_tracking_queries,
+    track_queries,
+)
+from infra.database.routing import stop_tracking_writes, track_writes
+from infra.metrics import RequestMetrics
+
+# метка маршрута для запросов, не попавших ни в один маршрут (404)
+UNMATCHED_ROUTE = "<unmatched>"
+# время последней записи клиента: cookie для браузеров, заголовок — для
+# клиентов без cookie, они возвращают его сами
+WRITTEN_AT_COOKIE = "last_write_at"
+WRITTEN_AT_HEADER = "X-Last-Write-At"
+
+
+class LoggingContextMiddleware:
+    # делает scope запроса видимым фильтру логов (выборка по маршруту);
+    # чистый ASGI, без обёртки тела ответа, как у BaseHTTPMiddleware
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = bind_request(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            reset_request(token)
+
+
+def server_timing(stats: QueryStats, seconds: float) -> str:
+    return (
+        f'db;dur={stats.seconds * 1000:.1f};desc="{stats.count} queries", '
+        f"app;dur={seconds * 1000:.1f}"
+    )
+
+
+class QueryTimingMiddleware:
+    # число запросов к БД и время в БД на каждый HTTP-запрос: заголовок
+    # Server-Timing, строка access-лога и предупреждение, если маршрут вышел
+    # за бюджет запросов. Бюджет — по имени маршрута, иначе default_budget
+    # (0 — не проверять)
+    def __init__(
+        self,
+        app: ASGIApp,
+        default_budget: int = 0,
+        budgets: dict[str, int] | None = None,
+    ):
+        self.app = app
+        self.default_budget = default_budget
+        self.budgets = budgets or {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        stats, token = track_queries()
+        status = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                # у потоковых ответов заголовок уходит до конца выгрузки:
+                # в нём запросы до первого байта, полные числа — в логе
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    server_timing(stats, time.perf_counter() - started),
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            stop_tracking_queries(token)
+            self._report(scope, status, stats, time.perf_counter() - started)
+
+    def _report(
+        self, scope: Scope, status: int, stats: QueryStats, seconds: float
+    ) -> None:
+        logger.info(
+            "{} {} {} {:.1f} ms, {} queries, db {:.1f} ms",
+            scope["method"],
+            scope["path"],
+            status,
+            seconds * 1000,
+            stats.count,
+            stats.seconds * 1000,
+        )
+
+        name = getattr(scope.get("route"), "name", None)
+        budget = self.budgets.get(name, self.default_budget)
+        if budget and stats.count > budget:
+            logger.warning(
+                "Query budget exceeded on {} {} ({}): {} queries, budget {}",
+                scope["method"],
+                scope["path"],
+                name,
+                stats.count,
+                budget,
+            )
+
+
+class MetricsMiddleware:
+    # длительность запросов по шаблону пути маршрута и число запросов в
+    # работе; на запрос — только отметка времени и счётчики
+    def __init__(self, app: ASGIApp, metrics: RequestMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = self.metrics
+        metrics.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            metrics.in_flight -= 1
+            metrics.observe(
+                getattr(scope.get("route"), "path_format", UNMATCHED_ROUTE),
+                scope["method"],
+                time.perf_counter() - started,
+            )
+
+
+def parse_written_at(headers: Headers) -> float | None:
+    value = headers.get(WRITTEN_AT_HEADER) or cookie_parser(
+        headers.get("cookie", "")
+    ).get(WRITTEN_AT_COOKIE)
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+class ReadYourWritesMiddleware:
+    # read-your-writes между воркерами: время последней записи приходит от
+    # клиента и кладётся в отметку запроса, по ней ReplicaRouter выбирает
+    # primary. Если в запросе был commit, новое время уходит в ответ —
+    # заголовком и cookie на sticky_seconds
+    def __init__(self, app: ASGIApp, sticky_seconds: float):
+        self.app = app
+        self.sticky_seconds = sticky_seconds
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stamp, token = track_writes(parse_written_at(Headers(scope=scope)))
+
+        async def send_with_stamp(message: Message) -> None:
+            if message["type"] == "http.response.start" and stamp.wrote:
+                value = f"{stamp.written_at:.3f}"
+                headers = MutableHeaders(scope=message)
+                headers.append(WRITTEN_AT_HEADER, value)
+                headers.append(
+                    "Set-Cookie",
+                    f"{WRITTEN_AT_COOKIE}={value}; "
+                    f"Max-Age={math.ceil(self.sticky_seconds)}; Path=/; "
+                    "HttpOnly; SameSite=Lax",
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stamp)
+        finally:
+            stop_tracking_writes(token)
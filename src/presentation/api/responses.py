@@ -0,0 +1,46 @@
+from datetime import date, datetime, time
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+
+from domain.entities import Department, Employee
+
+
+# ответ из данных, которые сервер собрал сам из доменных объектов и которые
+# уже имеют форму response_model маршрута: pydantic_core.to_json пишет их
+# сразу, без повторной валидации в модели и без stdlib json. Схема OpenAPI
+# по-прежнему берётся из response_model
+class TrustedJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
+
+
+def _as_datetime(value: date | None) -> datetime | None:
+    # hired_at в схеме — datetime, дата из БД отдаётся как полночь
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.combine(value, time())
+
+
+# словари ниже повторяют поля EmployeeResponse / DepartmentResponse в том же
+# порядке; tests/test_responses.py сверяет их с моделями
+def employee_item(entity: Employee) -> dict:
+    return {
+        "id": entity.id,
+        "department_id": entity.department_id,
+        "full_name": entity.full_name,
+        "position": entity.position,
+        "hired_at": _as_datetime(entity.hired_at),
+        "created_at": entity.created_at,
+        "path": None,
+    }
+
+
+def department_item(entity: Department) -> dict:
+    return {
+        "id": entity.id,
+        "name": entity.name,
+        "parent_id": entity.parent_id,
+        "created_at": entity.created_at,
+    }
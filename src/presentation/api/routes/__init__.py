@@ -1,4 +1,6 @@
 from .employee_router import router as employee_router
 from .department_router import router as department_router
+from .system_router import router as system_router
+from .metrics_router import router as metrics_router
 
-routes = [employee_router, department_router]
+routes = [employee_router, department_router, system_router, metrics_router]
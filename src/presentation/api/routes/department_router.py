@@ -1,10 +1,30 @@
-from fastapi import APIRouter, Depends, Body, HTTPException, Path, Query, status
-from datetime import date
+from fastapi import (
+    APIRouter,
+    Depends,
+    Body,
+    HTTPException,
+    Path,
+    Query,
+    Request,
+    status,
+)
+from fastapi.responses import Response, StreamingResponse
 
-from domain.exceptions import DepartmentNotFoundError, DepartmentAlreadyExistsError
+from domain.exceptions import (
+    DepartmentNotFoundError,
+    DepartmentAlreadyExistsError,
+    DepartmentCycleError,
+)
+from presentation.api.caching import etag_matches
+from presentation.api.exporting import MEDIA_TYPES, accepts_gzip
 from presentation.api.dependencies import (
     get_department_handler,
+    get_department_reader,
+    get_department_stream_reader,
+    get_department_tree_reader,
     get_employee_handler,
+    get_employee_reader,
+    wants_tree_stream,
 )
 from presentation.api.handlers import (
     DepartmentHandler,
@@ -14,8 +34,11 @@ from presentation.api.schemas import (
     CreateDepartmentRequest,
     UpdateDepartmentRequest,
     CreateEmployeeRequest,
+    DepartmentResponse,
     DepartmentTreeResponse,
     EmployeeResponse,
+    EmployeePage,
+    DepartmentPage,
 )
 
 router = APIRouter(prefix="/departments", tags=["Departments"])
@@ -62,25 +85,157 @@ async def create_employee_in_department(
         raise HTTPException(status_code=404, detail="Department not found")
 
 
+@router.get(
+    "/export",
+    summary="Выгрузка подразделений (CSV или NDJSON, потоком)",
+    response_class=StreamingResponse,
+)
+async def export_departments(
+    request: Request,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    department_id: int | None = Query(None),
+    handler: DepartmentHandler = Depends(get_department_stream_reader),
+):
+    # department_id ограничивает выгрузку поддеревом этого подразделения
+    compress = accepts_gzip(request.headers.get("accept-encoding"))
+    try:
+        body = await handler.export(
+            fmt=format, department_id=department_id, compress=compress
+        )
+    except DepartmentNotFoundError:
+        raise HTTPException(status_code=404, detail="Department not found")
+
+    headers = {
+        "Content-Disposition": f'attachment; filename="departments.{format}"',
+        "Vary": "Accept-Encoding",
+    }
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body, media_type=MEDIA_TYPES[format], headers=headers)
+
+
+@router.get(
+    "/{department_id}/employees",
+    summary="Список сотрудников подразделения (постранично, по курсору)",
+    response_model=EmployeePage,
+)
+async def list_department_employees(
+    department_id: int = Path(...),
+    cursor: str | None = Query(None),
+    limit: int = Query(50, ge=1, le=500),
+    handler: EmployeeHandler = Depends(get_employee_reader),
+):
+    try:
+        return await handler.list_page(
+            department_id=department_id, cursor=cursor, limit=limit
+        )
+    except DepartmentNotFoundError:
+        raise HTTPException(status_code=404, detail="Department not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.get(
     "/{department_id}",
     summary="Получить подразделение с деревом и сотрудниками",
     response_model=DepartmentTreeResponse,
 )
 async def get_department_tree(
+    request: Request,
     department_id: int = Path(...),
     depth: int = Query(1, ge=1, le=5),
     include_employees: bool = Query(True),
-    handler: DepartmentHandler = Depends(get_department_handler),
+    children_limit: int | None = Query(
+        None,
+        ge=1,
+        le=1000,
+        description="Не больше стольких дочерних подразделений у узла; у обрезанного "
+        "узла будет children_next_cursor. По умолчанию без ограничения",
+    ),
+    employees_limit: int | None = Query(
+        None,
+        ge=1,
+        le=1000,
+        description="Не больше стольких сотрудников у узла; у обрезанного узла будет "
+        "employees_next_cursor. По умолчанию без ограничения",
+    ),
+    max_nodes: int | None = Query(
+        None,
+        ge=1,
+        le=10000,
+        description="Не больше стольких подразделений во всём ответе, обход по "
+        "уровням; у обрезанных узлов будет children_next_cursor. По умолчанию без "
+        "ограничения",
+    ),
+    streaming: bool = Depends(wants_tree_stream),
+    handler: DepartmentHandler = Depends(get_department_tree_reader),
 ):
+    # потоковый режим: NDJSON в прямом порядке обхода, без лимитов и без сборки
+    # дерева в памяти; включается stream=true или Accept: application/x-ndjson
+    if streaming:
+        try:
+            body = await handler.stream_tree(
+                department_id=department_id,
+                depth=depth,
+                include_employees=include_employees,
+            )
+        except DepartmentNotFoundError:
+            raise HTTPException(status_code=404, detail="Department not found")
+        return StreamingResponse(body, media_type="application/x-ndjson")
+
+    # готовое тело из кеша деревьев; совпавший If-None-Match — 304 без тела
     try:
-        return await handler.get_tree(
+        tree = await handler.get_tree_body(
             department_id=department_id,
             depth=depth,
             include_employees=include_employees,
+            children_limit=children_limit,
+            employees_limit=employees_limit,
+            max_nodes=max_nodes,
+        )
+    except DepartmentNotFoundError:
+        raise HTTPException(status_code=404, detail="Department not found")
+
+    headers = {"ETag": tree.etag}
+    if etag_matches(request.headers.get("if-none-match"), tree.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(tree.body, media_type="application/json", headers=headers)
+
+
+@router.get(
+    "/{department_id}/children",
+    summary="Дочерние подразделения (постранично, по курсору)",
+    response_model=DepartmentPage,
+)
+async def list_department_children(
+    department_id: int = Path(...),
+    cursor: str | None = Query(None),
+    limit: int = Query(100, ge=1, le=1000),
+    handler: DepartmentHandler = Depends(get_department_reader),
+):
+    try:
+        return await handler.get_children(
+            department_id=department_id, cursor=cursor, limit=limit
         )
     except DepartmentNotFoundError:
         raise HTTPException(status_code=404, detail="Department not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get(
+    "/{department_id}/ancestors",
+    summary="Получить цепочку родительских подразделений (от корня)",
+    response_model=list[DepartmentResponse],
+)
+async def get_department_ancestors(
+    department_id: int = Path(...),
+    handler: DepartmentHandler = Depends(get_department_reader),
+):
+    try:
+        return await handler.get_ancestors(department_id)
+    except DepartmentNotFoundError:
+        raise HTTPException(status_code=404, detail="Department not found")
 
 
 @router.patch(
@@ -100,6 +255,12 @@ async def update_department(
         )
     except DepartmentNotFoundError:
         raise HTTPException(status_code=404, detail="Department not found")
+    except DepartmentCycleError:
+        raise HTTPException(
+            status_code=409, detail="Department cannot be moved into its own subtree"
+        )
+    except DepartmentAlreadyExistsError:
+        raise HTTPException(status_code=409, detail="Department already exists")
 
 
 @router.delete(
@@ -121,3 +282,5 @@ async def delete_department(
         )
     except DepartmentNotFoundError:
         raise HTTPException(status_code=404, detail="Department not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
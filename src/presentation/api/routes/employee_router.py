@@ -1,11 +1,23 @@
-from fastapi import APIRouter, Depends, Body, Path
+from fastapi import APIRouter, Depends, Body, HTTPException, Path, Query, Request
+from fastapi.responses import StreamingResponse
 
-from presentation.api.dependencies import get_employee_handler
+from domain.exceptions import DepartmentNotFoundError, EmployeeNotFoundError
+
+from presentation.api.dependencies import (
+    get_employee_handler,
+    get_employee_reader,
+    get_employee_stream_reader,
+)
+from presentation.api.exporting import MEDIA_TYPES, accepts_gzip
 from presentation.api.handlers import EmployeeHandler
 from presentation.api.schemas import (
     CreateEmployeeRequest,
     UpdateEmployeeRequest,
     EmployeeResponse,
+    EmployeePage,
+    EmployeeImportResponse,
+    BulkEmployeesRequest,
+    BulkEmployeesResponse,
 )
 
 router = APIRouter(prefix="/employees", tags=["Employees"])
@@ -27,6 +39,89 @@ async def create_employee_handler(
     )
 
 
+@router.post(
+    "/import",
+    summary="Массовый импорт сотрудников (CSV или NDJSON)",
+    response_model=EmployeeImportResponse,
+)
+async def import_employees_handler(
+    request: Request,
+    handler: EmployeeHandler = Depends(get_employee_handler),
+):
+    try:
+        return await handler.import_employees(
+            request.stream(), request.headers.get("content-type", "")
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get(
+    "",
+    summary="Список сотрудников (постранично, по курсору)",
+    response_model=EmployeePage,
+)
+async def list_employees_handler(
+    cursor: str | None = Query(None),
+    limit: int = Query(50, ge=1, le=500),
+    handler: EmployeeHandler = Depends(get_employee_reader),
+):
+    try:
+        return await handler.list_page(cursor=cursor, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post(
+    "/bulk",
+    summary="Массовый перевод, смена должности или удаление сотрудников",
+    response_model=BulkEmployeesResponse,
+)
+async def bulk_employees_handler(
+    data: BulkEmployeesRequest = Body(...),
+    handler: EmployeeHandler = Depends(get_employee_handler),
+):
+    try:
+        return await handler.bulk(data)
+    except DepartmentNotFoundError:
+        raise HTTPException(status_code=404, detail="Department not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get(
+    "/export",
+    summary="Выгрузка сотрудников с названиями подразделений (CSV или NDJSON, потоком)",
+    response_class=StreamingResponse,
+)
+async def export_employees_handler(
+    request: Request,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    department_id: int | None = Query(None),
+    subtree: bool = Query(False),
+    handler: EmployeeHandler = Depends(get_employee_stream_reader),
+):
+    # сжатие gzip на лету, если клиент его принимает
+    compress = accepts_gzip(request.headers.get("accept-encoding"))
+    try:
+        body = await handler.export(
+            fmt=format,
+            department_id=department_id,
+            subtree=subtree,
+            compress=compress,
+        )
+    except DepartmentNotFoundError:
+        raise HTTPException(status_code=404, detail="Department not found")
+
+    headers = {
+        "Content-Disposition": f'attachment; filename="employees.{format}"',
+        "Vary": "Accept-Encoding",
+    }
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body, media_type=MEDIA_TYPES[format], headers=headers)
+
+
 @router.get(
     "/{employee_id}",
     summary="Получение сотрудника по ID",
@@ -34,9 +129,10 @@ async def create_employee_handler(
 )
 async def get_employee_handler_route(
     employee_id: int = Path(...),
-    handler: EmployeeHandler = Depends(get_employee_handler),
+    include_path: bool = Query(False),
+    handler: EmployeeHandler = Depends(get_employee_reader),
 ):
-    return await handler.get(employee_id)
+    return await handler.get(employee_id, include_path=include_path)
 
 
 @router.patch(
@@ -49,12 +145,17 @@ async def update_employee_handler(
     data: UpdateEmployeeRequest = Body(...),
     handler: EmployeeHandler = Depends(get_employee_handler),
 ):
-    return await handler.update(
-        employee_id=employee_id,
-        department_id=data.department_id,
-        full_name=data.full_name,
-        position=data.position,
-    )
+    try:
+        return await handler.update(
+            employee_id=employee_id,
+            department_id=data.department_id,
+            full_name=data.full_name,
+            position=data.position,
+        )
+    except EmployeeNotFoundError:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    except DepartmentNotFoundError:
+        raise HTTPException(status_code=404, detail="Department not found")
 
 
 @router.delete(
@@ -65,5 +166,8 @@ async def delete_employee_handler(
     employee_id: int = Path(...),
     handler: EmployeeHandler = Depends(get_employee_handler),
 ):
-    await handler.delete(employee_id)
+    try:
+        await handler.delete(employee_id)
+    except EmployeeNotFoundError:
+        raise HTTPException(status_code=404, detail="Employee not found")
     return {"status": "deleted"}
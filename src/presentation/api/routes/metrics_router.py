@@ -0,0 +1,28 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from infra.database.session import engine, replica_engines
+from infra.metrics import (
+    CONTENT_TYPE,
+    render_metrics,
+    request_metrics,
+    transaction_metrics,
+)
+
+router = APIRouter(tags=["System"])
+
+
+@router.get(
+    "/metrics",
+    summary="Метрики этого воркера в текстовом формате Prometheus",
+    response_class=PlainTextResponse,
+)
+async def get_metrics():
+    pools = {"primary": engine}
+    pools.update(
+        (f"replica{i}", replica) for i, replica in enumerate(replica_engines)
+    )
+    return PlainTextResponse(
+        render_metrics(request_metrics, transaction_metrics, pools),
+        media_type=CONTENT_TYPE,
+    )
@@ -0,0 +1,42 @@
+from dataclasses import asdict
+
+from fastapi import APIRouter, Depends, status
+
+from infra.database.pool import pool_metrics
+from infra.database.session import engine, replica_engines, slow_query_log
+from presentation.api.dependencies import require_admin_token
+from presentation.api.schemas import PoolsResponse, SlowQueryResponse
+
+router = APIRouter(prefix="/system", tags=["System"])
+
+
+@router.get(
+    "/pool",
+    summary="Состояние пулов соединений этого воркера",
+    response_model=PoolsResponse,
+)
+async def get_pool_metrics():
+    return PoolsResponse(
+        primary=pool_metrics(engine),
+        replicas=[pool_metrics(replica) for replica in replica_engines],
+    )
+
+
+@router.get(
+    "/slow-queries",
+    summary="Последние медленные запросы этого воркера, новые в конце",
+    response_model=list[SlowQueryResponse],
+    dependencies=[Depends(require_admin_token)],
+)
+async def get_slow_queries():
+    return [SlowQueryResponse(**asdict(entry)) for entry in slow_query_log.entries]
+
+
+@router.delete(
+    "/slow-queries",
+    summary="Очистка журнала медленных запросов",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(require_admin_token)],
+)
+async def clear_slow_queries():
+    slow_query_log.clear()
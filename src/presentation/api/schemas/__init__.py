@@ -1,7 +1,23 @@
 from .department import (
     DepartmentResponse,
     DepartmentTreeResponse,
+    DepartmentPage,
     CreateDepartmentRequest,
     UpdateDepartmentRequest,
 )
-from .employee import EmployeeResponse, CreateEmployeeRequest, UpdateEmployeeRequest
+from .employee import (
+    EmployeeResponse,
+    CreateEmployeeRequest,
+    UpdateEmployeeRequest,
+    DepartmentPathItem,
+    EmployeePage,
+    EmployeeImportResponse,
+    ImportRowError,
+    BulkEmployeesRequest,
+    BulkMoveEmployeesRequest,
+    BulkSetPositionRequest,
+    BulkDeleteEmployeesRequest,
+    BulkEmployeesResponse,
+)
+from .pagination import encode_cursor, decode_cursor
+from .system import PoolMetricsResponse, PoolsResponse, SlowQueryResponse
@@ -74,9 +74,34 @@ class DepartmentTreeResponse(BaseModel):
     id: int = Field(description="ID подразделения")
     name: str = Field(description="Название подразделения")
     parent_id: int | None = Field(description="ID родителя")
+    direct_headcount: int = Field(
+        default=0, description="Число сотрудников непосредственно в подразделении"
+    )
+    subtree_headcount: int = Field(
+        default=0, description="Число сотрудников в подразделении и всех дочерних"
+    )
     children: list["DepartmentTreeResponse"] = Field(
         default_factory=list, description="Список дочерних подразделений"
     )
     employees: list["EmployeeResponse"] = Field(
         default_factory=list, description="Сотрудники подразделения"
     )
+    children_next_cursor: str | None = Field(
+        default=None,
+        description="Курсор для GET /departments/{id}/children, если показаны не все "
+        "дочерние подразделения",
+    )
+    employees_next_cursor: str | None = Field(
+        default=None,
+        description="Курсор для GET /departments/{id}/employees, если показаны не все "
+        "сотрудники",
+    )
+
+
+class DepartmentPage(BaseModel):
+    items: list[DepartmentResponse] = Field(description="Подразделения на странице")
+
+    next_cursor: str | None = Field(
+        default=None,
+        description="Курсор следующей страницы (null — страница последняя)",
+    )
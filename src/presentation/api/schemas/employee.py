@@ -1,7 +1,18 @@
 from datetime import datetime
-from pydantic import BaseModel, Field, field_validator
+from typing import Annotated, Literal
 
-from domain.entities import Employee
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+from domain.entities import Department, Employee
+
+
+class DepartmentPathItem(BaseModel):
+    id: int = Field(description="ID подразделения")
+    name: str = Field(description="Название подразделения")
+
+    @classmethod
+    def from_domain(cls, entity: Department) -> "DepartmentPathItem":
+        return cls(id=entity.id, name=entity.name)
 
 
 class EmployeeResponse(BaseModel):
@@ -23,8 +34,16 @@ class EmployeeResponse(BaseModel):
 
     created_at: datetime = Field(description="Дата создания записи о сотруднике")
 
+    path: list[DepartmentPathItem] | None = Field(
+        default=None,
+        description="Цепочка подразделений от корня до подразделения сотрудника "
+        "(только при include_path=true)",
+    )
+
     @classmethod
-    def from_domain(cls, entity: Employee) -> "EmployeeResponse":
+    def from_domain(
+        cls, entity: Employee, path: list[Department] | None = None
+    ) -> "EmployeeResponse":
         return cls(
             id=entity.id,
             department_id=entity.department_id,
@@ -32,6 +51,11 @@ class EmployeeResponse(BaseModel):
             position=entity.position,
             hired_at=entity.hired_at,
             created_at=entity.created_at,
+            path=(
+                [DepartmentPathItem.from_domain(d) for d in path]
+                if path is not None
+                else None
+            ),
         )
 
 
@@ -89,3 +113,86 @@ class UpdateEmployeeRequest(BaseModel):
         if not value:
             raise ValueError("Field cannot be empty")
         return value
+
+
+class EmployeePage(BaseModel):
+    items: list[EmployeeResponse] = Field(description="Сотрудники на странице")
+
+    next_cursor: str | None = Field(
+        default=None,
+        description="Курсор следующей страницы (null — страница последняя)",
+    )
+
+
+class ImportRowError(BaseModel):
+    line: int = Field(description="Номер строки во входных данных (с 1)")
+
+    error: str = Field(description="Причина, по которой строка не импортирована")
+
+
+class EmployeeImportResponse(BaseModel):
+    created: int = Field(description="Число созданных сотрудников")
+
+    errors: list[ImportRowError] = Field(
+        default_factory=list, description="Строки, которые не были импортированы"
+    )
+
+
+class BulkEmployeeSelection(BaseModel):
+    ids: list[int] | None = Field(
+        default=None, max_length=10000, description="ID сотрудников"
+    )
+
+    department_id: int | None = Field(
+        default=None, description="Только сотрудники этого подразделения"
+    )
+
+    @model_validator(mode="after")
+    def validate_selection(self):
+        if self.ids is None and self.department_id is None:
+            raise ValueError("Either ids or department_id is required")
+        return self
+
+
+class BulkMoveEmployeesRequest(BulkEmployeeSelection):
+    action: Literal["move"]
+
+    target_department_id: int = Field(description="Подразделение, куда перевести")
+
+
+class EmployeePositionChange(BaseModel):
+    id: int = Field(description="ID сотрудника")
+
+    position: str = Field(
+        description="Новая должность (1–200 символов)", min_length=1, max_length=200
+    )
+
+    @field_validator("position")
+    @classmethod
+    def validate_position(cls, value: str) -> str:
+        value = value.strip()
+        if not value:
+            raise ValueError("Field cannot be empty")
+        return value
+
+
+class BulkSetPositionRequest(BaseModel):
+    action: Literal["set_position"]
+
+    items: list[EmployeePositionChange] = Field(
+        min_length=1, max_length=10000, description="Новые должности сотрудников"
+    )
+
+
+class BulkDeleteEmployeesRequest(BulkEmployeeSelection):
+    action: Literal["delete"]
+
+
+BulkEmployeesRequest = Annotated[
+    BulkMoveEmployeesRequest | BulkSetPositionRequest | BulkDeleteEmployeesRequest,
+    Field(discriminator="action"),
+]
+
+
+class BulkEmployeesResponse(BaseModel):
+    affected_ids: list[int] = Field(description="ID затронутых сотрудников")
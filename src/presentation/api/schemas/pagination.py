@@ -0,0 +1,23 @@
+import base64
+import json
+
+
+# курсор непрозрачен для клиента: base64 от ключа последней записи страницы
+def encode_cursor(key: tuple[int, ...]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode()
+
+
+def decode_cursor(cursor: str, size: int) -> tuple[int, ...]:
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, UnicodeError):
+        raise ValueError("Invalid cursor")
+
+    if (
+        not isinstance(key, list)
+        or len(key) != size
+        # ключи — id (integer), значение вне диапазона уронило бы сам запрос
+        or not all(type(value) is int and 0 <= value < 2**31 for value in key)
+    ):
+        raise ValueError("Invalid cursor")
+    return tuple(key)
@@ -0,0 +1,40 @@
+from datetime import datetime
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+
+class PoolMetricsResponse(BaseModel):
+    size: int = Field(description="Постоянный размер пула")
+    opened: int = Field(description="Открытых соединений")
+    checked_out: int = Field(description="Соединений выдано сейчас")
+    idle: int = Field(description="Свободных соединений в пуле")
+    overflow: int = Field(description="Соединений сверх size сейчас")
+
+    checkouts: int = Field(description="Всего выдач соединения")
+    timeouts: int = Field(description="Сколько раз не дождались соединения")
+    wait_seconds_total: float = Field(description="Суммарное ожидание соединения")
+    wait_seconds_max: float = Field(description="Самое долгое ожидание соединения")
+    wait_buckets: dict[str, int] = Field(
+        description="Гистограмма ожидания: верхняя граница корзины в секундах → число выдач"
+    )
+
+
+class PoolsResponse(BaseModel):
+    primary: PoolMetricsResponse
+    replicas: list[PoolMetricsResponse] = Field(
+        description="Пулы реплик в порядке postgres_replica_dsns"
+    )
+
+
+class SlowQueryResponse(BaseModel):
+    statement: str = Field(description="SQL запроса")
+    parameters: list[Any] = Field(
+        description="Параметры: строки и прочие значения заменены их типом"
+    )
+    seconds: float = Field(description="Время выполнения")
+    route: str | None = Field(description="Маршрут, выполнивший запрос")
+    recorded_at: datetime = Field(description="Когда запрос завершился")
+    plan: str | None = Field(
+        description="EXPLAIN (ANALYZE, BUFFERS); null — план не снимался или ещё не готов"
+    )
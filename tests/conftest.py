@@ -1,11 +1,15 @@
 import asyncio
 import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event, text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import NullPool
 
 from infra.database.models import Base
+from infra.database import session as app_database
 from config import settings
+from presentation.api.main import app
 
 
 @pytest.fixture(scope="session")
@@ -53,3 +57,43 @@ async def session(engine):
         await transaction.rollback()
 
         await connection.close()
+
+
+@pytest.fixture
+def statements(engine):
+    # SQL-запросы, отправленные в БД за время теста
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+
+@pytest.fixture
+async def committed(engine):
+    # для тестов, которые коммитят в БД (несколько соединений, приложение
+    # целиком): после теста таблицы очищаются
+    yield engine
+
+    async with engine.begin() as conn:
+        await conn.execute(
+            text(
+                "TRUNCATE departments, employees, department_closure, "
+                "department_hierarchy_version RESTART IDENTITY CASCADE"
+            )
+        )
+
+
+@pytest.fixture
+async def client(committed):
+    # запросы через всё приложение; пул приложения закрывается после теста:
+    # его соединения привязаны к циклу событий этого теста
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as http:
+        yield http
+
+    await app_database.engine.dispose()
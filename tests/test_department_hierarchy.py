@@ -0,0 +1,281 @@
+import fcntl
+import os
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from domain.entities import Department
+from infra.database.hierarchy import (
+    DepartmentChanges,
+    DepartmentHierarchyIndex,
+    pop_department_changes,
+)
+from infra.database.hierarchy_snapshot import (
+    HierarchySnapshot,
+    SnapshotHierarchyIndex,
+    write_snapshot,
+)
+from infra.database.repositories import DepartmentRepository
+from infra.database.uow import READ_ONLY_OPTIONS
+
+
+def build_index() -> DepartmentHierarchyIndex:
+    index = DepartmentHierarchyIndex()
+    index.load(
+        [
+            (1, "Company", None, None),
+            (2, "R&D", 1, None),
+            (3, "Sales", 1, None),
+            (4, "Platform", 2, None),
+            (5, "DB team", 4, None),
+        ],
+        version=1,
+    )
+    return index
+
+
+def test_index_structure_queries():
+    index = build_index()
+
+    assert [d.id for d in index.subtree(1, depth=2)] == [1, 2, 3]
+    assert [d.id for d in index.subtree(1, depth=5)] == [1, 2, 3, 4, 5]
+    assert [d.name for d in index.ancestors(5)] == [
+        "Company",
+        "R&D",
+        "Platform",
+        "DB team",
+    ]
+    assert index.get(42) is None
+
+
+def test_index_applies_changes_in_order():
+    index = build_index()
+
+    changes = DepartmentChanges()
+    changes.upsert(Department(id=6, name="QA", parent_id=3))
+    changes.record_version(2)
+    changes.upsert(Department(id=4, name="Platform", parent_id=3))
+    changes.record_version(3)
+    changes.delete(2)
+    changes.record_version(4)
+    index.apply(changes)
+
+    assert index.version == 4
+    assert [d.id for d in index.subtree(1, depth=5)] == [1, 3, 4, 6, 5]
+    assert index.get(2) is None
+
+
+def test_index_ignores_changes_from_unknown_base_version():
+    index = build_index()
+
+    changes = DepartmentChanges()
+    changes.upsert(Department(id=6, name="QA", parent_id=3))
+    changes.record_version(5)
+    index.apply(changes)
+
+    assert index.version == 1
+    assert index.get(6) is None
+
+
+@pytest.mark.asyncio
+async def test_repository_uses_hierarchy_index(session):
+    index = DepartmentHierarchyIndex()
+    repo = DepartmentRepository(session, index)
+    plain_repo = DepartmentRepository(session)
+
+    root = await repo.create(Department.create(name="Root", parent_id=None))
+    await session.commit()
+    index.apply(pop_department_changes(session))
+
+    # первое чтение загружает индекс из БД
+    assert [d.id for d in await repo.get_subtree(root.id, depth=5)] == [root.id]
+    loaded_version = index.version
+
+    # свои изменения применяются после commit без перечитывания
+    child = await repo.create(Department.create(name="Child", parent_id=root.id))
+    await session.commit()
+    index.apply(pop_department_changes(session))
+    assert index.version == loaded_version + 1
+    assert index.get(child.id) == child
+
+    # запись в обход индекса сдвигает версию, и индекс перечитывается
+    other = await plain_repo.create(
+        Department.create(name="Other", parent_id=root.id)
+    )
+    await session.commit()
+    subtree = await repo.get_subtree(root.id, depth=5)
+    ancestors = await repo.get_ancestors(other.id)
+    await session.commit()
+
+    assert [d.id for d in subtree] == [root.id, child.id, other.id]
+    assert [d.id for d in ancestors] == [root.id, other.id]
+    assert index.version == loaded_version + 2
+
+
+@pytest.mark.asyncio
+async def test_limited_subtree_matches_between_index_and_db(session):
+    repo = DepartmentRepository(session)
+    root = await repo.create(Department.create(name="Root", parent_id=None))
+    for i in range(3):
+        child = await repo.create(Department.create(name=f"D{i}", parent_id=root.id))
+        for j in range(3):
+            await repo.create(Department.create(name=f"T{i}.{j}", parent_id=child.id))
+    index_repo = DepartmentRepository(session, DepartmentHierarchyIndex())
+
+    from_db = await repo.get_subtree(root.id, depth=3, children_limit=2)
+    from_index = await index_repo.get_subtree(root.id, depth=3, children_limit=2)
+
+    # корень, два первых ребёнка и по два первых внука у каждого
+    assert len(from_db) == 7
+    assert from_index == from_db
+    assert await repo.get_subtree(999999, depth=3, children_limit=2) == []
+
+
+def test_snapshot_layout(tmp_path):
+    path = str(tmp_path / "hierarchy.bin")
+    write_snapshot(
+        path,
+        [
+            (5, "DB team", 4, None),
+            (1, "Company", None, None),
+            (4, "Platform", 2, None),
+            (3, "Sales", 1, None),
+            (2, "R&D", 1, None),
+        ],
+        version=7,
+    )
+
+    snapshot = HierarchySnapshot(path)
+    records = [snapshot.record(pos) for pos in range(snapshot.count)]
+    snapshot.close()
+
+    # обход в глубину: id, parent_id, depth, subtree_size
+    assert [record[:4] for record in records] == [
+        (1, -1, 0, 5),
+        (2, 1, 1, 3),
+        (4, 2, 2, 2),
+        (5, 4, 3, 1),
+        (3, 1, 1, 1),
+    ]
+
+
+def test_children_pages_match_between_indexes(tmp_path):
+    rows = [(1, "Company", None, None)] + [
+        (department_id, f"D{department_id}", 1, None) for department_id in (7, 3, 5, 2)
+    ] + [(9, "Nested", 3, None)]
+    path = str(tmp_path / "hierarchy.bin")
+    write_snapshot(path, rows, version=1)
+    snapshot_index = SnapshotHierarchyIndex(path)
+    snapshot_index._remap()
+    memory_index = DepartmentHierarchyIndex()
+    memory_index.load(rows, version=1)
+
+    for index in (memory_index, snapshot_index):
+        assert [d.id for d in index.children(1, None, 2)] == [2, 3]
+        assert [d.id for d in index.children(1, 3, 2)] == [5, 7]
+        assert [d.id for d in index.children(1, 7, None)] == []
+        assert [d.id for d in index.children(3, None, None)] == [9]
+        assert index.children(42, None, 1) == []
+
+
+def test_snapshot_subtree_reads_only_requested_levels(tmp_path):
+    # 1 -> 10 детей -> по 10 внуков у каждого
+    rows = [(1, "Company", None, None)]
+    for child in range(2, 12):
+        rows.append((child, f"D{child}", 1, None))
+        rows += [
+            (child * 100 + i, f"T{child}.{i}", child, None) for i in range(10)
+        ]
+    path = str(tmp_path / "hierarchy.bin")
+    write_snapshot(path, rows, version=1)
+    snapshot_index = SnapshotHierarchyIndex(path)
+    snapshot_index._remap()
+    memory_index = DepartmentHierarchyIndex()
+    memory_index.load(rows, version=1)
+
+    snapshot = snapshot_index._snapshot
+    read = []
+    record = snapshot.record
+    snapshot.record = lambda pos: read.append(pos) or record(pos)
+
+    for depth, size in ((1, 1), (2, 11), (3, 111)):
+        read.clear()
+        positions = snapshot_index._subtree_positions(1, depth)
+        # корень для subtree_size и по записи на каждый узел ответа: поддеревья
+        # узлов последнего уровня не читаются
+        assert len(positions) == size
+        assert len(read) == size + 1
+        assert [d.id for d in snapshot_index.subtree(1, depth)] == [
+            d.id for d in memory_index.subtree(1, depth)
+        ]
+    assert snapshot_index.subtree(1, 0) == []
+
+
+@pytest.mark.asyncio
+async def test_snapshot_index_shared_between_workers(committed, tmp_path):
+    path = str(tmp_path / "hierarchy.bin")
+    write_factory = async_sessionmaker(committed, expire_on_commit=False)
+    read_factory = async_sessionmaker(
+        committed.execution_options(**READ_ONLY_OPTIONS), expire_on_commit=False
+    )
+
+    async with write_factory() as session:
+        repo = DepartmentRepository(session)
+        root = await repo.create(Department.create(name="Root", parent_id=None))
+        child = await repo.create(Department.create(name="Child", parent_id=root.id))
+        grandchild = await repo.create(
+            Department.create(name="Grandchild", parent_id=child.id)
+        )
+        await session.commit()
+
+    first = SnapshotHierarchyIndex(path, session_factory=read_factory)
+    second = SnapshotHierarchyIndex(path, session_factory=read_factory)
+
+    async with read_factory() as session:
+        # запрос не строит снимок сам: пока идёт фоновая перестройка — в БД
+        assert await first.refresh(session) is False
+        await first.wait()
+        assert await first.refresh(session) is True
+        built = os.stat(path)
+        assert await second.refresh(session) is True
+
+    # второй воркер подхватил готовый файл, а не перестроил его
+    assert os.stat(path).st_ino == built.st_ino
+    assert [d.id for d in second.subtree(root.id, depth=2)] == [root.id, child.id]
+    assert [d.name for d in second.ancestors(grandchild.id)] == [
+        "Root",
+        "Child",
+        "Grandchild",
+    ]
+    assert second.get(child.id) == child
+
+    # после записи версия расходится: ответ из БД, снимок перестраивается в фоне
+    async with write_factory() as session:
+        await DepartmentRepository(session).change_department(
+            grandchild.id, name=None, parent_id=root.id
+        )
+        await session.commit()
+    for _ in range(2):
+        async with read_factory() as session:
+            snapshot_repo = DepartmentRepository(session, second)
+            subtree = await snapshot_repo.get_subtree(root.id, depth=2)
+        assert [d.id for d in subtree] == [root.id, child.id, grandchild.id]
+        await second.wait()
+    assert second.children(root.id, None, None)[-1].id == grandchild.id
+
+
+@pytest.mark.asyncio
+async def test_snapshot_rebuild_waits_for_other_worker(committed, tmp_path):
+    path = str(tmp_path / "hierarchy.bin")
+    read_factory = async_sessionmaker(
+        committed.execution_options(**READ_ONLY_OPTIONS), expire_on_commit=False
+    )
+    index = SnapshotHierarchyIndex(path, session_factory=read_factory)
+
+    with open(f"{path}.lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        async with read_factory() as session:
+            assert await index.refresh(session) is False
+            await index.wait()
+            assert await index.refresh(session) is False
+        assert not os.path.exists(path)
@@ -90,3 +90,379 @@ async def test_delete_reassign(session):
     updated_emp = await emp_repo.get_by_id(created_emp.id)
     await session.commit()
     assert updated_emp.department_id == target.id
+
+
+@pytest.mark.asyncio
+async def test_get_subtree(session):
+    repo = DepartmentRepository(session)
+
+    root = await repo.create(Department.create(name="Root", parent_id=None))
+    child = await repo.create(Department.create(name="Child", parent_id=root.id))
+    grandchild = await repo.create(
+        Department.create(name="Grandchild", parent_id=child.id)
+    )
+
+    two_levels = await repo.get_subtree(root.id, depth=2)
+    all_levels = await repo.get_subtree(root.id, depth=5)
+    missing = await repo.get_subtree(999999, depth=5)
+    await session.commit()
+
+    assert [d.id for d in two_levels] == [root.id, child.id]
+    assert [d.id for d in all_levels] == [root.id, child.id, grandchild.id]
+    assert missing == []
+
+
+@pytest.mark.asyncio
+async def test_get_employees_by_department_ids(session):
+    dept_repo = DepartmentRepository(session)
+    emp_repo = EmployeeRepository(session)
+
+    first = await dept_repo.create(Department.create(name="First", parent_id=None))
+    second = await dept_repo.create(Department.create(name="Second", parent_id=None))
+
+    for department in (first, second):
+        await emp_repo.create(
+            Employee.create(
+                full_name="Emp",
+                position="Dev",
+                department_id=department.id,
+                hired_at=None,
+            )
+        )
+
+    employees = await dept_repo.get_employees_by_department_ids([first.id, second.id])
+    await session.commit()
+
+    assert [e.department_id for e in employees] == [first.id, second.id]
+
+
+@pytest.mark.asyncio
+async def test_delete_nested_subtree(session):
+    dept_repo = DepartmentRepository(session)
+    emp_repo = EmployeeRepository(session)
+
+    root = await dept_repo.create(Department.create(name="Root", parent_id=None))
+    target = await dept_repo.create(Department.create(name="Target", parent_id=None))
+
+    parent_id = root.id
+    employees = []
+    for level in range(3):
+        department = await dept_repo.create(
+            Department.create(name=f"Level {level}", parent_id=parent_id)
+        )
+        employees.append(
+            await emp_repo.create(
+                Employee.create(
+                    full_name=f"Emp {level}",
+                    position="Dev",
+                    department_id=department.id,
+                    hired_at=None,
+                )
+            )
+        )
+        parent_id = department.id
+
+    await dept_repo.delete(
+        root.id,
+        mode="reassign",
+        reassign_to_department_id=target.id,
+    )
+    session.expire_all()
+
+    moved = [await emp_repo.get_by_id(e.id) for e in employees]
+    await session.commit()
+    assert await dept_repo.get_subtree(root.id, depth=5) == []
+    assert [e.department_id for e in moved] == [target.id] * 3
+
+
+@pytest.mark.asyncio
+async def test_change_department_moves_subtree(session):
+    repo = DepartmentRepository(session)
+
+    first = await repo.create(Department.create(name="First", parent_id=None))
+    second = await repo.create(Department.create(name="Second", parent_id=None))
+    child = await repo.create(Department.create(name="Child", parent_id=second.id))
+    grandchild = await repo.create(
+        Department.create(name="Grandchild", parent_id=child.id)
+    )
+
+    await repo.change_department(child.id, name=None, parent_id=first.id)
+
+    first_subtree = await repo.get_subtree(first.id, depth=5)
+    second_subtree = await repo.get_subtree(second.id, depth=5)
+    await session.commit()
+
+    assert [d.id for d in first_subtree] == [first.id, child.id, grandchild.id]
+    assert [d.id for d in second_subtree] == [second.id]
+    assert await repo.is_descendant(grandchild.id, first.id) is True
+    assert await repo.is_descendant(grandchild.id, second.id) is False
+    assert await repo.is_descendant(first.id, grandchild.id) is False
+
+
+@pytest.mark.asyncio
+async def test_update_department_to_root(session):
+    repo = DepartmentRepository(session)
+
+    parent = await repo.create(Department.create(name="Parent", parent_id=None))
+    child = await repo.create(Department.create(name="Child", parent_id=parent.id))
+
+    child.parent_id = None
+    await repo.update(child)
+
+    subtree = await repo.get_subtree(parent.id, depth=5)
+    await session.commit()
+
+    assert [d.id for d in subtree] == [parent.id]
+    assert await repo.is_descendant(child.id, parent.id) is False
+
+
+@pytest.mark.asyncio
+async def test_get_ancestors(session):
+    repo = DepartmentRepository(session)
+
+    company = await repo.create(Department.create(name="Company", parent_id=None))
+    rnd = await repo.create(Department.create(name="R&D", parent_id=company.id))
+    platform = await repo.create(Department.create(name="Platform", parent_id=rnd.id))
+
+    ancestors = await repo.get_ancestors(platform.id)
+    missing = await repo.get_ancestors(999999)
+    await session.commit()
+
+    assert [d.name for d in ancestors] == ["Company", "R&D", "Platform"]
+    assert missing == []
+
+
+async def _headcounts(repo, root_id):
+    subtree = await repo.get_subtree(root_id, depth=5)
+    return {d.name: (d.direct_headcount, d.subtree_headcount) for d in subtree}
+
+
+@pytest.mark.asyncio
+async def test_headcounts_follow_employees(session):
+    dept_repo = DepartmentRepository(session)
+    emp_repo = EmployeeRepository(session)
+
+    company = await dept_repo.create(Department.create(name="Company", parent_id=None))
+    rnd = await dept_repo.create(Department.create(name="R&D", parent_id=company.id))
+    sales = await dept_repo.create(Department.create(name="Sales", parent_id=company.id))
+
+    first = await emp_repo.create(
+        Employee.create(full_name="A", position="Dev", department_id=rnd.id, hired_at=None)
+    )
+    await emp_repo.create(
+        Employee.create(full_name="B", position="Dev", department_id=rnd.id, hired_at=None)
+    )
+    created = await _headcounts(dept_repo, company.id)
+
+    first.department_id = sales.id
+    await emp_repo.update(first)
+    moved = await _headcounts(dept_repo, company.id)
+
+    await emp_repo.delete(first.id)
+    deleted = await _headcounts(dept_repo, company.id)
+    await session.commit()
+
+    assert created == {"Company": (0, 2), "R&D": (2, 2), "Sales": (0, 0)}
+    assert moved == {"Company": (0, 2), "R&D": (1, 1), "Sales": (1, 1)}
+    assert deleted == {"Company": (0, 1), "R&D": (1, 1), "Sales": (0, 0)}
+
+
+@pytest.mark.asyncio
+async def test_headcounts_follow_structure_changes(session):
+    dept_repo = DepartmentRepository(session)
+    emp_repo = EmployeeRepository(session)
+
+    company = await dept_repo.create(Department.create(name="Company", parent_id=None))
+    rnd = await dept_repo.create(Department.create(name="R&D", parent_id=company.id))
+    team = await dept_repo.create(Department.create(name="Team", parent_id=rnd.id))
+    sales = await dept_repo.create(Department.create(name="Sales", parent_id=company.id))
+    for name in ("A", "B", "C"):
+        await emp_repo.create(
+            Employee.create(
+                full_name=name, position="Dev", department_id=team.id, hired_at=None
+            )
+        )
+
+    await dept_repo.change_department(team.id, name=None, parent_id=sales.id)
+    moved = await _headcounts(dept_repo, company.id)
+
+    await dept_repo.delete(
+        sales.id, mode="reassign", reassign_to_department_id=rnd.id
+    )
+    session.expire_all()
+    reassigned = await _headcounts(dept_repo, company.id)
+
+    await dept_repo.delete(rnd.id, mode="cascade", reassign_to_department_id=None)
+    session.expire_all()
+    deleted = await _headcounts(dept_repo, company.id)
+    await session.commit()
+
+    assert moved == {
+        "Company": (0, 3),
+        "R&D": (0, 0),
+        "Sales": (0, 3),
+        "Team": (3, 3),
+    }
+    assert reassigned == {"Company": (0, 3), "R&D": (3, 3)}
+    assert deleted == {"Company": (0, 0)}
+
+
+@pytest.mark.asyncio
+async def test_get_children_pages_and_employee_limits(session):
+    dept_repo = DepartmentRepository(session)
+    emp_repo = EmployeeRepository(session)
+
+    first = await dept_repo.create(Department.create(name="First", parent_id=None))
+    second = await dept_repo.create(Department.create(name="Second", parent_id=None))
+    children = {first.id: [], second.id: []}
+    for number, parent in enumerate((first, second, first, first, second)):
+        child = await dept_repo.create(
+            Department.create(name=f"Child {number}", parent_id=parent.id)
+        )
+        children[parent.id].append(child.id)
+    for name in ("A", "B", "C"):
+        await emp_repo.create(
+            Employee.create(
+                full_name=name, position="Dev", department_id=first.id, hired_at=None
+            )
+        )
+
+    page = await dept_repo.get_children_pages([first.id, second.id], limit=2)
+    after = await dept_repo.get_children_pages(
+        [first.id], limit=2, after_id=children[first.id][0]
+    )
+    employees = await dept_repo.get_employees_by_department_ids(
+        [first.id, second.id], limit=2
+    )
+    await session.commit()
+
+    assert [d.id for d in page] == children[first.id][:2] + children[second.id]
+    assert [d.id for d in after] == children[first.id][1:]
+    assert [e.full_name for e in employees] == ["A", "B"]
+
+
+@pytest.mark.asyncio
+async def test_stream_tree_pre_order(session):
+    dept_repo = DepartmentRepository(session)
+    emp_repo = EmployeeRepository(session)
+
+    root = await dept_repo.create(Department.create(name="Root", parent_id=None))
+    first = await dept_repo.create(Department.create(name="First", parent_id=root.id))
+    second = await dept_repo.create(Department.create(name="Second", parent_id=root.id))
+    nested = await dept_repo.create(Department.create(name="Nested", parent_id=first.id))
+    for department in (nested, root, first):
+        await emp_repo.create(
+            Employee.create(
+                full_name=department.name,
+                position="Dev",
+                department_id=department.id,
+                hired_at=None,
+            )
+        )
+
+    items = [
+        (type(item).__name__, getattr(item, "name", None) or item.full_name)
+        async for item in dept_repo.stream_tree(root.id, 5, include_employees=True)
+    ]
+    shallow = [
+        item.id async for item in dept_repo.stream_tree(root.id, 2, include_employees=False)
+    ]
+    await session.commit()
+
+    assert items == [
+        ("Department", "Root"),
+        ("Employee", "Root"),
+        ("Department", "First"),
+        ("Employee", "First"),
+        ("Department", "Nested"),
+        ("Employee", "Nested"),
+        ("Department", "Second"),
+    ]
+    assert shallow == [root.id, first.id, second.id]
+
+
+@pytest.mark.asyncio
+async def test_stream_departments(session):
+    repo = DepartmentRepository(session)
+
+    root = await repo.create(Department.create(name="Root", parent_id=None))
+    child = await repo.create(Department.create(name="Child", parent_id=root.id))
+    other = await repo.create(Department.create(name="Other", parent_id=None))
+
+    everything = [d.id async for d in repo.stream_departments(None)]
+    subtree = [d.id async for d in repo.stream_departments(root.id)]
+    await session.commit()
+
+    assert everything == [root.id, child.id, other.id]
+    assert subtree == [root.id, child.id]
+
+
+@pytest.mark.asyncio
+async def test_create_department_name_unique_per_parent(session):
+    repo = DepartmentRepository(session)
+
+    root = await repo.create(Department.create(name="Root", parent_id=None))
+    other = await repo.create(Department.create(name="Other", parent_id=None))
+    first = await repo.create(Department.create(name="Team", parent_id=root.id))
+
+    duplicate_root = await repo.create(Department.create(name="Root", parent_id=None))
+    duplicate_child = await repo.create(Department.create(name="Team", parent_id=root.id))
+    same_name_elsewhere = await repo.create(
+        Department.create(name="Team", parent_id=other.id)
+    )
+    ancestors = await repo.get_ancestors(same_name_elsewhere.id)
+    await session.commit()
+
+    assert first is not None
+    assert duplicate_root is None
+    assert duplicate_child is None
+    assert [d.id for d in ancestors] == [other.id, same_name_elsewhere.id]
+
+
+@pytest.mark.asyncio
+async def test_create_and_delete_take_one_statement(session, statements):
+    repo = DepartmentRepository(session)
+
+    company = await repo.create(Department.create(name="Company", parent_id=None))
+
+    statements.clear()
+    team = await repo.create(Department.create(name="Team", parent_id=company.id))
+    assert len(statements) == 1
+    assert team.id is not None
+    assert team.created_at is not None
+
+    statements.clear()
+    assert await repo.delete(company.id, mode="cascade", reassign_to_department_id=None)
+    assert len(statements) == 1
+    assert not await repo.delete(
+        company.id, mode="cascade", reassign_to_department_id=None
+    )
+    assert await repo.get_by_id(team.id) is None
+
+
+@pytest.mark.asyncio
+async def test_reads_do_not_load_orm_objects(session):
+    dept_repo = DepartmentRepository(session)
+    emp_repo = EmployeeRepository(session)
+
+    company = await dept_repo.create(Department.create(name="Company", parent_id=None))
+    team = await dept_repo.create(Department.create(name="Team", parent_id=company.id))
+    employee = await emp_repo.create(
+        Employee.create(
+            full_name="Eve", position="Dev", department_id=team.id, hired_at=None
+        )
+    )
+    session.expunge_all()
+
+    fetched = await dept_repo.get_by_id(team.id)
+    assert (fetched.name, fetched.parent_id, fetched.direct_headcount) == (
+        "Team",
+        company.id,
+        1,
+    )
+    children = await dept_repo.get_children_pages([company.id], limit=10)
+    assert [child.id for child in children] == [team.id]
+    assert await dept_repo.get_employees_by_department_ids([team.id]) == [employee]
+    assert await emp_repo.get_by_id(employee.id) == employee
+    assert await emp_repo.list_page(team.id, after=None, limit=10) == [employee]
+    assert len(session.identity_map) == 0
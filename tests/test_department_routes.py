@@ -0,0 +1,170 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from infra.cache import TreeCache
+from infra.database import session as app_database
+from infra.database.routing import ReplicaRouter
+from presentation.api import dependencies
+from presentation.api.main import app
+from presentation.api.schemas import encode_cursor
+
+
+async def create_department(client, name: str, parent_id: int | None = None) -> dict:
+    response = await client.post(
+        "/api/departments", json={"name": name, "parent_id": parent_id}
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+@pytest.mark.asyncio
+async def test_ancestors_and_employee_path(client):
+    company = await create_department(client, "Company")
+    rnd = await create_department(client, "R&D", company["id"])
+    platform = await create_department(client, "Platform", rnd["id"])
+
+    response = await client.get(f"/api/departments/{company['id']}/ancestors")
+    assert response.status_code == 200
+    assert [d["name"] for d in response.json()] == ["Company"]
+
+    response = await client.get(f"/api/departments/{platform['id']}/ancestors")
+    assert [d["name"] for d in response.json()] == ["Company", "R&D", "Platform"]
+
+    response = await client.get("/api/departments/999999/ancestors")
+    assert response.status_code == 404
+
+    employee = await client.post(
+        f"/api/departments/{platform['id']}/employees",
+        json={"department_id": platform["id"], "full_name": "Eve", "position": "Dev"},
+    )
+    employee_id = employee.json()["id"]
+    response = await client.get(
+        f"/api/employees/{employee_id}", params={"include_path": True}
+    )
+    assert [d["name"] for d in response.json()["path"]] == [
+        "Company",
+        "R&D",
+        "Platform",
+    ]
+    response = await client.get(f"/api/employees/{employee_id}")
+    assert response.json()["path"] is None
+
+
+@pytest.fixture
+def tree_cache(monkeypatch):
+    cache = TreeCache(max_size=10, ttl=60)
+    monkeypatch.setattr(dependencies, "tree_cache", cache)
+    return cache
+
+
+@pytest.mark.asyncio
+async def test_tree_etag_and_invalidation(client, tree_cache):
+    company = await create_department(client, "Company")
+    team = await create_department(client, "Team", company["id"])
+    url = f"/api/departments/{company['id']}"
+
+    response = await client.get(url, params={"depth": 2})
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert len(tree_cache) == 1
+
+    response = await client.get(
+        url, params={"depth": 2}, headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+    # сотрудник в дочернем подразделении меняет дерево корня
+    await client.post(
+        f"/api/departments/{team['id']}/employees",
+        json={"department_id": team["id"], "full_name": "Eve", "position": "Dev"},
+    )
+    assert len(tree_cache) == 0
+
+    response = await client.get(
+        url, params={"depth": 2}, headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    [child] = response.json()["children"]
+    assert [e["full_name"] for e in child["employees"]] == ["Eve"]
+
+
+@pytest.mark.asyncio
+async def test_tree_read_from_replica_is_not_cached(client, tree_cache, monkeypatch):
+    company = await create_department(client, "Company")
+    # «реплика» — та же БД, важно только, куда направил чтение роутер
+    router = ReplicaRouter(
+        app_database.ReadOnlySessionFactory, [app_database.ReadOnlySessionFactory]
+    )
+    monkeypatch.setattr(dependencies, "replica_router", router)
+
+    response = await client.get(f"/api/departments/{company['id']}")
+    assert response.status_code == 200
+    assert response.headers["etag"]
+    assert len(tree_cache) == 0
+
+    response = await client.get(f"/api/departments/{company['id']}?stream=true")
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert len(tree_cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_tree_releases_connection_before_response(client):
+    company = await create_department(client, "Company")
+    pool = app_database.engine.pool
+    checked_out = []
+
+    async def app_with_probe(scope, receive, send):
+        # сколько соединений занято в момент отправки заголовков ответа
+        async def probe(message):
+            if message["type"] == "http.response.start":
+                checked_out.append(pool.checkedout())
+            await send(message)
+
+        await app(scope, receive, probe)
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app_with_probe), base_url="http://test"
+    ) as http:
+        url = f"/api/departments/{company['id']}"
+        assert (await http.get(url)).status_code == 200
+        response = await http.get(url, params={"stream": True})
+        assert response.text.startswith('{"type":"department"')
+
+    assert checked_out == [0, 1]
+
+
+@pytest.mark.asyncio
+async def test_tree_cursors_and_bad_cursors(client):
+    company = await create_department(client, "Company")
+    other = await create_department(client, "Other")
+    for name in ("A", "B", "C"):
+        await create_department(client, name, company["id"])
+
+    tree = (
+        await client.get(
+            f"/api/departments/{company['id']}",
+            params={"depth": 2, "children_limit": 2},
+        )
+    ).json()
+    cursor = tree["children_next_cursor"]
+    response = await client.get(
+        f"/api/departments/{company['id']}/children", params={"cursor": cursor}
+    )
+    assert response.status_code == 200
+    assert [d["name"] for d in response.json()["items"]] == ["C"]
+
+    # курсор чужого подразделения, мусор и курсор другой длины — 400, не 500
+    for department_id, bad in (
+        (other["id"], cursor),
+        (company["id"], "not-a-cursor"),
+        (company["id"], "WzJd"),
+        (company["id"], encode_cursor((company["id"], 2**31))),
+    ):
+        for endpoint in ("children", "employees"):
+            response = await client.get(
+                f"/api/departments/{department_id}/{endpoint}", params={"cursor": bad}
+            )
+            assert response.status_code == 400, (endpoint, bad, response.text)
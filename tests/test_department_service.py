@@ -0,0 +1,156 @@
+from types import SimpleNamespace
+
+import pytest
+
+from domain.entities import Department, Employee
+from domain.services.department_service import DepartmentService
+from domain.services.employee_service import EmployeeService
+from infra.database.repositories import DepartmentRepository, EmployeeRepository
+
+
+@pytest.fixture
+def uow(session):
+    return SimpleNamespace(
+        department_repo=DepartmentRepository(session),
+        employee_repo=EmployeeRepository(session),
+    )
+
+
+async def build_wide_tree(uow, children=5, grandchildren=3, employees=7):
+    repo = uow.department_repo
+    root = await repo.create(Department.create(name="Company", parent_id=None))
+    for i in range(children):
+        child = await repo.create(
+            Department.create(name=f"Dept {i}", parent_id=root.id)
+        )
+        for j in range(grandchildren):
+            await repo.create(
+                Department.create(name=f"Team {i}.{j}", parent_id=child.id)
+            )
+    for i in range(employees):
+        await uow.employee_repo.create(
+            Employee.create(
+                full_name=f"Employee {i}",
+                position="Dev",
+                department_id=root.id,
+                hired_at=None,
+            )
+        )
+    return root
+
+
+def count_nodes(node: dict) -> int:
+    return 1 + sum(count_nodes(child) for child in node["children"])
+
+
+async def page_children(service, node: dict, limit: int) -> list[int]:
+    # показанные в дереве дети и все следующие страницы по ключу продолжения
+    ids = [child["id"] for child in node["children"]]
+    after = node["children_after"]
+    key = (node["id"], after) if after is not None else None
+    while key is not None:
+        page, key = await service.get_children_page(node["id"], key, limit)
+        ids += [d.id for d in page]
+    return ids
+
+
+async def page_employees(service, node: dict, limit: int) -> list[int]:
+    ids = [e.id for e in node["employees"]]
+    after = node["employees_after"]
+    key = (node["id"], after) if after is not None else None
+    while key is not None:
+        page, key = await service.list_page(node["id"], key, limit)
+        ids += [e.id for e in page]
+    return ids
+
+
+@pytest.mark.asyncio
+async def test_tree_cursors_page_without_gaps(session, uow):
+    root = await build_wide_tree(uow)
+    departments = DepartmentService(uow)
+    employees = EmployeeService(uow)
+
+    tree = await departments.get_tree(
+        root.id, depth=3, children_limit=2, employees_limit=3
+    )
+    expected_children = [
+        d.id for d in await uow.department_repo.get_children_pages([root.id], None)
+    ]
+    expected_employees = [
+        e.id for e in await uow.employee_repo.list_page(root.id, None, 100)
+    ]
+
+    assert [child["id"] for child in tree["children"]] == expected_children[:2]
+    assert len(tree["employees"]) == 3
+    assert await page_children(departments, tree, 2) == expected_children
+    assert await page_employees(employees, tree, 3) == expected_employees
+    # у каждого показанного ребёнка тоже дочитываются все внуки
+    for child in tree["children"]:
+        assert len(await page_children(departments, child, 2)) == 3
+
+
+@pytest.mark.asyncio
+async def test_tree_is_truncated_by_node_budget(session, uow):
+    root = await build_wide_tree(uow)
+    service = DepartmentService(uow)
+
+    tree = await service.get_tree(
+        root.id, depth=3, include_employees=False, max_nodes=4
+    )
+
+    assert count_nodes(tree) == 4
+    assert len(tree["children"]) == 3
+    assert tree["children_after"] == tree["children"][-1]["id"]
+    # внукам бюджета не осталось: ключ 0 — читать детей с начала
+    for child in tree["children"]:
+        assert child["children"] == [] and child["children_after"] == 0
+    assert len(await page_children(service, tree, 10)) == 5
+    assert len(await page_children(service, tree["children"][0], 10)) == 3
+
+
+@pytest.mark.asyncio
+async def test_foreign_cursor_is_rejected(session, uow):
+    root = await build_wide_tree(uow, children=2, grandchildren=0, employees=2)
+    other = await uow.department_repo.create(
+        Department.create(name="Other", parent_id=None)
+    )
+    departments = DepartmentService(uow)
+    employees = EmployeeService(uow)
+
+    with pytest.raises(ValueError):
+        await departments.get_children_page(other.id, (root.id, 0), 10)
+    with pytest.raises(ValueError):
+        await employees.list_page(other.id, (root.id, 0), 10)
+    # без фильтра по подразделению ключ — просто позиция в общем списке
+    page, _ = await employees.list_page(None, (root.id, 0), 10)
+    assert len(page) == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "limits", [{}, {"children_limit": 2, "employees_limit": 1, "max_nodes": 20}]
+)
+async def test_tree_query_count_is_fixed(session, uow, statements, limits):
+    # 3 ребёнка у каждого узла, 5 уровней: 121 подразделение
+    repo = uow.department_repo
+    root = await repo.create(Department.create(name="Company", parent_id=None))
+    level = [root]
+    for _ in range(4):
+        level = [
+            await repo.create(
+                Department.create(name=f"{parent.name}.{i}", parent_id=parent.id)
+            )
+            for parent in level
+            for i in range(3)
+        ]
+    service = DepartmentService(uow)
+
+    counts = {}
+    for depth in (1, 5):
+        statements.clear()
+        tree = await service.get_tree(root.id, depth=depth, **limits)
+        counts[depth] = len(statements)
+
+    assert count_nodes(tree) == (20 if limits else 121)
+    # подразделения одним запросом и сотрудники одним, на любой глубине
+    assert counts[5] == counts[1] == 2
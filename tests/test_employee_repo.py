@@ -1,7 +1,12 @@
+import asyncio
+
 import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from infra.database.repositories import EmployeeRepository, DepartmentRepository
+from infra.database.repositories import employee_repo
 from domain.entities import Employee, Department
+from domain.exceptions import DepartmentNotFoundError
 
 
 @pytest.mark.asyncio
@@ -118,3 +123,357 @@ async def test_delete_employee(session):
     await emp_repo.delete(employee.id)
     await session.commit()
     assert await emp_repo.get_by_id(employee.id) is None
+
+
+@pytest.mark.asyncio
+async def test_list_page_keyset(session):
+    dept_repo = DepartmentRepository(session)
+    emp_repo = EmployeeRepository(session)
+
+    first = await dept_repo.create(Department.create(name="First", parent_id=None))
+    second = await dept_repo.create(Department.create(name="Second", parent_id=None))
+    created = []
+    for department in (second, first, second, first, second):
+        created.append(
+            await emp_repo.create(
+                Employee.create(
+                    full_name="E",
+                    position="Dev",
+                    department_id=department.id,
+                    hired_at=None,
+                )
+            )
+        )
+    expected = sorted((e.department_id, e.id) for e in created)
+
+    pages = []
+    after = None
+    while True:
+        page = await emp_repo.list_page(None, after, limit=2)
+        if not page:
+            break
+        pages.append([(e.department_id, e.id) for e in page])
+        after = pages[-1][-1]
+
+    in_second = await emp_repo.list_page(second.id, (second.id, expected[2][1]), 5)
+    await session.commit()
+
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert sum(pages, []) == expected
+    assert [(e.department_id, e.id) for e in in_second] == expected[3:]
+
+
+@pytest.mark.asyncio
+async def test_bulk_create(session):
+    dept_repo = DepartmentRepository(session)
+    emp_repo = EmployeeRepository(session)
+
+    root = await dept_repo.create(Department.create(name="Root", parent_id=None))
+    child = await dept_repo.create(Department.create(name="Child", parent_id=root.id))
+
+    missing = await emp_repo.bulk_create(
+        [
+            Employee.create(
+                full_name="A", position="Dev", department_id=child.id, hired_at=None
+            ),
+            Employee.create(
+                full_name="B", position="Dev", department_id=999999, hired_at=None
+            ),
+            Employee.create(
+                full_name="C", position="Dev", department_id=root.id, hired_at=None
+            ),
+        ]
+    )
+    listed = await emp_repo.list_page(None, None, 10)
+    subtree = await dept_repo.get_subtree(root.id, depth=2)
+    await session.commit()
+
+    assert missing == [1]
+    assert sorted(e.full_name for e in listed) == ["A", "C"]
+    assert [(d.direct_headcount, d.subtree_headcount) for d in subtree] == [
+        (1, 2),
+        (1, 1),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_copies_in_batches(session, monkeypatch):
+    monkeypatch.setattr(employee_repo, "COPY_BATCH_SIZE", 2)
+    dept_repo = DepartmentRepository(session)
+    emp_repo = EmployeeRepository(session)
+
+    root = await dept_repo.create(Department.create(name="Root", parent_id=None))
+    department_ids = [root.id, 999999, root.id, root.id, 999999]
+    missing = await emp_repo.bulk_create(
+        [
+            Employee.create(
+                full_name=f"E{pos}",
+                position="Dev",
+                department_id=department_id,
+                hired_at=None,
+            )
+            for pos, department_id in enumerate(department_ids)
+        ]
+    )
+    listed = await emp_repo.list_page(None, None, 10)
+    await session.commit()
+
+    # позиции сквозные через все пачки COPY
+    assert missing == [1, 4]
+    assert [e.full_name for e in listed] == ["E0", "E2", "E3"]
+
+
+@pytest.mark.asyncio
+async def test_stream_with_department_names(session):
+    dept_repo = DepartmentRepository(session)
+    emp_repo = EmployeeRepository(session)
+
+    root = await dept_repo.create(Department.create(name="Root", parent_id=None))
+    child = await dept_repo.create(Department.create(name="Child", parent_id=root.id))
+    other = await dept_repo.create(Department.create(name="Other", parent_id=None))
+    for department in (child, other, root):
+        await emp_repo.create(
+            Employee.create(
+                full_name=department.name,
+                position="Dev",
+                department_id=department.id,
+                hired_at=None,
+            )
+        )
+
+    async def export(department_id, subtree):
+        return [
+            (employee.full_name, department_name)
+            async for employee, department_name in emp_repo.stream_with_department_names(
+                department_id, subtree
+            )
+        ]
+
+    everyone = await export(None, False)
+    direct = await export(root.id, False)
+    subtree = await export(root.id, True)
+    await session.commit()
+
+    assert everyone == [("Root", "Root"), ("Child", "Child"), ("Other", "Other")]
+    assert direct == [("Root", "Root")]
+    assert subtree == [("Root", "Root"), ("Child", "Child")]
+
+
+@pytest.mark.asyncio
+async def test_bulk_move_position_and_delete(session):
+    dept_repo = DepartmentRepository(session)
+    emp_repo = EmployeeRepository(session)
+
+    root = await dept_repo.create(Department.create(name="Root", parent_id=None))
+    first = await dept_repo.create(Department.create(name="First", parent_id=root.id))
+    second = await dept_repo.create(Department.create(name="Second", parent_id=root.id))
+    ids = []
+    for department in (first, first, second, root):
+        employee = await emp_repo.create(
+            Employee.create(
+                full_name="E", position="Dev", department_id=department.id, hired_at=None
+            )
+        )
+        ids.append(employee.id)
+
+    async def headcounts():
+        subtree = await dept_repo.get_subtree(root.id, depth=2)
+        return [(d.direct_headcount, d.subtree_headcount) for d in subtree]
+
+    moved = await emp_repo.move_many(ids[:3], None, second.id)
+    after_move = await headcounts()
+    repositioned = await emp_repo.set_positions({ids[0]: "Lead", 999999: "Ghost"})
+    session.expire_all()
+    lead = await emp_repo.get_by_id(ids[0])
+    deleted = await emp_repo.delete_many(None, second.id)
+    after_delete = await headcounts()
+    await session.commit()
+
+    assert moved == ids[:2]
+    assert after_move == [(1, 4), (0, 0), (3, 3)]
+    assert repositioned == [ids[0]]
+    assert lead.position == "Lead"
+    assert deleted == ids[:3]
+    assert after_delete == [(1, 1), (0, 0), (0, 0)]
+
+
+@pytest.mark.asyncio
+async def test_writes_take_one_statement(session, statements):
+    dept_repo = DepartmentRepository(session)
+    emp_repo = EmployeeRepository(session)
+
+    company = await dept_repo.create(Department.create(name="Company", parent_id=None))
+    team = await dept_repo.create(Department.create(name="Team", parent_id=company.id))
+
+    statements.clear()
+    employee = await emp_repo.create(
+        Employee.create(
+            full_name=" Eve ", position="Dev", department_id=team.id, hired_at=None
+        )
+    )
+    assert len(statements) == 1
+    assert employee.id is not None
+    assert employee.full_name == "Eve"
+    assert employee.created_at is not None
+
+    statements.clear()
+    employee.department_id = company.id
+    updated = await emp_repo.update(employee)
+    assert len(statements) == 1
+    assert updated.department_id == company.id
+
+    statements.clear()
+    assert await emp_repo.delete(employee.id) is True
+    assert len(statements) == 1
+    assert await emp_repo.delete(employee.id) is False
+
+    subtree = await dept_repo.get_subtree(company.id, depth=2)
+    assert {d.name: d.subtree_headcount for d in subtree} == {"Company": 0, "Team": 0}
+
+
+@pytest.mark.asyncio
+async def test_write_to_missing_department(session):
+    dept_repo = DepartmentRepository(session)
+    emp_repo = EmployeeRepository(session)
+
+    department = await dept_repo.create(Department.create(name="Ops", parent_id=None))
+    employee = await emp_repo.create(
+        Employee.create(
+            full_name="Frank", position="Ops", department_id=department.id, hired_at=None
+        )
+    )
+
+    with pytest.raises(DepartmentNotFoundError):
+        async with session.begin_nested():
+            await emp_repo.create(
+                Employee.create(
+                    full_name="Grace", position="Ops", department_id=-1, hired_at=None
+                )
+            )
+
+    employee.department_id = -1
+    with pytest.raises(DepartmentNotFoundError):
+        async with session.begin_nested():
+            await emp_repo.update(employee)
+
+
+async def concurrent_moves(engine, first_move, second_move) -> list[int]:
+    # два перевода одного сотрудника в разных транзакциях: второй ждёт
+    # блокировку строки, пока первый не закоммитит. Возвращает прямые
+    # счётчики трёх подразделений после обоих переводов
+    async with AsyncSession(engine, expire_on_commit=False) as setup:
+        dept_repo = DepartmentRepository(setup)
+        departments = [
+            await dept_repo.create(Department.create(name=name, parent_id=None))
+            for name in ("A", "B", "C")
+        ]
+        employee = await EmployeeRepository(setup).create(
+            Employee.create(
+                full_name="Eve",
+                position="Dev",
+                department_id=departments[0].id,
+                hired_at=None,
+            )
+        )
+        await setup.commit()
+
+    first = AsyncSession(engine)
+    second = AsyncSession(engine)
+    try:
+        await first_move(EmployeeRepository(first), employee, departments[1].id)
+        moving = asyncio.create_task(
+            second_move(EmployeeRepository(second), employee, departments[2].id)
+        )
+        await asyncio.sleep(0.2)
+        assert not moving.done()
+        await first.commit()
+        await moving
+        await second.commit()
+    finally:
+        await first.close()
+        await second.close()
+
+    async with AsyncSession(engine) as check:
+        dept_repo = DepartmentRepository(check)
+        return [
+            (await dept_repo.get_by_id(department.id)).direct_headcount
+            for department in departments
+        ]
+
+
+async def update_move(repo, employee, department_id):
+    await repo.update(
+        Employee(employee.id, department_id, employee.full_name, employee.position)
+    )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_updates_keep_headcounts(committed):
+    # второй перевод списывает сотрудника из B, куда его перевёл первый,
+    # а не из A, где он был до блокировки
+    assert await concurrent_moves(committed, update_move, update_move) == [0, 0, 1]
+
+
+async def bulk_move(repo, employee, department_id):
+    await repo.move_many([employee.id], None, department_id)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_bulk_moves_keep_headcounts(committed):
+    assert await concurrent_moves(committed, bulk_move, bulk_move) == [0, 0, 1]
+
+
+@pytest.mark.asyncio
+async def test_move_many_to_missing_department(session):
+    dept_repo = DepartmentRepository(session)
+    emp_repo = EmployeeRepository(session)
+    department = await dept_repo.create(Department.create(name="A", parent_id=None))
+    employee = await emp_repo.create(
+        Employee.create(
+            full_name="Eve", position="Dev", department_id=department.id, hired_at=None
+        )
+    )
+
+    # подразделение удалили между проверкой в сервисе и UPDATE
+    with pytest.raises(DepartmentNotFoundError):
+        await emp_repo.move_many([employee.id], None, 999999)
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_races_department_delete(committed):
+    async with AsyncSession(committed, expire_on_commit=False) as setup:
+        dept_repo = DepartmentRepository(setup)
+        kept = await dept_repo.create(Department.create(name="A", parent_id=None))
+        doomed = await dept_repo.create(Department.create(name="B", parent_id=None))
+        await setup.commit()
+
+    deleting = AsyncSession(committed)
+    importing = AsyncSession(committed)
+    try:
+        await DepartmentRepository(deleting).delete(doomed.id, "cascade", None)
+        # импорт видит подразделение в своём снимке и ждёт удаления
+        creating = asyncio.create_task(
+            EmployeeRepository(importing).bulk_create(
+                [
+                    Employee.create(
+                        full_name=name,
+                        position="Dev",
+                        department_id=department.id,
+                        hired_at=None,
+                    )
+                    for name, department in (("Ann", kept), ("Bob", doomed))
+                ]
+            )
+        )
+        await asyncio.sleep(0.2)
+        assert not creating.done()
+        await deleting.commit()
+        assert await creating == [1]
+        await importing.commit()
+    finally:
+        await deleting.close()
+        await importing.close()
+
+    async with AsyncSession(committed) as check:
+        department = await DepartmentRepository(check).get_by_id(kept.id)
+        assert department.direct_headcount == 1
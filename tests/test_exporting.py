@@ -0,0 +1,141 @@
+import csv
+import io
+import json
+
+import pytest
+
+from presentation.api.exporting import accepts_gzip
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        (None, False),
+        ("", False),
+        ("gzip", True),
+        ("GZIP; q=0.5", True),
+        ("x-gzip", True),
+        ("gzip;q=0", False),
+        ("gzip; q=0.000", False),
+        ("br, gzip;q=0.001", True),
+        ("deflate, br", False),
+        ("deflate, *", True),
+        ("*;q=0", False),
+        # явно названная кодировка важнее "*"
+        ("gzip;q=0, *", False),
+        ("identity", False),
+        ("gzip;q=abc", False),
+    ],
+)
+def test_accepts_gzip(accept_encoding, expected):
+    assert accepts_gzip(accept_encoding) is expected
+
+
+@pytest.fixture
+async def company(client):
+    # Company -> Team и отдельный Other, по сотруднику в каждом
+    async def department(name, parent_id=None):
+        response = await client.post(
+            "/api/departments", json={"name": name, "parent_id": parent_id}
+        )
+        return response.json()["id"]
+
+    async def employee(department_id, full_name):
+        await client.post(
+            f"/api/departments/{department_id}/employees",
+            json={
+                "department_id": department_id,
+                "full_name": full_name,
+                "position": "Dev",
+                "hired_at": "2024-01-15T00:00:00",
+            },
+        )
+
+    ids = {"Company": await department("Company")}
+    ids["Team"] = await department("Team", ids["Company"])
+    ids["Other"] = await department("Other")
+    for name, department_id in ids.items():
+        await employee(department_id, f"{name} employee")
+    return ids
+
+
+async def export(client, path, accept_encoding="identity", **params):
+    response = await client.get(
+        path, params=params, headers={"accept-encoding": accept_encoding}
+    )
+    assert response.status_code == 200, response.text
+    return response
+
+
+@pytest.mark.asyncio
+async def test_employee_export(client, company):
+    response = await export(client, "/api/employees/export")
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["full_name"] for row in rows] == [
+        "Company employee",
+        "Team employee",
+        "Other employee",
+    ]
+    assert rows[1]["department_name"] == "Team"
+    assert rows[1]["hired_at"] == "2024-01-15"
+
+    response = await export(
+        client,
+        "/api/employees/export",
+        format="ndjson",
+        department_id=company["Company"],
+    )
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    items = [json.loads(line) for line in response.text.splitlines()]
+    assert [item["full_name"] for item in items] == ["Company employee"]
+
+    response = await export(
+        client,
+        "/api/employees/export",
+        format="ndjson",
+        department_id=company["Company"],
+        subtree=True,
+    )
+    items = [json.loads(line) for line in response.text.splitlines()]
+    assert [item["department_name"] for item in items] == ["Company", "Team"]
+
+    response = await client.get(
+        "/api/employees/export", params={"department_id": 999999}
+    )
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_department_export(client, company):
+    response = await export(client, "/api/departments/export")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["name"] for row in rows] == ["Company", "Team", "Other"]
+    assert rows[0]["subtree_headcount"] == "2"
+
+    response = await export(
+        client,
+        "/api/departments/export",
+        format="ndjson",
+        department_id=company["Company"],
+    )
+    items = [json.loads(line) for line in response.text.splitlines()]
+    assert [item["name"] for item in items] == ["Company", "Team"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path", ["/api/employees/export", "/api/departments/export"])
+async def test_export_gzip_negotiation(client, company, path):
+    plain = await export(client, path)
+
+    for accept_encoding in ("gzip", "x-gzip", "br;q=1, gzip;q=0.5"):
+        response = await export(client, path, accept_encoding)
+        assert response.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["vary"]
+        # httpx распаковывает тело сам
+        assert response.text == plain.text
+
+    for accept_encoding in ("gzip;q=0", "identity", "deflate, br"):
+        response = await export(client, path, accept_encoding)
+        assert "content-encoding" not in response.headers
+        assert response.text == plain.text
@@ -0,0 +1,131 @@
+import pytest
+
+from presentation.api.importing import parse_rows
+
+
+async def byte_chunks(data: bytes):
+    # по байту за раз: границы чанков приходятся на середину строк, полей и
+    # многобайтных символов
+    for pos in range(len(data)):
+        yield data[pos : pos + 1]
+
+
+async def collect(data: bytes, content_type: str) -> list:
+    return [row async for row in parse_rows(byte_chunks(data), content_type)]
+
+
+@pytest.mark.asyncio
+async def test_csv_fields_may_span_lines():
+    data = (
+        "﻿department_id,full_name,position\r\n"
+        '1,"Иванов, Иван","Ведущий\r\nинженер"\r\n'
+        "\r\n"
+        '2,"Anna ""Ann"" Lee",QA\r\n'
+        "3,Bob"
+    ).encode()
+
+    assert await collect(data, "text/csv") == [
+        (
+            2,
+            {
+                "department_id": "1",
+                "full_name": "Иванов, Иван",
+                "position": "Ведущий\r\nинженер",
+                "hired_at": None,
+            },
+        ),
+        (
+            5,
+            {
+                "department_id": "2",
+                "full_name": 'Anna "Ann" Lee',
+                "position": "QA",
+                "hired_at": None,
+            },
+        ),
+        (6, "Expected 3 columns, got 2"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_csv_unclosed_quote_runs_to_the_end():
+    data = b'department_id,full_name,position\n1,"Eve,Dev\n2,Bob,QA\n'
+
+    # незакрытая кавычка забирает остаток файла в одно поле
+    assert await collect(data, "text/csv") == [(2, "Expected 3 columns, got 2")]
+
+
+@pytest.mark.asyncio
+async def test_content_type_is_matched_exactly():
+    data = b'{"department_id": 1, "full_name": "Ann", "position": "Dev"}\n'
+
+    assert len(await collect(data, "Application/X-NDJSON; charset=utf-8")) == 1
+    for content_type in ("application/json", "text/plain; note=csv"):
+        with pytest.raises(ValueError):
+            await collect(data, content_type)
+
+
+async def post_import(client, body: str, content_type: str):
+    response = await client.post(
+        "/api/employees/import",
+        content=body.encode(),
+        headers={"content-type": content_type},
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+@pytest.mark.asyncio
+async def test_import_reports_row_errors_with_line_numbers(client):
+    response = await client.post(
+        "/api/departments", json={"name": "Company", "parent_id": None}
+    )
+    department_id = response.json()["id"]
+
+    result = await post_import(
+        client,
+        "department_id,full_name,position,hired_at\n"
+        f"{department_id},Ann,Dev,2024-01-15\n"
+        f'{department_id},Bob,"Senior\nDev",\n'
+        "999999,Eve,Dev,\n"
+        f"{department_id}, ,Dev,\n"
+        f"{department_id},Kim,Dev,not-a-date\n"
+        f"{department_id},Lee\n"
+        f"{department_id},Max,QA,\n",
+        "text/csv",
+    )
+
+    errors = {error["line"]: error["error"] for error in result["errors"]}
+    assert result["created"] == 3
+    assert sorted(errors) == [5, 6, 7, 8]
+    assert errors[5] == "Department not found"
+    assert "full_name" in errors[6]
+    assert "hired_at" in errors[7]
+    assert errors[8] == "Expected 4 columns, got 2"
+
+    response = await client.get(f"/api/departments/{department_id}/employees")
+    employees = {e["full_name"]: e for e in response.json()["items"]}
+    assert sorted(employees) == ["Ann", "Bob", "Max"]
+    assert employees["Bob"]["position"] == "Senior\nDev"
+
+
+@pytest.mark.asyncio
+async def test_import_ndjson_line_numbers(client):
+    response = await client.post(
+        "/api/departments", json={"name": "Company", "parent_id": None}
+    )
+    department_id = response.json()["id"]
+
+    result = await post_import(
+        client,
+        f'{{"department_id": {department_id}, "full_name": "Ann", "position": "Dev"}}\n'
+        "\n"
+        "{broken\n"
+        "[1, 2]\n"
+        f'{{"department_id": {department_id}, "full_name": "", "position": "Dev"}}\n',
+        "application/x-ndjson",
+    )
+
+    assert result["created"] == 1
+    assert [error["line"] for error in result["errors"]] == [3, 4, 5]
+    assert result["errors"][0]["error"] == "Invalid JSON"
@@ -0,0 +1,70 @@
+import pytest
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from config import settings
+from infra.database.instrumentation import (
+    current_query_stats,
+    instrument,
+    stop_tracking_queries,
+    track_queries,
+)
+from presentation.api.middleware import QueryTimingMiddleware
+
+
+@pytest.fixture
+async def instrumented_engine():
+    engine = instrument(create_async_engine(settings.postgres_dsn, poolclass=NullPool))
+    yield engine
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_queries_are_counted_per_context(instrumented_engine):
+    async with instrumented_engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+        stats, token = track_queries()
+        try:
+            await conn.execute(text("SELECT 1"))
+            await conn.execute(text("SELECT pg_sleep(0.01)"))
+            with pytest.raises(DBAPIError):
+                await conn.execute(text("SELECT * FROM missing_table"))
+        finally:
+            stop_tracking_queries(token)
+
+    assert current_query_stats() is None
+    assert stats.count == 3
+    assert stats.seconds >= 0.01
+
+
+@pytest.mark.asyncio
+async def test_middleware_reports_server_timing_and_budget(instrumented_engine):
+    async def app(scope, receive, send):
+        async with instrumented_engine.connect() as conn:
+            for _ in range(3):
+                await conn.execute(text("SELECT 1"))
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    warnings = []
+    handler_id = logger.add(warnings.append, level="WARNING", format="{message}")
+    try:
+        middleware = QueryTimingMiddleware(app, default_budget=2)
+        scope = {"type": "http", "method": "GET", "path": "/x", "headers": []}
+        await middleware(scope, None, send)
+    finally:
+        logger.remove(handler_id)
+
+    headers = dict(messages[0]["headers"])
+    assert headers[b"server-timing"].startswith(b"db;dur=")
+    assert b'desc="3 queries"' in headers[b"server-timing"]
+    assert len(warnings) == 1 and "3 queries, budget 2" in warnings[0]
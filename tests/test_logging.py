@@ -0,0 +1,77 @@
+from types import SimpleNamespace
+
+import pytest
+from loguru import logger
+
+from config.logging import RouteSampler, bind_request, format_record, reset_request
+
+
+class Payload:
+    # считает, сколько раз объект превращали в строку
+    formatted = 0
+
+    def __repr__(self) -> str:
+        Payload.formatted += 1
+        return "Payload()"
+
+
+@pytest.fixture
+def records():
+    lines = []
+    handler_id = logger.add(
+        lines.append,
+        format=format_record,
+        filter=RouteSampler(1.0, {"quiet": 0.0}),
+    )
+    yield lines
+    logger.remove(handler_id)
+
+
+def request_to(route: str) -> dict:
+    return {"type": "http", "route": SimpleNamespace(name=route)}
+
+
+def test_sampled_out_route_keeps_warnings(records):
+    token = bind_request(request_to("quiet"))
+    try:
+        logger.info("dropped")
+        logger.warning("kept")
+    finally:
+        reset_request(token)
+
+    logger.info("outside request")
+    assert [line.record["message"] for line in records] == ["kept", "outside request"]
+
+
+def test_each_sink_samples_on_its_own(records):
+    lines = []
+    handler_id = logger.add(lines.append, filter=RouteSampler(1.0, {}))
+    token = bind_request(request_to("quiet"))
+    try:
+        logger.info("only for the second sink")
+    finally:
+        reset_request(token)
+        logger.remove(handler_id)
+
+    assert records == []
+    assert len(lines) == 1
+
+
+def test_payload_is_formatted_only_when_emitted(records):
+    Payload.formatted = 0
+
+    token = bind_request(request_to("quiet"))
+    try:
+        logger.success("Created", department=Payload())
+    finally:
+        reset_request(token)
+    assert Payload.formatted == 0
+    assert records == []
+
+    token = bind_request(request_to("loud"))
+    try:
+        logger.success("Created", department=Payload())
+    finally:
+        reset_request(token)
+    assert Payload.formatted == 1
+    assert "Created | {'department': Payload()}" in records[0]
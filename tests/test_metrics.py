@@ -0,0 +1,58 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from config import settings
+from infra.database.pool import InstrumentedPool
+from infra.metrics import RequestMetrics, TransactionMetrics, render_metrics
+from presentation.api.middleware import UNMATCHED_ROUTE, MetricsMiddleware
+
+
+@pytest.fixture
+async def pooled_engine():
+    engine = create_async_engine(settings.postgres_dsn, poolclass=InstrumentedPool)
+    yield engine
+    await engine.dispose()
+
+
+def test_render_metrics(pooled_engine):
+    requests = RequestMetrics()
+    requests.observe("/departments/{department_id}", "GET", 0.003)
+    requests.observe("/departments/{department_id}", "GET", 0.2)
+    transactions = TransactionMetrics()
+    transactions.commits = 3
+    pooled_engine.pool.stats.record_wait(0.002)
+
+    text = render_metrics(requests, transactions, {"primary": pooled_engine})
+    lines = text.splitlines()
+
+    labels = 'route="/departments/{department_id}",method="GET"'
+    assert f'http_request_duration_seconds_bucket{{{labels},le="0.005"}} 1' in lines
+    assert f'http_request_duration_seconds_bucket{{{labels},le="0.25"}} 2' in lines
+    assert f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2' in lines
+    assert f"http_request_duration_seconds_count{{{labels}}} 2" in lines
+    assert 'uow_transactions_total{outcome="commit"} 3' in lines
+    assert 'db_pool_checkout_wait_seconds_bucket{pool="primary",le="0.001"} 0' in lines
+    assert 'db_pool_checkout_wait_seconds_bucket{pool="primary",le="0.005"} 1' in lines
+    assert "# TYPE http_requests_in_flight gauge" in lines
+
+
+@pytest.mark.asyncio
+async def test_middleware_observes_route_template():
+    metrics = RequestMetrics()
+    route = SimpleNamespace(path_format="/departments/{department_id}")
+
+    async def app(scope, receive, send):
+        # маршрутизация кладёт найденный маршрут в scope
+        assert metrics.in_flight == 1
+        if scope["path"].startswith("/departments/"):
+            scope["route"] = route
+
+    middleware = MetricsMiddleware(app, metrics)
+    for path in ("/departments/1", "/departments/2", "/missing"):
+        await middleware({"type": "http", "method": "GET", "path": path}, None, None)
+
+    assert metrics.in_flight == 0
+    assert sum(metrics.durations["/departments/{department_id}"]["GET"].counts) == 2
+    assert sum(metrics.durations[UNMATCHED_ROUTE]["GET"].counts) == 1
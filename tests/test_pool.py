@@ -0,0 +1,40 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from config import settings
+from infra.database.pool import InstrumentedPool, pool_metrics
+
+
+@pytest.mark.asyncio
+async def test_pool_metrics_track_checkouts_and_timeouts():
+    engine = create_async_engine(
+        settings.postgres_dsn,
+        poolclass=InstrumentedPool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.1,
+    )
+    try:
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+            busy = pool_metrics(engine)
+
+            with pytest.raises(PoolTimeoutError):
+                async with engine.connect():
+                    pass
+
+        idle = pool_metrics(engine)
+    finally:
+        await engine.dispose()
+
+    assert (busy["size"], busy["opened"], busy["checked_out"]) == (1, 1, 1)
+    assert (busy["idle"], busy["overflow"]) == (0, 0)
+    assert (idle["checked_out"], idle["idle"]) == (0, 1)
+    assert idle["checkouts"] == 1
+    assert idle["timeouts"] == 1
+    assert sum(idle["wait_buckets"].values()) == 1
+    assert idle["wait_seconds_max"] >= 0
+    # после dispose() пул пересоздан, счётчики те же
+    assert pool_metrics(engine)["checkouts"] == 1
@@ -0,0 +1,61 @@
+import json
+from datetime import date, datetime, timezone
+
+from pydantic_core import to_json
+
+from domain.entities import Department, Employee
+from presentation.api.responses import department_item, employee_item
+from presentation.api.schemas import (
+    DepartmentResponse,
+    DepartmentTreeResponse,
+    EmployeeResponse,
+)
+
+CREATED_AT = datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+
+
+def test_items_match_response_models():
+    employees = [
+        Employee(1, 2, "Анна", "Dev", date(2023, 1, 9), CREATED_AT),
+        Employee(2, 2, "Bob", "QA", None, CREATED_AT),
+    ]
+    department = Department(2, "Отдел", 1, CREATED_AT)
+
+    for employee in employees:
+        assert json.loads(to_json(employee_item(employee))) == json.loads(
+            EmployeeResponse.from_domain(employee).model_dump_json()
+        )
+    assert json.loads(to_json(department_item(department))) == json.loads(
+        DepartmentResponse.from_domain(department).model_dump_json()
+    )
+
+
+def test_tree_matches_response_model():
+    employee = Employee(1, 2, "Анна", "Dev", date(2023, 1, 9), CREATED_AT)
+    tree = {
+        "id": 1,
+        "name": "Root",
+        "parent_id": None,
+        "direct_headcount": 0,
+        "subtree_headcount": 1,
+        "children": [
+            {
+                "id": 2,
+                "name": "Team",
+                "parent_id": 1,
+                "direct_headcount": 1,
+                "subtree_headcount": 1,
+                "children": [],
+                "employees": [employee_item(employee)],
+                "children_next_cursor": None,
+                "employees_next_cursor": "WzIsMV0",
+            }
+        ],
+        "employees": [],
+        "children_next_cursor": "WzJd",
+        "employees_next_cursor": None,
+    }
+
+    assert to_json(tree) == (
+        DepartmentTreeResponse.model_validate(tree).model_dump_json().encode()
+    )
@@ -0,0 +1,105 @@
+import asyncio
+from datetime import date
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from config import settings
+from infra.database.slow_queries import SlowQueryLog, is_read_only, redact
+
+
+@pytest.fixture
+def slow_log():
+    return SlowQueryLog(threshold=0.02, explain_rate=1.0, size=2)
+
+
+@pytest.fixture
+async def slow_engine(slow_log):
+    engine = slow_log.instrument(
+        create_async_engine(settings.postgres_dsn, poolclass=NullPool)
+    )
+    yield engine
+    await engine.dispose()
+
+
+def test_redact_keeps_only_non_personal_values():
+    assert redact([1, None, True, 2.5, date(2024, 1, 1), "Иванов", b"x"]) == [
+        1,
+        None,
+        True,
+        2.5,
+        date(2024, 1, 1),
+        "<str>",
+        "<bytes>",
+    ]
+    assert redact(list(range(12))) == [*range(10), "<2 more>"]
+
+
+@pytest.mark.asyncio
+async def test_slow_queries_are_recorded_with_plan(slow_log, slow_engine):
+    async with slow_engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+        await conn.execute(
+            text("SELECT pg_sleep(:delay), :name"), {"delay": 0.03, "name": "Иванов"}
+        )
+    await slow_log.wait()
+
+    [entry] = slow_log.entries
+    assert "pg_sleep" in entry.statement
+    assert entry.parameters == [0.03, "<str>"]
+    assert entry.seconds >= 0.02
+    assert "Execution Time" in entry.plan
+
+
+def test_only_reads_are_analyzed():
+    assert is_read_only("SELECT * FROM departments")
+    assert is_read_only("WITH t AS (SELECT 1) SELECT * FROM t")
+    assert not is_read_only("SELECT * FROM employees FOR UPDATE")
+    assert not is_read_only("WITH moved AS (UPDATE employees SET x = 1) SELECT 1")
+    assert not is_read_only("INSERT INTO employees VALUES (1)")
+
+
+@pytest.mark.asyncio
+async def test_writes_are_explained_without_running(slow_log, slow_engine):
+    async with slow_engine.begin() as conn:
+        await conn.execute(text("CREATE TABLE slow_probe (id int)"))
+        await conn.execute(text("INSERT INTO slow_probe VALUES (1)"))
+    try:
+        async with slow_engine.begin() as conn:
+            await conn.execute(
+                text("UPDATE slow_probe SET id = 2 FROM pg_sleep(0.03) WHERE id = 1")
+            )
+            # строка ещё заблокирована транзакцией запроса, а EXPLAIN без
+            # ANALYZE её не трогает и не ждёт
+            await asyncio.wait_for(slow_log.wait(), timeout=5)
+            plan = slow_log.entries[-1].plan
+            assert "Update on slow_probe" in plan
+            assert "actual time" not in plan
+
+        async with slow_engine.connect() as conn:
+            assert await conn.scalar(text("SELECT id FROM slow_probe")) == 2
+    finally:
+        async with slow_engine.begin() as conn:
+            await conn.execute(text("DROP TABLE slow_probe"))
+
+
+@pytest.mark.asyncio
+async def test_slow_query_endpoints_need_admin_token(client, monkeypatch):
+    response = await client.get("/api/system/slow-queries")
+    assert response.status_code == 404
+
+    monkeypatch.setattr(settings, "admin_token", "secret")
+    response = await client.get(
+        "/api/system/slow-queries", headers={"X-Admin-Token": "wrong"}
+    )
+    assert response.status_code == 403
+    response = await client.get(
+        "/api/system/slow-queries", headers={"X-Admin-Token": "secret"}
+    )
+    assert response.status_code == 200
+    response = await client.delete(
+        "/api/system/slow-queries", headers={"X-Admin-Token": "secret"}
+    )
+    assert response.status_code == 204
@@ -0,0 +1,53 @@
+import time
+
+from infra.cache import TreeCache
+
+
+def test_tree_cache_lru_and_etag():
+    cache = TreeCache(max_size=2, ttl=60)
+
+    first = cache.put("a", b"{}", {1}, cache.generation)
+    cache.put("b", b"[]", {2}, cache.generation)
+    assert cache.get("a") is first
+    cache.put("c", b"{}", {3}, cache.generation)
+
+    # "b" дольше всех не читали
+    assert cache.get("b") is None
+    assert cache.get("c").etag == first.etag
+    assert first.etag.startswith('"') and first.etag.endswith('"')
+
+
+def test_tree_cache_ttl():
+    cache = TreeCache(max_size=10, ttl=0.01)
+    cache.put("a", b"{}", {1}, cache.generation)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_tree_cache_invalidates_by_department():
+    cache = TreeCache(max_size=10, ttl=60)
+    cache.put("root", b"1", {1, 2, 3}, cache.generation)
+    cache.put("branch", b"2", {2, 3}, cache.generation)
+    cache.put("other", b"3", {4}, cache.generation)
+
+    cache.invalidate({3})
+    assert cache.get("root") is None
+    assert cache.get("branch") is None
+    assert cache.get("other") is not None
+
+
+def test_tree_cache_skips_trees_read_before_invalidation():
+    cache = TreeCache(max_size=10, ttl=60)
+    generation = cache.generation
+    cache.invalidate({1})
+
+    entry = cache.put("a", b"{}", {1}, generation)
+    assert entry.body == b"{}"
+    assert cache.get("a") is None
+
+
+def test_disabled_tree_cache_keeps_nothing():
+    cache = TreeCache(max_size=0, ttl=60)
+    assert cache.put("a", b"{}", {1}, cache.generation).etag
+    assert cache.get("a") is None
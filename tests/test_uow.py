@@ -0,0 +1,256 @@
+import time
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from starlette.datastructures import Headers
+
+from domain.entities import Department, Employee
+from infra.cache import TreeCache
+from infra.database.hierarchy import DepartmentHierarchyIndex
+from infra.database.routing import ReplicaRouter, stop_tracking_writes, track_writes
+from infra.database.uow import (
+    READ_ONLY_OPTIONS,
+    SQLAlchemyReadOnlyUnitOfWork,
+    SQLAlchemyUnitOfWork,
+)
+from presentation.api.middleware import ReadYourWritesMiddleware
+
+
+@pytest.fixture
+def read_only_factory(engine):
+    return async_sessionmaker(
+        engine.execution_options(**READ_ONLY_OPTIONS), expire_on_commit=False
+    )
+
+
+@pytest.mark.asyncio
+async def test_read_only_uow_connects_lazily(read_only_factory, statements):
+    async with SQLAlchemyReadOnlyUnitOfWork(read_only_factory) as uow:
+        assert not uow.session.in_transaction()
+    assert statements == []
+
+
+@pytest.mark.asyncio
+async def test_read_only_uow_transaction(read_only_factory, statements):
+    async with SQLAlchemyReadOnlyUnitOfWork(read_only_factory) as uow:
+        assert await uow.department_repo.get_by_id(-1) is None
+        read_only = await uow.session.scalar(text("SHOW transaction_read_only"))
+        isolation = await uow.session.scalar(text("SHOW transaction_isolation"))
+        assert (read_only, isolation) == ("on", "serializable")
+
+        with pytest.raises(DBAPIError):
+            await uow.session.execute(text("DELETE FROM employees"))
+
+        with pytest.raises(RuntimeError):
+            await uow.commit()
+
+    assert not any(s.strip().upper().startswith("COMMIT") for s in statements)
+
+
+class CountingFactory:
+    # подставная фабрика: считает выданные сессии
+    def __init__(self, factory):
+        self.factory = factory
+        self.opened = 0
+
+    def __call__(self):
+        self.opened += 1
+        return self.factory()
+
+
+@pytest.mark.asyncio
+async def test_only_read_only_uow_reads_hierarchy_index(engine, read_only_factory):
+    # индекс знает подразделение, которого нет в БД, и не перепроверяет версию
+    index = DepartmentHierarchyIndex(check_interval=3600)
+    index.load([(-7, "Ghost", None, None)], version=10**9)
+    write_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async with SQLAlchemyReadOnlyUnitOfWork(read_only_factory, index) as uow:
+        assert (await uow.department_repo.get_by_id(-7)).name == "Ghost"
+    async with SQLAlchemyUnitOfWork(write_factory, index) as uow:
+        assert await uow.department_repo.get_by_id(-7) is None
+
+
+@pytest.fixture
+def router_factories(read_only_factory):
+    primary = CountingFactory(read_only_factory)
+    replicas = [CountingFactory(read_only_factory) for _ in range(2)]
+    return primary, replicas
+
+
+@pytest.mark.asyncio
+async def test_read_only_uow_goes_to_replicas(router_factories):
+    primary, replicas = router_factories
+    router = ReplicaRouter(primary, replicas)
+
+    for _ in range(4):
+        async with SQLAlchemyReadOnlyUnitOfWork(primary, router=router) as uow:
+            await uow.employee_repo.get_by_id(-1)
+
+    assert primary.opened == 0
+    assert [replica.opened for replica in replicas] == [2, 2]
+
+
+@pytest.mark.asyncio
+async def test_reads_stick_to_primary_after_write(engine, router_factories):
+    primary, replicas = router_factories
+    router = ReplicaRouter(primary, replicas, sticky_seconds=60)
+    write_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    stamp, token = track_writes()
+    try:
+        # без запросов транзакции нет, и запись не считается
+        async with SQLAlchemyUnitOfWork(write_factory, router=router):
+            pass
+        async with SQLAlchemyReadOnlyUnitOfWork(primary, router=router):
+            pass
+        assert primary.opened == 0 and not stamp.wrote
+
+        async with SQLAlchemyUnitOfWork(write_factory, router=router) as uow:
+            await uow.employee_repo.get_by_id(-1)
+        assert stamp.wrote
+
+        async with SQLAlchemyReadOnlyUnitOfWork(primary, router=router):
+            pass
+    finally:
+        stop_tracking_writes(token)
+
+    # другой клиент без отметки читает с реплики
+    _, token = track_writes()
+    try:
+        async with SQLAlchemyReadOnlyUnitOfWork(primary, router=router):
+            pass
+    finally:
+        stop_tracking_writes(token)
+
+    assert primary.opened == 1
+    assert sum(replica.opened for replica in replicas) == 2
+
+
+def test_sticky_window(router_factories):
+    primary, replicas = router_factories
+    router = ReplicaRouter(primary, replicas, sticky_seconds=60)
+
+    now = time.time()
+    # запись 59 с назад и отметка чуть «из будущего» (расхождение часов) —
+    # в окне; 61 с назад и час вперёд — нет
+    for written_at, sticky in (
+        (now - 59, True),
+        (now + 30, True),
+        (now - 61, False),
+        (now + 3600, False),
+        (None, False),
+    ):
+        _, token = track_writes(written_at)
+        try:
+            router.read_session().sync_session.close()
+        finally:
+            stop_tracking_writes(token)
+        assert primary.opened == (1 if sticky else 0), written_at
+        primary.opened = 0
+
+
+def test_router_without_replicas_or_stickiness(router_factories):
+    primary, replicas = router_factories
+
+    router = ReplicaRouter(primary)
+    router.read_session().sync_session.close()
+    assert primary.opened == 1
+
+    router = ReplicaRouter(primary, replicas)
+    stamp, token = track_writes()
+    try:
+        router.record_write()
+        router.read_session().sync_session.close()
+    finally:
+        stop_tracking_writes(token)
+    assert not stamp.wrote
+    assert primary.opened == 1
+    assert replicas[0].opened == 1
+
+
+@pytest.mark.asyncio
+async def test_middleware_carries_write_stamp(router_factories):
+    primary, replicas = router_factories
+    router = ReplicaRouter(primary, replicas, sticky_seconds=60)
+
+    async def app(scope, receive, send):
+        router.read_session().sync_session.close()
+        if scope["method"] == "POST":
+            router.record_write()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    middleware = ReadYourWritesMiddleware(app, sticky_seconds=60)
+
+    async def request(method, headers=()):
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {"type": "http", "method": method, "path": "/", "headers": headers}
+        await middleware(scope, None, send)
+        return Headers(raw=messages[0]["headers"])
+
+    response = await request("POST")
+    assert primary.opened == 0
+    written_at = response["x-last-write-at"]
+    assert response["set-cookie"].startswith(f"last_write_at={written_at}; Max-Age=60")
+
+    # отметку видит любой воркер: в заголовке или в cookie
+    response = await request("GET", [(b"x-last-write-at", written_at.encode())])
+    assert "x-last-write-at" not in response
+    await request("GET", [(b"cookie", f"last_write_at={written_at}".encode())])
+    assert primary.opened == 2
+
+    stale = str(float(written_at) - 61)
+    await request("GET", [(b"cookie", f"last_write_at={stale}".encode())])
+    await request("GET", [(b"x-last-write-at", b"garbage")])
+    assert primary.opened == 2
+
+
+@pytest.mark.asyncio
+async def test_commit_invalidates_trees_with_touched_departments(engine):
+    # commit внутри UoW фиксирует только точку сохранения, внешняя транзакция
+    # откатывается в конце теста
+    connection = await engine.connect()
+    transaction = await connection.begin()
+    factory = async_sessionmaker(
+        bind=connection,
+        expire_on_commit=False,
+        join_transaction_mode="create_savepoint",
+    )
+    cache = TreeCache(max_size=10, ttl=60)
+    try:
+        async with SQLAlchemyUnitOfWork(factory, tree_cache=cache) as uow:
+            company = await uow.department_repo.create(
+                Department.create(name="Company", parent_id=None)
+            )
+            team = await uow.department_repo.create(
+                Department.create(name="Team", parent_id=company.id)
+            )
+            other = await uow.department_repo.create(
+                Department.create(name="Other", parent_id=None)
+            )
+
+        cache.put("company", b"1", {company.id}, cache.generation)
+        cache.put("team", b"2", {team.id}, cache.generation)
+        cache.put("other", b"3", {other.id}, cache.generation)
+
+        # сотрудник в Team меняет счётчики Team и Company
+        async with SQLAlchemyUnitOfWork(factory, tree_cache=cache) as uow:
+            await uow.employee_repo.create(
+                Employee.create(
+                    full_name="Eve", position="Dev", department_id=team.id, hired_at=None
+                )
+            )
+
+        assert cache.get("company") is None
+        assert cache.get("team") is None
+        assert cache.get("other") is not None
+    finally:
+        await transaction.rollback()
+        await connection.close()